@@ -0,0 +1,54 @@
+"""graph checkpoints
+
+Revision ID: 7b3e9d2a5c10
+Revises: c4f42a01ff05
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9d2a5c10'
+down_revision: Union[str, Sequence[str], None] = 'c4f42a01ff05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('graph_checkpoints',
+    sa.Column('thread_id', sa.String(), nullable=False),
+    sa.Column('checkpoint_ns', sa.String(), nullable=False),
+    sa.Column('checkpoint_id', sa.String(), nullable=False),
+    sa.Column('parent_checkpoint_id', sa.String(), nullable=True),
+    sa.Column('checkpoint_type', sa.String(), nullable=True),
+    sa.Column('checkpoint', sa.LargeBinary(), nullable=True),
+    sa.Column('metadata_type', sa.String(), nullable=True),
+    sa.Column('metadata_blob', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id')
+    )
+    op.create_index(op.f('ix_graph_checkpoints_created_at'), 'graph_checkpoints', ['created_at'], unique=False)
+    op.create_table('graph_checkpoint_writes',
+    sa.Column('thread_id', sa.String(), nullable=False),
+    sa.Column('checkpoint_ns', sa.String(), nullable=False),
+    sa.Column('checkpoint_id', sa.String(), nullable=False),
+    sa.Column('task_id', sa.String(), nullable=False),
+    sa.Column('idx', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(), nullable=True),
+    sa.Column('value_type', sa.String(), nullable=True),
+    sa.Column('value', sa.LargeBinary(), nullable=True),
+    sa.Column('task_path', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('graph_checkpoint_writes')
+    op.drop_index(op.f('ix_graph_checkpoints_created_at'), table_name='graph_checkpoints')
+    op.drop_table('graph_checkpoints')
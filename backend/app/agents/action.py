@@ -1,24 +1,32 @@
 import json
 import logging
+from typing import AsyncIterator
 
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import StructuredTool
 
 from app.agents.base import BaseAgent
-from app.api.schemas import AgentAction
+from app.agents.json_stream import JsonArrayStream
+from app.api.schemas import ActionPlan, AgentAction
+from app.context.budget import PromptSection, TokenBudget, perception_sections
 from app.llm.base import BaseLLMClient
 
 logger = logging.getLogger(__name__)
 
 
 class ActionAgent(BaseAgent):
+    name = "action"
+    reads_perception = True
+
     def __init__(
         self,
         llm: BaseLLMClient,
         template_name="action",
         tools: list[StructuredTool] | None = None,
+        output_mode="text",
+        budget: TokenBudget | None = None,
     ):
-        super().__init__(llm, template_name, tools)
+        super().__init__(llm, template_name, tools, output_mode, budget)
 
     def render_human_message(
         self,
@@ -35,33 +43,39 @@ class ActionAgent(BaseAgent):
           - an optional retrieved skill (cold vs. warm start)
           - Voyager-style critique + last plan on retry
         """
-        content = (
-            "--- TASK ---\n"
-            f"Current Goal: {current_task}\n\n"
-            "--- PERCEPTION ---\n"
-            f"{context}"
-        )
+        sections = [
+            PromptSection(
+                "task",
+                "--- TASK ---\n"
+                f"Current Goal: {current_task}\n\n"
+                "--- PERCEPTION ---\n",
+            ),
+            *perception_sections(context),
+        ]
 
         # Cold(1st) vs. Warm(2nd+) start. ActionAgent can improvise without
         # a stored skill, but follows the guide when it matches.
         if skill_guide:
-            content += (
+            sections.append(PromptSection.of(
+                "skill_guide",
                 "\n\n--- SUGGESTED PROCEDURE (MEMORY) ---\n"
                 "I have done this task before. Here is the guide:\n"
                 f"{skill_guide}\n"
-                "INSTRUCTION: Follow the guide if it matches the current situation."
-            )
+                "INSTRUCTION: Follow the guide if it matches the current situation.",
+            ))
 
         # Voyager feedback loop.
         if last_plan and critique:
-            content += (
+            sections.append(PromptSection.of(
+                "previous_failure",
                 "\n\n--- PREVIOUS FAILURE ---\n"
                 "Your last plan failed.\n"
                 f"Plan: {json.dumps(last_plan)}\n"
                 f"Error/Critique: {critique}\n"
-                "ADVICE: Use a different tool or check your arguments."
-            )
+                "ADVICE: Use a different tool or check your arguments.",
+            ))
 
+        content = self._fit_prompt(sections)
         return HumanMessage(content=content)
 
     async def generate_plan(
@@ -73,8 +87,56 @@ class ActionAgent(BaseAgent):
         last_plan: str = "",
         critique: str = "",
     ) -> list[AgentAction]:
-        
+        sys_msg = self.render_system_message().content
+        human_msg = self.render_human_message(
+            context=context,
+            current_task=current_task,
+            skill_guide=skill_guide,
+            last_plan=last_plan,
+            critique=critique,
+        ).content
+
+        retries = 0
+        if self.output_mode == "structured":
+            plan = await self._generate_structured(sys_msg, human_msg, ActionPlan)
+            if plan is not None:
+                logger.info("\n\n[Action Agent response]:%s\n", plan)
+                self._record_call(retries=0)
+                return plan.actions
+            retries = 1
+
         response_text = await self.llm.generate_response(
+            system_prompt=sys_msg,
+            user_message=human_msg,
+        )
+
+        logger.info("\n\n[Action Agent response]:%s\n", response_text)
+
+        self._record_call(retries)
+        return self._generate_plan_helper(response_text)
+
+    async def stream_plan(
+        self,
+        *,
+        context: str,
+        current_task: str,
+        skill_guide: str = "",
+        last_plan: str = "",
+        critique: str = "",
+    ) -> AsyncIterator[AgentAction]:
+        """Same plan as `generate_plan`, yielded step by step as each
+        action's JSON object closes in the token stream.
+
+        If the incremental parser finds nothing (e.g. a `[C]` in leading
+        prose was mistaken for the array), the full reply is re-parsed
+        with the regular helper once the stream ends. Streaming always
+        uses the text path: structured output arrives as one object.
+        """
+        parser = JsonArrayStream()
+        chunks: list[str] = []
+        emitted = 0
+
+        async for chunk in self.llm.stream_response(
             system_prompt=self.render_system_message().content,
             user_message=self.render_human_message(
                 context=context,
@@ -83,11 +145,20 @@ class ActionAgent(BaseAgent):
                 last_plan=last_plan,
                 critique=critique,
             ).content,
-        )
+        ):
+            chunks.append(chunk)
+            for item in parser.feed(chunk):
+                action = self._validate_action(item, emitted)
+                if action is not None:
+                    emitted += 1
+                    yield action
 
-        logger.info("\n\n[Action Agent response]:%s\n", response_text)
+        response_text = "".join(chunks)
+        logger.info("\n\n[Action Agent response (streamed)]:%s\n", response_text)
 
-        return self._generate_plan_helper(response_text)
+        if emitted == 0:
+            for action in self._generate_plan_helper(response_text):
+                yield action
 
     def _generate_plan_helper(self, content: str) -> list[AgentAction]:
         """
@@ -103,11 +174,16 @@ class ActionAgent(BaseAgent):
 
         valid_actions = []
         for i, item in enumerate(data):
-            try:
-                action = AgentAction(**item)
+            action = self._validate_action(item, i)
+            if action is not None:
                 valid_actions.append(action)
-            except Exception as e:
-                logger.warning("Skipping invalid action at index %d: %s", i, e)
-                continue
 
         return valid_actions
+
+    @staticmethod
+    def _validate_action(item, index: int) -> AgentAction | None:
+        try:
+            return AgentAction(**item)
+        except Exception as e:
+            logger.warning("Skipping invalid action at index %d: %s", index, e)
+            return None
@@ -1,110 +1,235 @@
-import re
 import json
 import logging
+import re
 from abc import ABC
+from typing import Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
 from langchain_core.messages import SystemMessage
 from langchain_core.tools import StructuredTool
+from app.agents.json_stream import extract_json
+from app.context.budget import PromptSection, TokenBudget
+from app.context.view import kitchen_layout_section
+from app.core.metrics import metrics
 from app.llm.base import BaseLLMClient
 from app.prompts import loader as ld
 
+T = TypeVar("T", bound=BaseModel)
 logger = logging.getLogger(__name__)
 
+# "structured": ask the provider for output bound to the agent's schema
+# (JSON schema / function calling), falling back to the text path when
+# it fails. "text": free text parsed by `_parse_json_helper`.
+OUTPUT_MODES = ("structured", "text")
+
+# An array `repair_json` may start at: the bracket is followed by
+# something a (repairable) value can start with, so "per [C]" is not one.
+_ARRAY_START = re.compile(r"""\[\s*[-\d\[\]{"'tfnNTFI]""")
+
 
 class BaseAgent(ABC):
+    # Metric label: agent.<name>.*
+    name = "agent"
+    # Agents whose user message carries the perception context get the
+    # static [LAYOUT] block at the end of their system prompt.
+    reads_perception = False
+
     def __init__(
         self,
         llm: BaseLLMClient,
         template_name: str,
         tools: list[StructuredTool] | None = None,
+        output_mode: str = "text",
+        budget: TokenBudget | None = None,
     ):
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Invalid output mode: {output_mode}")
         self.llm = llm
         self.tools = tools or []
-        self.system_prompts = ld.build_system_prompt(template_name, self.tools)
+        self.output_mode = output_mode
+        self.budget = budget
+        self.system_prompts = ld.build_system_prompt(
+            template_name,
+            self.tools,
+            [kitchen_layout_section()] if self.reads_perception else None,
+        )
 
     def render_system_message(self) -> SystemMessage:
         return SystemMessage(content=self.system_prompts)
 
+    def _fit_prompt(self, sections: list[PromptSection]) -> str:
+        """The user message from `sections`, trimmed to the agent's token
+        budget (see app/context/budget.py). Every LLM call sends a message
+        built here, so no prompt goes out unchecked."""
+        if self.budget is None:
+            return "".join(s.text for s in sections)
+        return self.budget.fit(self.system_prompts, sections)
+
+    async def _generate_structured(
+        self, system_prompt: str, user_message: str, response_model: Type[T]
+    ) -> T | None:
+        """Provider-native structured output, or None when the provider
+        could not produce a valid `response_model` (caller falls back to text)."""
+        try:
+            result = await self.llm.generate_structured(
+                system_prompt=system_prompt,
+                user_message=user_message,
+                response_model=response_model,
+            )
+        except Exception as e:
+            result = e
+        if not isinstance(result, response_model):
+            logger.warning("%s structured output failed, falling back to text: %r", self.name, result)
+            metrics.counter(f"agent.{self.name}.structured_fallbacks").inc()
+            return None
+        return result
+
+    def _record_call(self, retries: int) -> None:
+        """One agent call finished after `retries` extra LLM round trips
+        (re-prompts, or the text fallback of a structured call)."""
+        calls = metrics.counter(f"agent.{self.name}.calls.{self.output_mode}")
+        total = metrics.counter(f"agent.{self.name}.retries.{self.output_mode}")
+        calls.inc()
+        total.inc(retries)
+        metrics.gauge(f"agent.{self.name}.retry_rate.{self.output_mode}").set(
+            total.value / calls.value
+        )
+
     def _parse_json_helper(self, content: str) -> list | dict | None:
         """Extract a JSON value (list or dict) from model output.
 
         Why not just `json.loads(content)`? LLMs sometimes wrap the JSON
         in prose, markdown code fences, or a leading "Here's the JSON:"
-        preamble. We try progressively looser strategies and crucially
-        try BOTH shapes independently — a previous version returned None
-        the first time a regex bracket match failed to parse, so
-        responses with `[C]` / `[B]` references inside a reasoning
-        string were incorrectly dropped.
+        preamble. A reply that is pure JSON gets one C-speed parse;
+        anything else goes through a single-pass scan for top-level
+        values (`json_stream.extract_json`), which prefers an object
+        over an array so a `[C]` / `[B]` reference inside a reasoning
+        string can't shadow the real reply.
         """
         stripped = content.strip()
 
-        # 1. Pure JSON (most common when the model follows instructions).
-        try:
-            return json.loads(stripped)
-        except json.JSONDecodeError:
-            pass
-
-        # 2. Strip markdown code fences (```json ... ``` or ``` ... ```).
-        fenced = re.sub(
-            r"^```(?:json)?\s*|\s*```$", "", stripped, flags=re.MULTILINE,
-        ).strip()
-        if fenced != stripped:
+        # Pure JSON (most common when the model follows instructions).
+        if stripped[:1] in ("{", "["):
             try:
-                return json.loads(fenced)
+                return json.loads(stripped)
             except json.JSONDecodeError:
                 pass
 
-        # 3. Balanced-bracket extraction. Walk the string looking for a
-        # top-level `{...}` or `[...]` that parses cleanly. Objects are
-        # tried before lists because when a critic/curriculum reply like
-        #     {"task": "X", "reasoning": "[C] shows ..."}
-        # runs the old regex first, the `[C]` inside reasoning wins and
-        # the whole response is lost.
-        for open_ch, close_ch in (("{", "}"), ("[", "]")):
-            parsed = self._extract_balanced(content, open_ch, close_ch)
-            if parsed is not None:
-                return parsed
-
-        logger.warning("No JSON found. First 200 chars: %s", content[:200])
-        return None
-
-    @staticmethod
-    def _extract_balanced(
-        content: str, open_ch: str, close_ch: str,
-    ) -> list | dict | None:
-        """Find every top-level `open_ch...close_ch` block and return
-        the first one that parses as JSON."""
-        i = 0
-        while True:
-            start = content.find(open_ch, i)
-            if start == -1:
-                return None
-            depth = 0
-            end = -1
-            in_string = False
-            escape = False
-            for j in range(start, len(content)):
-                ch = content[j]
-                if escape:
-                    escape = False
-                    continue
-                if ch == "\\":
-                    escape = True
-                    continue
-                if ch == '"':
-                    in_string = not in_string
-                    continue
-                if in_string:
-                    continue
-                if ch == open_ch:
-                    depth += 1
-                elif ch == close_ch:
-                    depth -= 1
-                    if depth == 0:
-                        end = j
-                        break
-            if end == -1:
-                return None
-            try:
-                return json.loads(content[start:end + 1])
-            except json.JSONDecodeError:
-                i = start + 1  # try next occurrence
+        parsed = extract_json(content)
+        if parsed is None:
+            logger.warning("No JSON found. First 200 chars: %s", content[:200])
+        return parsed
+
+    def _repair_json(self, content: str, response_model: Type[T]) -> T | None:
+        """Fix common JSON breakage locally (see `repair_json`) and validate
+        against `response_model`; None when that is not enough and the
+        caller has to re-prompt."""
+        repaired = repair_json(content)
+        if repaired is None:
+            return None
+        try:
+            data = json.loads(repaired)
+            if isinstance(data, list) and data:
+                data = data[0]
+            result = response_model.model_validate(data)
+        except (json.JSONDecodeError, ValidationError):
+            return None
+        logger.info("%s response repaired locally", self.name)
+        metrics.counter(f"agent.{self.name}.repaired").inc()
+        return result
+
+
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def repair_json(content: str) -> str | None:
+    """Rewrite the first JSON value in `content` into something
+    `json.loads` accepts, fixing what models commonly get wrong:
+
+    - trailing commas before `}` / `]`
+    - single-quoted strings and Python `True` / `False` / `None`
+    - raw newlines and tabs inside strings (e.g. a multi-line `reasoning`)
+    - truncation: an unterminated string, a dangling `,` or `:` and the
+      missing closing brackets
+
+    Prose before and after the value is dropped. The first `{` wins over
+    an earlier `[` (the outputs repaired are all objects, and the prose
+    before one may cite "[C]", as in `extract_json`); without a `{` the
+    first array start is used. Deterministic and one pass over the text;
+    returns None if there is neither.
+    """
+    start = content.find("{")
+    if start == -1:
+        match = _ARRAY_START.search(content)
+        if match is None:
+            return None
+        start = match.start()
+
+    out: list[str] = []
+    closers: list[str] = []
+    quote = None  # delimiter of the string being copied
+    escape = False
+    i = start
+    while i < len(content):
+        ch = content[i]
+        if quote is not None:
+            if escape:
+                out.append(ch)
+                escape = False
+            elif ch == "\\" and content[i + 1:i + 2] == "'":
+                out.append("'")
+                i += 1
+            elif ch == "\\":
+                out.append(ch)
+                escape = True
+            elif ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch in _STRING_ESCAPES:
+                out.append(_STRING_ESCAPES[ch])
+            elif ch >= " ":
+                out.append(ch)
+        elif ch in "\"'":
+            out.append('"')
+            quote = ch
+        elif ch in "{[":
+            out.append(ch)
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            out.append(closers.pop())
+            if not closers:
+                break
+        elif ch.isalpha():
+            end = i
+            while end < len(content) and content[end].isalpha():
+                end += 1
+            word = content[i:end]
+            out.append(_PY_LITERALS.get(word, word))
+            i = end
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    # Truncated reply: close whatever is still open.
+    if quote is not None:
+        if escape:
+            out.pop()
+        out.append('"')
+    if closers:
+        _drop_trailing_comma(out)
+        if out[-1] == ":":
+            out.append("null")
+        out.extend(reversed(closers))
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
@@ -0,0 +1,153 @@
+"""Kitchen-level task coordination.
+
+Each client_id runs its own curriculum, so two agents in the same
+kitchen can both decide to "Set up the plate", queue for the same
+CutBoard and burn retries undoing each other. Sessions that connect
+with the same kitchen id (`?kitchen=` on the WebSocket) share one
+`KitchenCoordinator` view that hands out non-conflicting sub-tasks of
+the burger pipeline, in this order:
+
+- STACK the plate's `next_expected` layer once it is parked or held.
+- PLATE_SETUP while no plate is parked.
+- PREP a layer nobody has made or claimed, on a station nobody else is
+  using: one agent cooks MEATBALL at the Oven while another chops.
+
+An assignment claims resources — `plate`, `station:<id>` and
+`slot:<i>`, a position in HAMBURGER_STACK (BreadSlice appears twice).
+A client's claim ends when it asks for its next task, when it
+disconnects (`release`), or KITCHEN_CLAIM_TTL_S after its last frame
+(`touch`), so a crashed client never blocks the kitchen.
+
+Assigned tasks use the planner's task shapes: `curriculum_node` skips
+the curriculum LLM and `action_node` gets a symbolic plan, so the
+kitchen's planning is decided in one pass over shared claims rather
+than one LLM call per agent. When nothing is free, or the burger is
+done, `assign` returns None and the curriculum LLM decides as before.
+
+Claims live in-process. With CLUSTER_MODE, all clients of a kitchen
+must be routed to the same worker to be coordinated.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+
+from app.agents.planner import free_table, same_item, table_contents
+from app.api.schemas import CurriculumOutput, Perception
+from app.context.view import HAMBURGER_STACK, PROCESSING_RULES, RAW_FOR, HeldItem
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PLATE = "plate"
+
+
+@dataclass
+class Claim:
+    task: str
+    resources: frozenset[str]
+    expires_at: float
+
+
+class KitchenCoordinator:
+    def __init__(self, claim_ttl_s: float = 120.0):
+        self.claim_ttl_s = claim_ttl_s
+        # kitchen id → client id → what that client is working on
+        self._kitchens: dict[str, dict[str, Claim]] = {}
+
+    def assign(
+        self, kitchen_id: str, client_id: str, perception: Perception
+    ) -> CurriculumOutput | None:
+        """Next sub-task for `client_id` that no peer in the kitchen holds,
+        or None to let the curriculum LLM decide. Replaces the client's
+        previous claim."""
+        claims = self._claims(kitchen_id)
+        claims.pop(client_id, None)
+        taken = frozenset().union(*(claim.resources for claim in claims.values()))
+
+        subtask = next_subtask(perception, taken)
+        if subtask is None:
+            metrics.counter("coordinator.deferred").inc()
+            return None
+
+        task, resources, reasoning = subtask
+        claims[client_id] = Claim(task, resources, time.monotonic() + self.claim_ttl_s)
+        metrics.counter("coordinator.assigned").inc()
+        logger.info(f"--- 🧑‍🍳 COORDINATOR: {kitchen_id}/{client_id} → '{task}' ---")
+        return CurriculumOutput(task=task, reasoning=reasoning, difficulty=1)
+
+    def touch(self, kitchen_id: str, client_id: str) -> None:
+        """Keep the client's claim alive; called once per frame."""
+        claim = self._claims(kitchen_id).get(client_id)
+        if claim is not None:
+            claim.expires_at = time.monotonic() + self.claim_ttl_s
+
+    def release(self, kitchen_id: str, client_id: str) -> None:
+        claims = self._kitchens.get(kitchen_id)
+        if claims is None:
+            return
+        claims.pop(client_id, None)
+        if not claims:
+            del self._kitchens[kitchen_id]
+
+    def tasks(self, kitchen_id: str) -> dict[str, str]:
+        """client id → claimed task, for the kitchen's live claims."""
+        return {client: claim.task for client, claim in self._claims(kitchen_id).items()}
+
+    def _claims(self, kitchen_id: str) -> dict[str, Claim]:
+        claims = self._kitchens.setdefault(kitchen_id, {})
+        now = time.monotonic()
+        for client_id in [c for c, claim in claims.items() if claim.expires_at < now]:
+            logger.info(f"Claim of {kitchen_id}/{client_id} expired: '{claims[client_id].task}'")
+            del claims[client_id]
+        return claims
+
+
+def next_subtask(
+    perception: Perception, taken: frozenset[str]
+) -> tuple[str, frozenset[str], str] | None:
+    """(task, resources, reasoning) of the first pipeline step whose
+    resources are not in `taken`, or None."""
+    assembly = perception.assembly
+    if assembly.is_done:
+        return None
+
+    plate = assembly.plate_location
+    held = HeldItem.from_raw(perception.self.held_item)
+    parked = [item for table, item in table_contents(perception).items() if item and table != plate]
+    supply = list(parked) if held.is_empty_hands else [*parked, held.name]
+
+    layer = assembly.next_expected
+    if plate and layer and PLATE not in taken and any(same_item(item, layer) for item in supply):
+        return (
+            f"Stack {layer} onto the plate at {plate}",
+            frozenset({PLATE}),
+            f"{layer} is ready and is the next layer the plate accepts.",
+        )
+
+    if not plate and PLATE not in taken:
+        table = free_table(perception)
+        if table is not None:
+            return (
+                f"Set up the assembly plate on {table}",
+                frozenset({PLATE}),
+                "No plate is parked yet and nobody else is setting one up.",
+            )
+
+    # Layers still to stack, minus the ones already made.
+    for index, layer in enumerate(HAMBURGER_STACK[len(assembly.stack):], len(assembly.stack)):
+        made = next((i for i, item in enumerate(supply) if same_item(item, layer)), None)
+        if made is not None:
+            supply.pop(made)
+            continue
+        station = PROCESSING_RULES[RAW_FOR[layer]][0]
+        resources = frozenset({f"slot:{index}", f"station:{station}"})
+        if resources & taken:
+            continue
+        return (
+            f"Prepare {layer} and place it on a Preparation table",
+            resources,
+            f"{layer} is still missing and the {station} is free.",
+        )
+    return None
@@ -4,20 +4,27 @@ from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent
 from app.api.schemas import CriticOutput
+from app.context.budget import PromptSection, TokenBudget, perception_sections
+from app.core.metrics import metrics
 from app.llm.base import BaseLLMClient
 
 logger = logging.getLogger(__name__)
 
 
 class CriticAgent(BaseAgent):
+    name = "critic"
+    reads_perception = True
+
     def __init__(
         self,
         llm: BaseLLMClient,
         template_name="critic",
         tools=None,
         mode="auto",
+        output_mode="text",
+        budget: TokenBudget | None = None,
     ):
-        super().__init__(llm, template_name, tools)
+        super().__init__(llm, template_name, tools, output_mode, budget)
         self.mode = mode
 
     def render_human_message(
@@ -28,12 +35,15 @@ class CriticAgent(BaseAgent):
         """
         Judge GOAL (task) vs. RESULT (current perception).
         """
-        content = (
-            "--- GOAL ---\n"
-            f"{current_task}\n\n"
-            "--- PERCEPTION ---\n"
-            f"{context}"
-        )
+        content = self._fit_prompt([
+            PromptSection(
+                "goal",
+                "--- GOAL ---\n"
+                f"{current_task}\n\n"
+                "--- PERCEPTION ---\n",
+            ),
+            *perception_sections(context),
+        ])
         return HumanMessage(content=content)
 
     # Check entry point, act as router
@@ -47,10 +57,21 @@ class CriticAgent(BaseAgent):
         human_msg_content = self.render_human_message(context, current_task).content
 
         if self.mode == "auto":
+            attempts = 0
+            if self.output_mode == "structured":
+                critique = await self._generate_structured(
+                    sys_msg_content, human_msg_content, CriticOutput
+                )
+                if critique is not None:
+                    logger.info("\n\n[[Critic Agent response]]:%s\n", critique)
+                    self._record_call(retries=0)
+                    return critique
+                attempts = 1
             return await self.__ai_check_task_success(
                 sys_msg_content,
                 human_msg_content,
                 max_retries,
+                attempts=attempts,
             )
         elif self.mode == "manual":
             return self.__human_check_task_success()
@@ -64,9 +85,11 @@ class CriticAgent(BaseAgent):
         max_retries,
         last_error: str = "",
         last_raw_response: str = "",
+        attempts: int = 0,
     ) -> CriticOutput:
         if max_retries == 0:
             logger.error("Failed to parse Critic Agent response. Max retries reached.")
+            self._record_call(retries=attempts - 1)
             return CriticOutput(
                 success=False,
                 reasoning="Max retries",
@@ -103,9 +126,19 @@ class CriticAgent(BaseAgent):
             if isinstance(data, list):
                 data = data[0]
 
-            return CriticOutput(**data)
+            critique = CriticOutput(**data)
+            self._record_call(retries=attempts)
+            return critique
 
         except Exception as e:
+            # Trailing commas, single quotes, raw newlines and cut-off
+            # braces are fixed locally; only re-prompt when that fails.
+            repaired = self._repair_json(raw_response, CriticOutput)
+            if repaired is not None:
+                self._record_call(retries=attempts)
+                return repaired
+            if max_retries > 1:
+                metrics.counter(f"agent.{self.name}.reprompted").inc()
             logger.warning(
                 "Error parsing critic response: %s. Retrying (%d left)...",
                 e,
@@ -117,6 +150,7 @@ class CriticAgent(BaseAgent):
                 max_retries=max_retries - 1,
                 last_error=str(e),
                 last_raw_response=raw_response,
+                attempts=attempts + 1,
             )
 
     # for dev
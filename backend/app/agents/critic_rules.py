@@ -0,0 +1,81 @@
+"""Deterministic fast path for the critic.
+
+Most curriculum tasks (ADR-010) have a success condition Unity already
+reports in `AssemblyView`, so asking an LLM to read it back from the
+rendered context is a wasted round trip:
+
+- PLATE_SETUP ("Set up the assembly plate on Preparation1") is done once
+  `assembly.plate_location` is set.
+- STACK ("Stack TomatoSlice onto the plate at Preparation1") is done once
+  `assembly.stack` has grown past its length when the task was proposed
+  (`stack_baseline`) and its top layer is the requested ingredient.
+  A finished burger (`assembly.is_done`) closes any stack task.
+
+When the condition is not met and the execution trace shows a failed
+step, the rule reports failure with that step as feedback. Anything
+else — PREP tasks, unparseable task names, unmet conditions with a
+clean trace — returns None and the LLM critic decides.
+"""
+from __future__ import annotations
+
+import re
+
+from app.api.schemas import CriticOutput, Perception
+from app.context.view import HAMBURGER_STACK
+
+_PLATE_SETUP = re.compile(r"\bset\s*up\b.*\bplate\b", re.IGNORECASE)
+_STACK = re.compile(r"^\s*stack\s+(?:the\s+)?(\w+)", re.IGNORECASE)
+_LAYERS = {layer.lower(): layer for layer in HAMBURGER_STACK}
+
+
+def verify_by_rules(
+    task: str,
+    perception: Perception | None,
+    stack_baseline: int | None = None,
+) -> CriticOutput | None:
+    """Judge `task` from structured perception, or None if no rule applies."""
+    if perception is None or not task:
+        return None
+    assembly = perception.assembly
+
+    if _PLATE_SETUP.search(task):
+        if assembly.plate_location:
+            return CriticOutput(
+                success=True,
+                reasoning=f"Unity reports the plate at {assembly.plate_location}.",
+                feedback="",
+            )
+        return _failed_from_trace(perception, "No plate on a preparation table yet.")
+
+    if match := _STACK.match(task):
+        layer = _LAYERS.get(match.group(1).lower())
+        if layer is None:
+            return None
+        if assembly.is_done:
+            return CriticOutput(success=True, reasoning="Burger is complete.", feedback="")
+        if stack_baseline is None:
+            return None
+        if len(assembly.stack) > stack_baseline and assembly.stack[-1] == layer:
+            return CriticOutput(
+                success=True,
+                reasoning=f"{layer} is now layer {len(assembly.stack)} of the stack.",
+                feedback="",
+            )
+        return _failed_from_trace(
+            perception,
+            f"{layer} not stacked yet; plate expects {assembly.next_expected or 'nothing'}.",
+        )
+
+    return None
+
+
+def _failed_from_trace(perception: Perception, reasoning: str) -> CriticOutput | None:
+    failed = next((s for s in perception.execution_trace if s.status != "success"), None)
+    if failed is None:
+        return None
+    target = f" {failed.target_id}" if failed.target_id else ""
+    return CriticOutput(
+        success=False,
+        reasoning=reasoning,
+        feedback=f"Step {failed.step_index} ({failed.function}{target}) failed: {failed.message}",
+    )
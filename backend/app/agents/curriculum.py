@@ -4,6 +4,9 @@ from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent
 from app.api.schemas import CurriculumOutput, MemoryDTO
+from app.context.budget import PromptSection, TokenBudget, perception_sections
+from app.context.history import TaskHistory
+from app.core.metrics import metrics
 from app.llm.base import BaseLLMClient
 from app.memory.base import BaseMemoryStore
 
@@ -11,6 +14,9 @@ logger = logging.getLogger(__name__)
 
 
 class CurriculumAgent(BaseAgent):
+    name = "curriculum"
+    reads_perception = True
+
     def __init__(
         self,
         llm: BaseLLMClient,
@@ -20,24 +26,27 @@ class CurriculumAgent(BaseAgent):
         template_name="curriculum",
         tools=None,
         mode="auto",
+        output_mode="text",
+        budget: TokenBudget | None = None,
     ):
-        super().__init__(llm, template_name, tools)
+        super().__init__(llm, template_name, tools, output_mode, budget)
         self.qa_llm = qa_llm
         self.memory = memory_store
         self.memory_window_size = memory_window_size
-        self.recent_history = []  # {'task': str, 'result': str}
         self.mode = mode
 
     def render_human_message(
         self,
         context: str,
         long_term_memories: list[MemoryDTO],
+        history: TaskHistory | None = None,
     ) -> HumanMessage:
         """
         Curriculum-specific sections:
           - long-term RAG memories (episodic recall)
           - recent task-level history (Success/Failed outcomes — distinct
-            from the execution-trace history inside the perception block)
+            from the execution-trace history inside the perception block),
+            from the calling session's `TaskHistory`
         """
         
         if long_term_memories:
@@ -47,29 +56,39 @@ class CurriculumAgent(BaseAgent):
         else:
             long_term_memories_str = "No relavent memories found."
 
-        if self.recent_history:
+        if history:
             history_str = "\n".join(
-                f"- {item['task']} ({item['result']})"
-                for item in self.recent_history[-5:]
+                f"- {record.task} ({record.result})"
+                for record in history.recent(5)
             )
         else:
             history_str = "None"
 
-        content = (
-            "--- PERCEPTION ---\n"
-            f"{context}\n\n"
-            "--- RELEVANT MEMORIES (What I learned here before) ---\n"
-            f"{long_term_memories_str}\n\n"
-            "--- RECENT ACTION HISTORY (Do not repeat failed tasks) ---\n"
-            f"{history_str}\n\n"
-            "Based on my past memories and current state, what is the best next task?"
-        )
+        content = self._fit_prompt([
+            PromptSection("perception", "--- PERCEPTION ---\n"),
+            *perception_sections(context),
+            PromptSection(
+                "memories_header",
+                "\n\n--- RELEVANT MEMORIES (What I learned here before) ---\n",
+            ),
+            PromptSection.of("memories", long_term_memories_str),
+            PromptSection(
+                "task_history_header",
+                "\n\n--- RECENT ACTION HISTORY (Do not repeat failed tasks) ---\n",
+            ),
+            PromptSection.of("task_history", history_str),
+            PromptSection(
+                "question",
+                "\n\nBased on my past memories and current state, what is the best next task?",
+            ),
+        ])
 
         return HumanMessage(content=content)
 
     async def propose_next_task(
         self,
         context: str,
+        history: TaskHistory | None = None,
     ) -> CurriculumOutput:
 
         # TODO: hard code check some basic status (Hunger, etc.)
@@ -78,21 +97,23 @@ class CurriculumAgent(BaseAgent):
             query=context, limit=self.memory_window_size
         )
         sys_msg = self.render_system_message().content
-        human_msg = self.render_human_message(context, relavent_memory).content
+        human_msg = self.render_human_message(context, relavent_memory, history).content
 
         if self.mode == "auto":
-            return await self.__propose_next_ai_task(sys_msg, human_msg)
+            attempts = 0
+            if self.output_mode == "structured":
+                proposal = await self._generate_structured(sys_msg, human_msg, CurriculumOutput)
+                if proposal is not None:
+                    logger.info("\n\n[Curriculum Agent response]:%s\n", proposal)
+                    self._record_call(retries=0)
+                    return proposal
+                attempts = 1
+            return await self.__propose_next_ai_task(sys_msg, human_msg, attempts=attempts)
         elif self.mode == "manual":
             return self.__propose_next_manual_task()
         else:
             raise ValueError(f"Invalid curriculum agent mode: {self.mode}")
 
-    def add_history(self, task: str, result: str):
-        """Records both Success and Failure"""
-        self.recent_history.append({"task": task, "result": result})
-        if len(self.recent_history) > self.memory_window_size:
-            self.recent_history.pop(0)
-
     async def __propose_next_ai_task(
         self,
         sys_msg,
@@ -100,6 +121,7 @@ class CurriculumAgent(BaseAgent):
         max_retries: int = 3,
         last_error: str = "",
         last_raw_response: str = "",
+        attempts: int = 0,
     ):
         if max_retries == 0:
             # Fallback must be a concrete, verifiable pipeline. A vague
@@ -109,6 +131,7 @@ class CurriculumAgent(BaseAgent):
             # is the safest default — it's the first phase of every
             # burger and always productive regardless of kitchen state.
             logger.error("Max retries reached. Falling back to PLATE_SETUP.")
+            self._record_call(retries=attempts - 1)
             return CurriculumOutput(
                 task="Set up the assembly plate on Preparation1",
                 reasoning="Curriculum parse failed; defaulting to plate setup so the burger can start.",
@@ -145,9 +168,18 @@ class CurriculumAgent(BaseAgent):
             if isinstance(data, list):
                 data = data[0]
 
-            return CurriculumOutput(**data)
+            proposal = CurriculumOutput(**data)
+            self._record_call(retries=attempts)
+            return proposal
 
         except Exception as e:
+            # A local fix is free; a re-prompt is another full round trip.
+            repaired = self._repair_json(raw_response, CurriculumOutput)
+            if repaired is not None:
+                self._record_call(retries=attempts)
+                return repaired
+            if max_retries > 1:
+                metrics.counter(f"agent.{self.name}.reprompted").inc()
             logger.warning("Parsing failed: %s. Retrying (%d left)", e, max_retries)
             return await self.__propose_next_ai_task(
                 sys_msg,
@@ -155,6 +187,7 @@ class CurriculumAgent(BaseAgent):
                 max_retries - 1,
                 last_error=str(e),
                 last_raw_response=raw_response,
+                attempts=attempts + 1,
             )
 
     def __propose_next_manual_task(self):
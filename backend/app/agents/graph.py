@@ -1,52 +1,44 @@
+import asyncio
 import operator
 import logging
+import time
+from collections.abc import Mapping
 from typing import TypedDict, Annotated, List
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
 
 from app.agents.curriculum import CurriculumAgent
 from app.agents.skill import SkillAgent
 from app.agents.action import ActionAgent
 from app.agents.critic import CriticAgent
+from app.agents.critic_rules import verify_by_rules
+from app.agents.coordinator import KitchenCoordinator
+from app.agents.planner import plan_symbolically
+from app.agents.plan_cache import BasePlanCache, build_plan_cache, perception_fingerprint
+from app.agents import speculation
 from app.memory.pgvector_repo import PostgresMemoryStore
-from app.core.deps import get_llm, get_session_factory
+from app.agents.skill_jobs import SkillLearningQueue, build_job_queue
+from app.memory.checkpointer import build_checkpointer
+from app.core.deps import get_redis, get_session_factory
+from app.llm.base import BaseLLMClient, llm_registry
+from app.llm.hedging import HedgedLLMClient
 from app.tools.base import tool_registry
 from app.tools.context import ToolContext
-from app.core.config import settings 
-from app.api.schemas import Perception, AgentAction, CriticOutput
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.core.timing import stage
+from app.api.schemas import Perception, AgentAction, CriticOutput, CurriculumOutput
+from app.context.budget import TokenBudget, get_counter
+from app.context.history import TaskHistory
 
 logger = logging.getLogger(__name__)
 
-openai_llm = get_llm("openai", "gpt-4.1-mini")
-# ollama_llm = get_llm("ollama", "gemma3:4b")
-
-session_factory = get_session_factory()
-memory_store = PostgresMemoryStore(session_factory)
-
-tool_context = ToolContext(
-    settings=settings,
-    db_session=session_factory
-)
-tools = tool_registry.build_all(tool_context)
-
-curriculum_agent = CurriculumAgent(
-    llm=openai_llm,
-    qa_llm=openai_llm,
-    memory_store=memory_store
-)
-
-skill_agent = SkillAgent(
-    llm=openai_llm,
-    memory_store=memory_store,
-)
-
-action_agent = ActionAgent(
-    llm=openai_llm,
-    tools=tools
-)
-
-critic_agent = CriticAgent(
-    llm=openai_llm
-)
+# Agents whose LLM `build_graph(llm_overrides=...)` can replace.
+LLM_ROLES = ("curriculum", "skill", "action", "critic")
+# Extra override key: the cheaper client behind degraded action/critic calls.
+FALLBACK_ROLE = "fallback"
 
 
 class AgentState(TypedDict):
@@ -59,156 +51,549 @@ class AgentState(TypedDict):
     critique: CriticOutput | None
 
     retry_count: int
+    # len(assembly.stack) when the current task was proposed; lets the
+    # rule-based critic tell whether a STACK task added its layer.
+    stack_baseline: int | None
+    # "symbolic" (app/agents/planner.py), "cache", "llm", "fallback" or
+    # "last_plan": who wrote `plan`.
+    plan_source: str
+    # Perception fingerprint an LLM plan was made against; learning_node
+    # caches the plan under it once the critic confirms it.
+    plan_fingerprint: str | None
+    # This session's recent task outcomes, shown to the curriculum.
+    history: TaskHistory
+
+    # Set by critic_node when SPECULATIVE_CURRICULUM is on and the
+    # critic closed the task; consumed by curriculum_node.
+    speculative_proposal: CurriculumOutput | None
+
+
+class AgentGraph:
+    """The agents and the compiled LangGraph apps that run them.
+
+    Built by `build_graph`; routes get it through `core.deps.get_graph`.
+    """
 
-
-async def curriculum_node(state: AgentState):
-    logger.info("--- 🧠 CURRICULUM: Thinking... ---")
-
-    proposal = await curriculum_agent.propose_next_task(state['context'])
-
-    return {
-        "task": proposal.task,
-        "skill_guide": "",
-        "retry_count": 0,
-        "plan": [],
-        "critique": None,
-    }
-
-
-async def skill_node(state: AgentState):
-    logger.info(f"--- 📚 SKILL: Researching '{state['task']}'... ---")
-
-    guide = await skill_agent.retrieve_skill(state['task'])
-
-    return {
-        "skill_guide": guide
-    }
-
-
-async def action_node(state: AgentState):
-    logger.info("--- 🚀 ACTION: Planning... ---")
-
-    last_plan = [a.model_dump() for a in state['plan']] if state['plan'] else ""
-    critic_text = state['critique'].feedback if state['critique'] else ""
-    skill_guide = state.get("skill_guide", "")
-
-    plan = await action_agent.generate_plan(
-        context=state['context'],
-        current_task=state['task'],
-        skill_guide=skill_guide,
-        last_plan=last_plan,
-        critique=critic_text,
-    )
-
-    return {
-        "plan": plan
-    }
-
-
-async def critic_node(state: AgentState):
-    logger.info("--- 🧐 CRITIC: Judging... ---")
-
-    critique = await critic_agent.check_task_success(
-        context=state['context'],
-        current_task=state['task'],
-    )
-
-    return {
-        "critique": critique,
-        "retry_count": state['retry_count'] + 1
-    }
-
-async def failure_node(state: AgentState):
-    logger.warning(f"--- 💀 FAILURE: Giving up on '{state['task']}' ---")
-    
-    curriculum_agent.add_history(state['task'], "Failed")
-    
-    # Reset state for the next fresh attempt
-    return {
-        "plan": [],
-        "retry_count": 0,
-        "critique": None
-    }
-
-async def learning_node(state: AgentState):
-    logger.info("--- 🎓 LEARNING: Saving to Long-Term Memory... ---")
-    
-    action_history_dicts = [a.model_dump() for a in state['plan']]
-    
-    await skill_agent.learn_new_skill(
-        task=state['task'],
-        action_history=action_history_dicts,
-        success=True,
-    )
-    
-    curriculum_agent.add_history(state['task'], "Success")
-    
-    return {}
+    def __init__(
+        self,
+        settings: Settings,
+        curriculum_agent: CurriculumAgent,
+        skill_agent: SkillAgent,
+        skill_learner: SkillLearningQueue,
+        action_agent: ActionAgent,
+        critic_agent: CriticAgent,
+        checkpointer: BaseCheckpointSaver | None = None,
+        fallback_action_agent: ActionAgent | None = None,
+        fallback_critic_agent: CriticAgent | None = None,
+        plan_cache: BasePlanCache | None = None,
+        coordinator: KitchenCoordinator | None = None,
+    ):
+        self.settings = settings
+        self.curriculum_agent = curriculum_agent
+        self.skill_agent = skill_agent
+        self.skill_learner = skill_learner
+        self.action_agent = action_agent
+        self.critic_agent = critic_agent
+        # Same agents on a cheaper model, for calls that missed their deadline.
+        self.fallback_action_agent = fallback_action_agent
+        self.fallback_critic_agent = fallback_critic_agent
+        self.plan_cache = plan_cache
+        # Hands out non-conflicting sub-tasks to sessions sharing a kitchen.
+        self.coordinator = coordinator or KitchenCoordinator()
+
+        self.workflow = self._build_workflow()
+        # Stateless: the caller passes the whole state (batch endpoint, and
+        # WebSocket sessions when GRAPH_CHECKPOINTER=none).
+        self.app = self.workflow.compile()
+        # WebSocket sessions: state persisted per thread_id (= client_id), so
+        # a frame only passes the new perception. None when checkpointing is off.
+        self.checkpointed_app = (
+            self.workflow.compile(checkpointer=checkpointer) if checkpointer is not None else None
+        )
+
+    async def curriculum_node(self, state: AgentState, config: RunnableConfig | None = None):
+        logger.info("--- 🧠 CURRICULUM: Thinking... ---")
+
+        proposal = state.get("speculative_proposal")
+        assigned = self._coordinated_task(state, config)
+        if assigned is not None:
+            # The kitchen's plan wins over this session's own guess.
+            if proposal is not None:
+                speculation.record_miss(
+                    speculation.spent_tokens(self.curriculum_agent, state['context'], proposal)
+                )
+            proposal = assigned
+        elif proposal is not None and proposal.task == state['task']:
+            # Made before the critic's verdict was recorded in history, and
+            # it repeats the task just closed: ask again.
+            speculation.record_miss(
+                speculation.spent_tokens(self.curriculum_agent, state['context'], proposal)
+            )
+            proposal = None
+        elif proposal is not None:
+            speculation.record_hit()
+
+        if proposal is None:
+            with stage("node.curriculum"):
+                proposal = await self.curriculum_agent.propose_next_task(
+                    state['context'], state.get('history')
+                )
+
+        return {
+            "task": proposal.task,
+            "skill_guide": "",
+            "retry_count": 0,
+            "plan": [],
+            "plan_fingerprint": None,
+            "critique": None,
+            "speculative_proposal": None,
+            "stack_baseline": len(state['perception'].assembly.stack),
+        }
+
+    def _coordinated_task(
+        self, state: AgentState, config: RunnableConfig | None
+    ) -> CurriculumOutput | None:
+        """The kitchen coordinator's assignment when the session joined a
+        kitchen (`kitchen_id` in the run's configurable), else None."""
+        configurable = (config or {}).get("configurable", {})
+        kitchen_id = configurable.get("kitchen_id")
+        if kitchen_id is None or state.get('perception') is None:
+            return None
+        return self.coordinator.assign(kitchen_id, configurable["client_id"], state['perception'])
+
+    async def skill_node(self, state: AgentState):
+        logger.info(f"--- 📚 SKILL: Researching '{state['task']}'... ---")
+
+        with stage("node.skill"):
+            guide = await self.skill_agent.retrieve_skill(state['task'])
+
+        return {
+            "skill_guide": guide
+        }
+
+
+    async def action_node(self, state: AgentState, config: RunnableConfig):
+        logger.info("--- 🚀 ACTION: Planning... ---")
+
+        last_plan = [a.model_dump() for a in state['plan']] if state['plan'] else ""
+        critic_text = state['critique'].feedback if state['critique'] else ""
+        skill_guide = state.get("skill_guide", "")
+        plan_kwargs = dict(
+            context=state['context'],
+            current_task=state['task'],
+            skill_guide=skill_guide,
+            last_plan=last_plan,
+            critique=critic_text,
+        )
+
+        streaming = config.get("configurable", {}).get("stream_plan")
+
+        # First attempt at a known task shape: template plan, no LLM. A retry
+        # means that plan (or the LLM's) already failed, so ask the model.
+        plan = None
+        if self.settings.SYMBOLIC_PLANNER and state['critique'] is None:
+            plan = plan_symbolically(state['task'], state.get('perception'))
+        if plan:
+            logger.info(f"--- 📐 ACTION: Symbolic plan ({len(plan)} steps) ---")
+            metrics.counter("action.plan_source.symbolic").inc()
+            if streaming:
+                _emit_steps(state, plan)
+            return {"plan": plan, "plan_source": "symbolic", "plan_fingerprint": None}
+
+        # Same task, same kitchen state, and a plan the critic confirmed
+        # before: reuse it. Retries skip the cache like the planner does.
+        fingerprint = None
+        if self.plan_cache is not None and state.get('perception') is not None:
+            fingerprint = perception_fingerprint(state['perception'])
+            if state['critique'] is None:
+                plan = await self.plan_cache.get(state['task'], fingerprint)
+        if plan:
+            logger.info(f"--- 🗃️ ACTION: Cached plan ({len(plan)} steps) ---")
+            metrics.counter("action.plan_source.cache").inc()
+            if streaming:
+                _emit_steps(state, plan)
+            return {"plan": plan, "plan_source": "cache", "plan_fingerprint": None}
+
+        metrics.counter("action.plan_source.llm").inc()
+
+        # Streaming callers (app.astream with stream_mode "custom") set
+        # `stream_plan` so each step reaches Unity as soon as it is parsed.
+        with stage("node.action"):
+            try:
+                async with asyncio.timeout(self.settings.ACTION_DEADLINE_S or None):
+                    if streaming:
+                        writer = get_stream_writer()
+                        plan = []
+                        started = time.perf_counter()
+                        async for action in self.action_agent.stream_plan(**plan_kwargs):
+                            if not plan:
+                                metrics.histogram("action.time_to_first_step_ms").observe(
+                                    (time.perf_counter() - started) * 1000
+                                )
+                            writer({
+                                "type": "plan_step",
+                                "task": state['task'],
+                                "index": len(plan),
+                                "step": action.model_dump(),
+                            })
+                            plan.append(action)
+                    else:
+                        plan = await self.action_agent.generate_plan(**plan_kwargs)
+            except TimeoutError:
+                if streaming and plan:
+                    # Unity may already be executing the streamed steps; a
+                    # different degraded plan would contradict them.
+                    logger.warning(
+                        f"--- ⏰ ACTION: Deadline exceeded for '{state['task']}' "
+                        f"after {len(plan)} streamed steps; keeping them ---"
+                    )
+                    metrics.counter("action.deadline_exceeded").inc()
+                    metrics.counter("action.plan_source.partial_stream").inc()
+                    return {"plan": plan, "plan_source": "llm", "plan_fingerprint": None}
+                return {**await self._degraded_plan(state, plan_kwargs), "plan_fingerprint": None}
+
+        return {
+            "plan": plan,
+            "plan_source": "llm",
+            "plan_fingerprint": fingerprint,
+        }
+
+    async def _degraded_plan(self, state: AgentState, plan_kwargs: dict) -> dict:
+        """The action LLM missed ACTION_DEADLINE_S: try the fallback model,
+        then resend the last plan. Raises TimeoutError if neither exists."""
+        logger.warning(f"--- ⏰ ACTION: Deadline exceeded for '{state['task']}' ---")
+        metrics.counter("action.deadline_exceeded").inc()
+
+        if self.fallback_action_agent is not None:
+            try:
+                async with asyncio.timeout(self.settings.FALLBACK_DEADLINE_S or None):
+                    plan = await self.fallback_action_agent.generate_plan(**plan_kwargs)
+                metrics.counter("action.plan_source.fallback").inc()
+                return {"plan": plan, "plan_source": "fallback"}
+            except Exception as e:
+                logger.warning(f"Fallback action model failed: {e!r}")
+
+        if state['plan']:
+            metrics.counter("action.plan_source.last_plan").inc()
+            return {"plan": state['plan'], "plan_source": "last_plan"}
+        raise TimeoutError(f"Action planning missed its {self.settings.ACTION_DEADLINE_S}s deadline")
+
+
+    async def critic_node(self, state: AgentState):
+        logger.info("--- 🧐 CRITIC: Judging... ---")
+
+        spec = None
+        if self.settings.SPECULATIVE_CURRICULUM:
+            spec = speculation.CurriculumSpeculation(
+                self.curriculum_agent, state['context'], state.get('history')
+            )
+
+        try:
+            with stage("node.critic"):
+                critique = await self._check_task_success(state)
+        except BaseException:
+            if spec is not None:
+                await spec.cancel()
+            raise
+
+        update = {
+            "critique": critique,
+            "retry_count": state['retry_count'] + 1
+        }
+        if spec is not None:
+            if _route_after_critique(critique, update["retry_count"]) == "action":
+                await spec.cancel()
+            else:
+                with stage("node.curriculum_speculative_wait"):
+                    update["speculative_proposal"] = await spec.result()
+        return update
+
+    async def _check_task_success(self, state: AgentState) -> CriticOutput:
+        """Rule-based verdict when the perception decides it, else the LLM."""
+        critique = verify_by_rules(
+            state['task'], state.get('perception'), state.get('stack_baseline'),
+        )
+        if critique is not None:
+            logger.info(f"--- 📏 CRITIC: Decided by rule (success={critique.success}) ---")
+            metrics.counter("critic.rule_decided").inc()
+        else:
+            critique = await self._llm_critique(state)
+            metrics.counter("critic.llm_decided").inc()
+
+        by_rule = metrics.counter("critic.rule_decided").value
+        by_llm = metrics.counter("critic.llm_decided").value
+        metrics.gauge("critic.rule_decided_fraction").set(by_rule / (by_rule + by_llm))
+        return critique
+
+
+    async def _llm_critique(self, state: AgentState) -> CriticOutput:
+        """LLM critic bounded by CRITIC_DEADLINE_S. Past it, ask the fallback
+        model; failing that, report the task as not verified so it is retried."""
+        kwargs = dict(context=state['context'], current_task=state['task'])
+        try:
+            async with asyncio.timeout(self.settings.CRITIC_DEADLINE_S or None):
+                return await self.critic_agent.check_task_success(**kwargs)
+        except TimeoutError:
+            logger.warning(f"--- ⏰ CRITIC: Deadline exceeded for '{state['task']}' ---")
+            metrics.counter("critic.deadline_exceeded").inc()
+
+        if self.fallback_critic_agent is not None:
+            try:
+                async with asyncio.timeout(self.settings.FALLBACK_DEADLINE_S or None):
+                    critique = await self.fallback_critic_agent.check_task_success(**kwargs)
+                metrics.counter("critic.fallback_decided").inc()
+                return critique
+            except Exception as e:
+                logger.warning(f"Fallback critic model failed: {e!r}")
+
+        return CriticOutput(
+            success=False,
+            reasoning="Critic missed its deadline; outcome not verified.",
+            feedback="",
+        )
+
+    async def failure_node(self, state: AgentState):
+        logger.warning(f"--- 💀 FAILURE: Giving up on '{state['task']}' ---")
+
+        # Reset state for the next fresh attempt
+        return {
+            "plan": [],
+            "plan_fingerprint": None,
+            "retry_count": 0,
+            "critique": None,
+            "history": _history(state).add(state['task'], "Failed"),
+        }
+
+    async def learning_node(self, state: AgentState):
+        logger.info("--- 🎓 LEARNING: Queueing skill for Long-Term Memory... ---")
+
+        action_history_dicts = [a.model_dump() for a in state['plan']]
+
+        # Distillation runs on the background workers; the frame only pays
+        # for the enqueue.
+        with stage("node.learning"):
+            await self.skill_learner.enqueue(state['task'], action_history_dicts)
+
+        if self.plan_cache is not None and state.get('plan_fingerprint'):
+            await self.plan_cache.put(state['task'], state['plan_fingerprint'], state['plan'])
+
+        return {"history": _history(state).add(state['task'], "Success")}
+
+    def _build_workflow(self) -> StateGraph:
+        workflow = StateGraph(AgentState)
+
+        workflow.add_node("curriculum", self.curriculum_node)
+        workflow.add_node("skill", self.skill_node)
+        workflow.add_node("action", self.action_node)
+        workflow.add_node("critic", self.critic_node)
+        workflow.add_node("learning", self.learning_node)
+
+        workflow.set_conditional_entry_point(
+            entry_router,
+            {
+                "curriculum": "curriculum",
+                "critic": "critic"
+            }
+        )
+
+        workflow.add_edge("curriculum", "skill")
+        workflow.add_edge("skill", "action")
+        workflow.add_node("failure", self.failure_node)
+
+        # Action goes to END (stops Python), so Unity can run the plan.
+        workflow.add_edge("action", END)
+
+        workflow.add_conditional_edges(
+            "critic",
+            decide_next_node,
+            {
+                "learning": "learning",
+                "action": "action",
+                "failure": "failure"
+            }
+        )
+        workflow.add_edge("failure", "curriculum") # <--- Loop back to try a NEW task
+        workflow.add_edge("learning", "curriculum")
+        return workflow
+
+
+def _emit_steps(state: AgentState, plan: list[AgentAction]) -> None:
+    """Stream a plan that was ready without the LLM, step by step."""
+    writer = get_stream_writer()
+    for index, action in enumerate(plan):
+        writer({
+            "type": "plan_step",
+            "task": state['task'],
+            "index": index,
+            "step": action.model_dump(),
+        })
+
+
+def _history(state: AgentState) -> TaskHistory:
+    return state.get("history") or TaskHistory()
 
 def entry_router(state: AgentState):
     """
     Decide where to start based on if this is "first run" or not from unity?
     """
-    
+
     current_task = state.get("task", "")
-    
+
     if not current_task or current_task == "Decide Next Task":
         return "curriculum"
-    
+
     return "critic"
 
 def decide_next_node(state: AgentState):
     """
     Why: This ensure the deterministic based on given state
     """
-    critique = state['critique']
-    
+    route = _route_after_critique(state['critique'], state['retry_count'])
+
+    if route == "action":
+        logger.warning(f"⚠️ Failed. Retrying ({state['retry_count']}/2)...")
+    elif route == "failure":
+        logger.error("❌ Too many failures. Giving up.")
+
+    return route
+
+
+def _route_after_critique(critique: CriticOutput, retry_count: int) -> str:
     if critique.success:
         return "learning"
-    
-    elif state['retry_count'] <= 2:
-        logger.warning(f"⚠️ Failed. Retrying ({state['retry_count']}/2)...")
+    if retry_count <= 2:
         return "action"
-    
-    else:
-        logger.error("❌ Too many failures. Giving up.")
-        return "failure"
+    return "failure"
 
 
-workflow = StateGraph(AgentState)
+# (id(settings), overrides) -> (settings, graph). Holding `settings`
+# keeps its id from being reused by another Settings while cached; keying
+# on identity, not content, lets a Settings patched in place keep its graph.
+_graphs: dict[tuple, tuple[Settings, AgentGraph]] = {}
 
-workflow.add_node("curriculum", curriculum_node)
-workflow.add_node("skill", skill_node)
-workflow.add_node("action", action_node)
-workflow.add_node("critic", critic_node)
-workflow.add_node("learning", learning_node)
 
+def build_graph(
+    settings: Settings,
+    llm_overrides: Mapping[str, BaseLLMClient] | None = None,
+) -> AgentGraph:
+    """The agent graph for `settings`, built on first call and cached per
+    (settings instance, overrides).
 
-workflow.set_conditional_entry_point(
-    entry_router,
-    {
-        "curriculum": "curriculum",
-        "critic": "critic"
+    Construction creates the LLM clients, memory store, tools and system
+    prompts, so nothing here runs at import time. `llm_overrides` maps
+    agent roles (`LLM_ROLES`, plus `FALLBACK_ROLE`) to the client they
+    should use instead of the default OpenAI one.
+    """
+    overrides = dict(llm_overrides or {})
+    unknown = set(overrides) - {*LLM_ROLES, FALLBACK_ROLE}
+    if unknown:
+        raise ValueError(f"Unknown LLM roles: {sorted(unknown)}")
+
+    key = (id(settings), tuple(sorted(overrides.items(), key=lambda item: item[0])))
+    cached = _graphs.get(key)
+    if cached is None or cached[0] is not settings:
+        cached = _graphs[key] = (settings, _construct(settings, overrides))
+    return cached[1]
+
+
+def _construct(settings: Settings, overrides: dict[str, BaseLLMClient]) -> AgentGraph:
+    started = time.perf_counter()
+
+    # Only build the default client if some role still needs it.
+    builder = llm_registry.get_builder("openai")
+    default_llm = None
+    if set(LLM_ROLES) - set(overrides):
+        default_llm = builder.build(settings, settings.OPENAI_MODEL)
+    llms = {role: overrides.get(role, default_llm) for role in LLM_ROLES}
+
+    fallback_llm = overrides.get(FALLBACK_ROLE)
+    if fallback_llm is None and settings.FALLBACK_LLM_MODEL:
+        fallback_llm = builder.build(settings, settings.FALLBACK_LLM_MODEL)
+
+    if settings.LLM_HEDGING:
+        # One wrapper per role: hedge delays come from that agent's latencies.
+        llms = {
+            role: HedgedLLMClient(
+                llm,
+                name=role,
+                quantile=settings.LLM_HEDGE_QUANTILE,
+                min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            )
+            for role, llm in llms.items()
+        }
+
+    # Per-role output mode: "structured" or "text" (see agents/base.py).
+    modes = {
+        role: "structured" if role in settings.STRUCTURED_OUTPUT_AGENTS else "text"
+        for role in LLM_ROLES
     }
-)
-
-workflow.add_edge("curriculum", "skill")
-workflow.add_edge("skill", "action")
-workflow.add_node("failure", failure_node)
-
-# Action goes to END (stops Python), so Unity can run the plan.
-workflow.add_edge("action", END)
-
-workflow.add_conditional_edges(
-    "critic",
-    decide_next_node,
-    {
-        "learning": "learning",
-        "action": "action",
-        "failure": "failure"
+
+    # Per-role prompt budgets; all share one token counter (and its cache).
+    counter = get_counter(settings.OPENAI_MODEL)
+    budgets = {
+        role: TokenBudget(limit, counter, name=role)
+        for role, limit in settings.PROMPT_TOKEN_BUDGETS.items()
+        if limit > 0
     }
-)
-workflow.add_edge("failure", "curriculum") # <--- Loop back to try a NEW task
-workflow.add_edge("learning", "curriculum")
 
-graph_app = workflow.compile()
\ No newline at end of file
+    session_factory = get_session_factory()
+    memory_store = PostgresMemoryStore(session_factory)
+
+    tool_context = ToolContext(
+        settings=settings,
+        db_session=session_factory
+    )
+    tools = tool_registry.build_all(tool_context)
+
+    skill_agent = SkillAgent(
+        llm=llms["skill"],
+        memory_store=memory_store,
+        output_mode=modes["skill"],
+        budget=budgets.get("skill"),
+    )
+
+    graph = AgentGraph(
+        settings,
+        curriculum_agent=CurriculumAgent(
+            llm=llms["curriculum"],
+            qa_llm=llms["curriculum"],
+            memory_store=memory_store,
+            output_mode=modes["curriculum"],
+            budget=budgets.get("curriculum"),
+        ),
+        skill_agent=skill_agent,
+        skill_learner=SkillLearningQueue(
+            build_job_queue(settings, get_redis()),
+            skill_agent,
+            workers=settings.SKILL_JOB_WORKERS,
+            max_attempts=settings.SKILL_JOB_MAX_ATTEMPTS,
+            backoff_s=settings.SKILL_JOB_BACKOFF_S,
+        ),
+        action_agent=ActionAgent(
+            llm=llms["action"],
+            tools=tools,
+            output_mode=modes["action"],
+            budget=budgets.get("action"),
+        ),
+        critic_agent=CriticAgent(
+            llm=llms["critic"],
+            output_mode=modes["critic"],
+            budget=budgets.get("critic"),
+        ),
+        checkpointer=build_checkpointer(settings, session_factory),
+        fallback_action_agent=ActionAgent(
+            llm=fallback_llm,
+            tools=tools,
+            output_mode=modes["action"],
+            budget=budgets.get("action"),
+        ) if fallback_llm is not None else None,
+        fallback_critic_agent=CriticAgent(
+            llm=fallback_llm,
+            output_mode=modes["critic"],
+            budget=budgets.get("critic"),
+        ) if fallback_llm is not None else None,
+        plan_cache=build_plan_cache(settings, get_redis()),
+        coordinator=KitchenCoordinator(claim_ttl_s=settings.KITCHEN_CLAIM_TTL_S),
+    )
+    logger.info("🧩 Agent graph built in %.0f ms", (time.perf_counter() - started) * 1000)
+    return graph
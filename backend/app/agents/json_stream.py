@@ -0,0 +1,165 @@
+"""Incremental JSON parsing of LLM output.
+
+- `iter_json_values` finds the top-level JSON objects and arrays in a
+  complete reply wrapped in prose or markdown fences, in one pass over
+  the text. `extract_json`, built on it, is what every agent's
+  `_parse_json_helper` uses.
+- `JsonArrayStream`: the action agent answers with a JSON array of
+  steps. Waiting for the closing `]` means Unity idles for the whole
+  completion; this parser instead emits each top-level element the
+  moment its closing brace arrives, so the first step can be
+  dispatched after a few dozen tokens.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+# An opening bracket followed by something a JSON value can start with:
+# cheap to reject `[C]` or `{see trace}` here instead of in the decoder.
+_START = re.compile(r'\{\s*["}]|\[\s*[-\d\[\]{"tfnNI]')
+_decoder = json.JSONDecoder()
+
+
+def iter_json_values(content: str) -> Iterator[list | dict]:
+    """Every top-level JSON object or array in `content`, decoded.
+
+    Prose is skipped with a regex search for the next `{` or `[` that is
+    followed by something a JSON value can start with (so `[C]` and
+    `{see trace}` are passed over without decoding). From there the C
+    decoder (`raw_decode`) reads the value and reports where it ends, so
+    the reply is scanned once instead of restarting a Python bracket walk
+    at every opener. A candidate that still is not JSON fails at its
+    first bad character and scanning resumes just after its opener, so
+    a valid value nested in it is found.
+    """
+    pos = 0
+    while (match := _START.search(content, pos)) is not None:
+        start = match.start()
+        try:
+            value, pos = _decoder.raw_decode(content, start)
+        except json.JSONDecodeError:
+            pos = start + 1
+            continue
+        yield value
+
+
+def extract_json(content: str) -> list | dict | None:
+    """First top-level JSON object in `content`, else its first array.
+
+    Objects win because critic/curriculum replies like
+        {"task": "X", "reasoning": "[C] shows ..."}
+    may follow prose that itself contains a bracketed array.
+    """
+    first_array = None
+    for value in iter_json_values(content):
+        if isinstance(value, dict):
+            return value
+        if first_array is None:
+            first_array = value
+    return first_array
+
+
+class JsonArrayStream:
+    """Feed text chunks, get back every completed top-level array element.
+
+    Tolerates prose or a markdown fence before the array; a `[` only opens
+    it when followed (after whitespace) by `{` or `]`, so "per [C] ..."
+    in the preamble is skipped. If the reply is
+    a bare object instead of an array, that object is emitted as the only
+    element (mirrors `ActionAgent._generate_plan_helper`). Only object
+    elements are emitted; an element that fails to parse is skipped with
+    a warning rather than aborting the stream.
+    """
+
+    def __init__(self):
+        self._started = False       # saw the top-level `[` or `{`
+        self._bracket = False       # saw a `[` that may open the array
+        self._bare_object = False   # top level is `{`, not `[`
+        self._done = False
+        self._depth = 0             # nesting depth inside the current element
+        self._in_string = False
+        self._escape = False
+        self._element: list[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> list[Any]:
+        completed: list[Any] = []
+        for ch in chunk:
+            if self._done:
+                break
+
+            if not self._started:
+                if self._bracket:
+                    if ch.isspace():
+                        continue
+                    self._bracket = False
+                    if ch == "{":
+                        self._started = True
+                        self._open_element(ch)
+                        continue
+                    if ch == "]":
+                        self._started = self._done = True
+                        continue
+                    # A bracketed word in prose; `ch` may start the array.
+                if ch == "[":
+                    self._bracket = True
+                elif ch == "{":
+                    self._started = True
+                    self._bare_object = True
+                    self._open_element(ch)
+                continue
+
+            if self._depth == 0:
+                # Between elements of the top-level array.
+                if self._in_string:
+                    self._scan_string(ch)
+                elif ch == '"':
+                    self._in_string = True
+                elif ch == "{":
+                    self._open_element(ch)
+                elif ch == "]":
+                    self._done = True
+                continue
+
+            self._element.append(ch)
+            if self._in_string:
+                self._scan_string(ch)
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(completed)
+                    if self._bare_object:
+                        self._done = True
+        return completed
+
+    def _open_element(self, ch: str) -> None:
+        self._element = [ch]
+        self._depth = 1
+
+    def _scan_string(self, ch: str) -> None:
+        if self._escape:
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            self._in_string = False
+
+    def _emit(self, completed: list[Any]) -> None:
+        text = "".join(self._element)
+        self._element = []
+        try:
+            completed.append(json.loads(text))
+        except json.JSONDecodeError as e:
+            logger.warning("Skipping unparsable streamed element: %s (%s)", text[:120], e)
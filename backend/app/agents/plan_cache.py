@@ -0,0 +1,160 @@
+"""Cache of critic-confirmed plans.
+
+The same task in the same kitchen state ("Chop the tomato" with empty
+hands, TomatoBox in reach) comes up again and again, across sessions
+and days. `action_node` looks the plan up here before calling the
+action LLM; a hit skips the call entirely.
+
+Key: the normalized task plus a fingerprint of the decision-relevant
+perception — held item, prep-table contents, plate location and
+assembly stack. Positions, time of day and the execution trace are
+left out on purpose: they change every frame without changing the plan.
+
+Only plans the critic later confirmed are stored: `action_node` records
+the fingerprint it planned against (`plan_fingerprint`) and
+`learning_node` writes the plan once the task succeeds.
+
+Redis entries expire after `PLAN_CACHE_TTL_S`; size-based LRU eviction
+is the Redis server's `maxmemory-policy allkeys-lru`. The in-memory
+backend is an LRU of `PLAN_CACHE_MAX_ENTRIES` with the same TTL.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+
+from app.agents.planner import table_contents
+from app.api.schemas import AgentAction, Perception
+from app.context.view import HeldItem
+from app.core.config import Settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def perception_fingerprint(perception: Perception) -> str:
+    """Canonical JSON of the perception fields a plan depends on."""
+    assembly = perception.assembly
+    return json.dumps(
+        {
+            "held": HeldItem.from_raw(perception.self.held_item).name,
+            "tables": sorted(
+                [table, item] for table, item in table_contents(perception).items() if item
+            ),
+            "plate": assembly.plate_location,
+            "stack": assembly.stack,
+        },
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+
+
+def plan_cache_key(task: str, fingerprint: str) -> str:
+    normalized = " ".join(task.lower().split())
+    return hashlib.sha256(f"{normalized}\n{fingerprint}".encode()).hexdigest()
+
+
+def encode_plan(plan: list[AgentAction]) -> str:
+    return json.dumps([a.model_dump() for a in plan], separators=(",", ":"))
+
+
+def decode_plan(raw: str | bytes) -> list[AgentAction]:
+    return [AgentAction.model_validate(item) for item in json.loads(raw)]
+
+
+class BasePlanCache(ABC):
+    async def get(self, task: str, fingerprint: str) -> list[AgentAction] | None:
+        plan = await self._get(plan_cache_key(task, fingerprint))
+        metrics.counter("plan_cache.hits" if plan else "plan_cache.misses").inc()
+        return plan
+
+    async def put(self, task: str, fingerprint: str, plan: list[AgentAction]) -> None:
+        if plan:
+            await self._put(plan_cache_key(task, fingerprint), plan)
+            metrics.counter("plan_cache.stores").inc()
+
+    @abstractmethod
+    async def _get(self, key: str) -> list[AgentAction] | None:
+        pass
+
+    @abstractmethod
+    async def _put(self, key: str, plan: list[AgentAction]) -> None:
+        pass
+
+
+class InMemoryPlanCache(BasePlanCache):
+    """Process-local LRU with a TTL. Also the fallback when Redis is down."""
+
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def _get(self, key: str) -> list[AgentAction] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, raw = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return decode_plan(raw)
+
+    async def _put(self, key: str, plan: list[AgentAction]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_s, encode_plan(plan))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisPlanCache(BasePlanCache):
+    """Shared across workers. A hit refreshes the entry's TTL, so plans in
+    regular use never expire."""
+
+    def __init__(
+        self,
+        redis_client,
+        ttl_s: int = 7 * 24 * 3600,
+        key_prefix: str = "paprika:plan:",
+        fallback: InMemoryPlanCache | None = None,
+    ):
+        self._redis = redis_client
+        self._ttl = ttl_s
+        self._prefix = key_prefix
+        self._fallback = fallback or InMemoryPlanCache(ttl_s=ttl_s)
+
+    async def _get(self, key: str) -> list[AgentAction] | None:
+        try:
+            raw = await self._redis.getex(self._prefix + key, ex=self._ttl)
+        except RedisError as e:
+            logger.warning("Plan cache read from Redis failed: %s", e)
+            return await self._fallback._get(key)
+        return decode_plan(raw) if raw is not None else None
+
+    async def _put(self, key: str, plan: list[AgentAction]) -> None:
+        await self._fallback._put(key, plan)
+        try:
+            await self._redis.set(self._prefix + key, encode_plan(plan), ex=self._ttl)
+        except RedisError as e:
+            logger.warning("Plan cache write to Redis failed: %s", e)
+
+
+def build_plan_cache(settings: Settings, redis_client) -> BasePlanCache | None:
+    if settings.PLAN_CACHE_BACKEND == "redis":
+        return RedisPlanCache(
+            redis_client,
+            ttl_s=settings.PLAN_CACHE_TTL_S,
+            fallback=InMemoryPlanCache(settings.PLAN_CACHE_MAX_ENTRIES, settings.PLAN_CACHE_TTL_S),
+        )
+    if settings.PLAN_CACHE_BACKEND == "memory":
+        return InMemoryPlanCache(settings.PLAN_CACHE_MAX_ENTRIES, settings.PLAN_CACHE_TTL_S)
+    if settings.PLAN_CACHE_BACKEND == "none":
+        return None
+    raise ValueError(f"Unknown plan cache backend: {settings.PLAN_CACHE_BACKEND}")
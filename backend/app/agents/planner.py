@@ -0,0 +1,177 @@
+"""Deterministic planner for the burger pipeline (ADR-010).
+
+The three curriculum task shapes have fixed action pipelines, and the
+registry in `context/view.py` already knows every ID they need:
+
+- PLATE_SETUP "Set up the assembly plate on <table>"
+    move_to PlateBoard → pickup → move_to <table> → put_down
+- PREP "Prepare <Processed> and place it on a Preparation table"
+    move_to <Box> → pickup → move_to <Station> → put_down → chop|cook
+    → pickup → move_to <free table> → put_down
+- STACK "Stack <Processed> onto the plate at <plate_location>"
+    move_to <table holding it> → pickup → move_to <plate> → put_down
+
+`plan_symbolically` returns None whenever the task doesn't match or the
+perception leaves a choice it can't make safely (hands full, source
+table not in sight, layer out of order). The caller then asks the LLM.
+"""
+from __future__ import annotations
+
+import re
+
+from app.api.schemas import AgentAction, Perception
+from app.context.view import (
+    BOX_FOR,
+    HAMBURGER_STACK,
+    PLATE_SOURCE,
+    PROCESSING_RULES,
+    RAW_FOR,
+    SHARED_PREP_TABLES,
+    HeldItem,
+    is_plate,
+    is_player_prep_table,
+    is_shared_prep_table,
+)
+
+_PLATE_SETUP = re.compile(r"\bset\s*up\b.*\bplate\b(?:.*\bon\s+(\w+))?", re.IGNORECASE)
+_PREP = re.compile(r"^\s*prepare\s+(?:the\s+|a\s+)?(\w+)", re.IGNORECASE)
+_STACK = re.compile(r"^\s*stack\s+(?:the\s+)?(\w+)", re.IGNORECASE)
+
+_LAYERS = {layer.lower(): layer for layer in HAMBURGER_STACK}
+
+
+def plan_symbolically(task: str, perception: Perception) -> list[AgentAction] | None:
+    """Build the plan for a recognised task shape, or None to defer to the LLM."""
+    if not task or perception is None:
+        return None
+    if match := _PLATE_SETUP.search(task):
+        return _plate_setup(match.group(1), perception)
+    if match := _STACK.match(task):
+        return _stack(_LAYERS.get(match.group(1).lower()), perception)
+    if match := _PREP.match(task):
+        return _prep(_LAYERS.get(match.group(1).lower()), perception)
+    return None
+
+
+def _plate_setup(table: str | None, perception: Perception) -> list[AgentAction] | None:
+    if perception.assembly.plate_location:
+        return None  # already done; let the LLM explain what to do instead
+    table = table or free_table(perception)
+    if table is None or not (is_shared_prep_table(table) or is_player_prep_table(table)):
+        return None
+
+    held = _held(perception)
+    if is_plate(held.name):
+        steps = []
+    elif held.is_empty_hands:
+        steps = [
+            _step("move_to", PLATE_SOURCE, "Go to the plate source."),
+            _step("pickup", PLATE_SOURCE, "Pick up the PLATE."),
+        ]
+    else:
+        return None
+    return steps + [
+        _step("move_to", table, "Carry the PLATE to the parking table."),
+        _step("put_down", table, f"Put the PLATE down; {table} is the assembly surface."),
+    ]
+
+
+def _prep(layer: str | None, perception: Perception) -> list[AgentAction] | None:
+    if layer is None:
+        return None
+    raw = RAW_FOR[layer]
+    station, verb = PROCESSING_RULES[raw]
+    table = free_table(perception)
+    if table is None:
+        return None
+
+    held = _held(perception)
+    if held.name == raw:
+        steps = []
+    elif held.is_empty_hands:
+        box = BOX_FOR[raw]
+        steps = [
+            _step("move_to", box, f"Go to the {raw} source."),
+            _step("pickup", box, f"Pick up a raw {raw}."),
+        ]
+    else:
+        return None
+    return steps + [
+        _step("move_to", station, f"Carry it to the {station}."),
+        _step("put_down", station, f"Place the {raw} to {verb} it."),
+        _step(verb, station, f"{verb.capitalize()} it into {layer}."),
+        _step("pickup", station, f"Pick up the {layer}."),
+        _step("move_to", table, "Move to a free prep table."),
+        _step("put_down", table, f"Park the {layer} for assembly — task complete."),
+    ]
+
+
+def _stack(layer: str | None, perception: Perception) -> list[AgentAction] | None:
+    assembly = perception.assembly
+    plate = assembly.plate_location
+    if layer is None or not plate or assembly.is_done:
+        return None
+    if assembly.next_expected and assembly.next_expected != layer:
+        return None  # Unity would reject the layer
+
+    steps = []
+    if not same_item(_held(perception).name, layer):
+        if not _held(perception).is_empty_hands:
+            return None
+        source = next(
+            (t for t, item in table_contents(perception).items()
+             if t != plate and same_item(item, layer)),
+            None,
+        )
+        if source is None:
+            return None
+        steps = [
+            _step("move_to", source, f"Go to where the {layer} is parked."),
+            _step("pickup", source, f"Pick up the {layer}."),
+        ]
+    return steps + [
+        _step("move_to", plate, "Carry it to the plated table."),
+        _step("put_down", plate, f"Stack {layer} onto the plate."),
+    ]
+
+
+# ---- helpers ------------------------------------------------------------
+
+def _step(function: str, target: str, thought: str) -> AgentAction:
+    return AgentAction(function=function, args={"id": target}, thought_trace=thought)
+
+
+def _held(perception: Perception) -> HeldItem:
+    return HeldItem.from_raw(perception.self.held_item)
+
+
+def table_contents(perception: Perception) -> dict[str, str | None]:
+    """Prep tables in sight → the item on top (None if empty)."""
+    contents: dict[str, str | None] = {}
+    for obj in perception.sensory.reachable_objects + perception.sensory.visible_objects:
+        if is_shared_prep_table(obj.id) or is_player_prep_table(obj.id):
+            contents.setdefault(obj.id, obj.state.get("held_item") or None)
+    return contents
+
+
+def free_table(perception: Perception) -> str | None:
+    """A shared prep table that is not the assembly surface, preferring
+    one we can see is empty over one we can't see at all."""
+    contents = table_contents(perception)
+    plate = perception.assembly.plate_location
+    candidates = [
+        t for t in SHARED_PREP_TABLES
+        if t != plate and not contents.get(t)
+    ]
+    seen_empty = [t for t in candidates if t in contents]
+    return (seen_empty or candidates or [None])[0]
+
+
+def same_item(name: str | None, layer: str) -> bool:
+    """Unity spells processed items several ways (`TomatoSlice`,
+    `TOMATOSLICE`, `SLICED_TOMATO`); match on the words of the layer."""
+    if not name:
+        return False
+    norm = name.upper().replace("_", "")
+    words = re.findall(r"[A-Z][a-z]*", layer)
+    return all(word.upper() in norm for word in words)
@@ -4,40 +4,53 @@ from app.agents.base import BaseAgent
 from app.llm.base import BaseLLMClient
 from app.memory.base import BaseMemoryStore
 from app.api.schemas import SkillDTO
+from app.context.budget import PromptSection, TokenBudget
 
 logger = logging.getLogger(__name__)
 
 
 class SkillAgent(BaseAgent):
+    name = "skill"
+
     def __init__(
         self, 
         llm: BaseLLMClient, 
         memory_store: BaseMemoryStore,
         template_name="skill", 
         tools=None,
+        output_mode="text",
+        budget: TokenBudget | None = None,
     ):
-        super().__init__(llm, template_name, tools)
+        super().__init__(llm, template_name, tools, output_mode, budget)
         self.memory = memory_store
-    
+
     def render_human_message(self, task: str, action_history: list) -> HumanMessage:
         """
         Formats the raw action history into a request for an SOP.
         """
-        content = f"""
+        head = f"""
         --- COMPLETED TASK ---
         "{task}"
-        
+
         --- RAW ACTION HISTORY ---
-        {action_history}
-        
+        """
+        tail = """
+
         --- INSTRUCTIONS ---
         Convert this history into a GENERIC Standard Operating Procedure (SOP).
         1. Generalize coordinates (e.g., don't say "Move to (1,2)", say "Move to Fridge").
         2. Keep it concise (3-6 steps).
         3. Output strict JSON matching the SkillDTO structure.
         """
+        content = self._fit_prompt([
+            PromptSection("task", head),
+            PromptSection("action_history", str(action_history), [
+                (35, "keep the last 10 raw actions", lambda _: str(action_history[-10:])),
+            ]),
+            PromptSection("instructions", tail),
+        ])
         return HumanMessage(content=content)
-    
+
     async def retrieve_skill(self, task: str):
         """
         Finds a relevant guide for the current task to inject into the Context.
@@ -45,14 +58,14 @@ class SkillAgent(BaseAgent):
         try:
             query = f"How to {task}"
             skills: list[SkillDTO] = await self.memory.fetch_similar_skills(query=query, limit=1)
-            
+
             #TODO: 
             if not skills:
                 return ""
-            
+
             #TODO: strategy for use which relavent skill
             best_skill = skills[0]
-            
+
             return f"""
             --- KNOWN RECIPE / SKILL ---
             Task: {best_skill.task_name}
@@ -63,55 +76,65 @@ class SkillAgent(BaseAgent):
         except Exception as e:
             logger.error(f"Failed to retrieve skill for '{task}': {e}")
             return ""
-        
-    
+
+
     async def learn_new_skill(
         self, 
         task: str, 
         action_history: list, 
         success: bool,
-        max_retries=3):
+    ) -> bool:
         """
         Called after Critic says 'Success'.
         Summarizes the raw JSON actions into a generic textual guide.
+
+        Single attempt; returns whether a skill was saved. Retries and
+        backoff belong to the caller (see app/agents/skill_jobs.py).
         """
         if not success:
-            return
-        
-        if max_retries == 0:
-            logger.error(f"Failed to learn skill '{task}' after max retries.")
-            return
-        
+            return False
+
         sys_msg = self.render_system_message().content
         human_msg = self.render_human_message(task, action_history).content
-        
+
+        try:
+            new_skill = None
+            retries = 0
+            if self.output_mode == "structured":
+                new_skill = await self._generate_structured(sys_msg, human_msg, SkillDTO)
+                retries = 1 if new_skill is None else 0
+            if new_skill is None:
+                new_skill = await self.__learn_from_text(sys_msg, human_msg)
+            self._record_call(retries)
+
+            await self.memory.save_skill(new_skill)
+            logger.info(f"🧠 Learned new skill: {task}")
+            return True
+
+        except Exception as e:
+            logger.warning(f"Error learning skill '{task}': {e}")
+            return False
+
+    async def __learn_from_text(self, sys_msg: str, human_msg: str) -> SkillDTO:
+        sop_resp = await self.llm.generate_response(
+            system_prompt=sys_msg,
+            user_message=human_msg
+        )
+
+        # print(f"\n\n[Skill LLM response]: Try to learn {sop_resp}\n")
+        logger.info(f"\n\n[Skill Agent response]:Try to learn {sop_resp}\n")
+
         try:
-            sop_resp = await self.llm.generate_response(
-                system_prompt=sys_msg,
-                user_message=human_msg
-            )
-            
-            
-            # print(f"\n\n[Skill LLM response]: Try to learn {sop_resp}\n")
-            logger.info(f"\n\n[Skill Agent response]:Try to learn {sop_resp}\n")
-            
             data = self._parse_json_helper(sop_resp)
 
             if not data:
                 raise ValueError("No JSON found")
             if isinstance(data, list):
                 data = data[0]
-                
-            new_skill = SkillDTO(**data)
-            
-            await self.memory.save_skill(new_skill)
-            logger.info(f"🧠 Learned new skill: {task}")
-        
-        except Exception as e:
-            logging.warning(f"Error learning skill: {e}. Retrying ({max_retries} left)...")
-            return await self.learn_new_skill(
-                task,
-                action_history,
-                success,
-                max_retries - 1
-            )
\ No newline at end of file
+
+            return SkillDTO(**data)
+        except Exception:
+            repaired = self._repair_json(sop_resp, SkillDTO)
+            if repaired is None:
+                raise
+            return repaired
@@ -0,0 +1,312 @@
+"""Skill distillation as a background job, off the frame's critical path.
+
+`learning_node` used to await `SkillAgent.learn_new_skill` — an LLM
+summary, an embedding and a Postgres upsert — before the graph moved on
+to the next task. It now only enqueues a job; a small pool of workers
+drains the queue, retrying failures with exponential backoff.
+
+Delivery is at-least-once with the Redis backend: a job stays in its
+worker's processing list until it is acknowledged. Each worker keeps a
+heartbeat key alive; once a worker's heartbeat expires (it crashed),
+any worker requeues that worker's list. A job can therefore run twice,
+which is harmless because `save_skill` is an upsert keyed by task name.
+Jobs that cannot be run at all (malformed payload, unexpected error) or
+that exhaust their attempts go to a dead-letter list. The in-memory
+backend (tests, single-worker dev) loses queued jobs on restart.
+
+Workers start with the app (see `core/lifecycle.py`), so jobs left over
+from a restart are drained without waiting for a new one.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.agents.skill import SkillAgent
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.core.worker import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+
+class BaseJobQueue(ABC):
+    """Raw job queue. Jobs are JSON strings; `reserve` hands one out until
+    it is `ack`ed or `retry`ed."""
+
+    @abstractmethod
+    async def push(self, raw: str) -> None: ...
+
+    @abstractmethod
+    async def reserve(self, timeout_s: float) -> str | None: ...
+
+    @abstractmethod
+    async def ack(self, raw: str) -> None: ...
+
+    @abstractmethod
+    async def retry(self, raw: str, new_raw: str, delay_s: float) -> None: ...
+
+    @abstractmethod
+    async def dead_letter(self, raw: str) -> None:
+        """Un-reserve a job that won't be retried and keep it for inspection."""
+
+    async def heartbeat(self) -> None:
+        """Mark this worker alive, so its reserved jobs are left alone.
+        A no-op for queues with no other workers."""
+        return None
+
+    async def recover(self, include_own: bool = False) -> int:
+        """Requeue jobs orphaned by crashed workers (and, at startup, by
+        this worker's previous run). Returns how many."""
+        return 0
+
+
+class InMemoryJobQueue(BaseJobQueue):
+    def __init__(self):
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self.dead: list[str] = []
+
+    async def push(self, raw: str) -> None:
+        self._queue.put_nowait(raw)
+
+    async def reserve(self, timeout_s: float) -> str | None:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout_s)
+        except TimeoutError:
+            return None
+
+    async def ack(self, raw: str) -> None:
+        pass
+
+    async def retry(self, raw: str, new_raw: str, delay_s: float) -> None:
+        asyncio.get_running_loop().call_later(delay_s, self._queue.put_nowait, new_raw)
+
+    async def dead_letter(self, raw: str) -> None:
+        self.dead.append(raw)
+
+
+class RedisJobQueue(BaseJobQueue):
+    """Reliable queue: LPUSH → BLMOVE into this worker's processing list →
+    LREM on ack. Retries wait in a sorted set scored by due time.
+
+    Every worker has its own processing list and an `alive` key it renews
+    with `heartbeat`; `recover` only requeues the lists of workers whose
+    key has expired, never jobs another live worker is still running."""
+
+    def __init__(
+        self,
+        redis_client,
+        name: str = "paprika:jobs:skill",
+        worker_id: str | None = None,
+        owner_ttl_s: float = 30.0,
+    ):
+        self._redis = redis_client
+        self._name = name
+        self._pending = name
+        self._delayed = f"{name}:delayed"
+        self._dead = f"{name}:dead"
+        self._workers = f"{name}:workers"
+        self.worker_id = worker_id or default_worker_id()
+        self.owner_ttl_s = owner_ttl_s
+        self._processing = self._processing_key(self.worker_id)
+
+    def _processing_key(self, worker_id: str) -> str:
+        return f"{self._name}:processing:{worker_id}"
+
+    def _alive_key(self, worker_id: str) -> str:
+        return f"{self._name}:alive:{worker_id}"
+
+    async def push(self, raw: str) -> None:
+        await self._redis.lpush(self._pending, raw)
+
+    async def reserve(self, timeout_s: float) -> str | None:
+        await self._promote_due()
+        return await self._redis.blmove(
+            self._pending, self._processing, timeout_s, "RIGHT", "LEFT"
+        )
+
+    async def ack(self, raw: str) -> None:
+        await self._redis.lrem(self._processing, 1, raw)
+
+    async def retry(self, raw: str, new_raw: str, delay_s: float) -> None:
+        # Schedule before un-reserving: a crash in between duplicates the
+        # job rather than losing it.
+        await self._redis.zadd(self._delayed, {new_raw: time.time() + delay_s})
+        await self._redis.lrem(self._processing, 1, raw)
+
+    async def dead_letter(self, raw: str) -> None:
+        await self._redis.lpush(self._dead, raw)
+        await self._redis.lrem(self._processing, 1, raw)
+
+    async def heartbeat(self) -> None:
+        await self._redis.set(
+            self._alive_key(self.worker_id), "1", px=int(self.owner_ttl_s * 1000)
+        )
+        await self._redis.sadd(self._workers, self.worker_id)
+
+    async def recover(self, include_own: bool = False) -> int:
+        moved = 0
+        for worker_id in await self._redis.smembers(self._workers):
+            own = worker_id == self.worker_id
+            if own and not include_own:
+                continue
+            if not own and await self._redis.exists(self._alive_key(worker_id)):
+                continue
+            processing = self._processing_key(worker_id)
+            while await self._redis.lmove(processing, self._pending, "RIGHT", "RIGHT"):
+                moved += 1
+            if not own:
+                await self._redis.srem(self._workers, worker_id)
+        return moved
+
+    async def _promote_due(self) -> None:
+        due = await self._redis.zrangebyscore(self._delayed, 0, time.time())
+        for raw in due:
+            # ZREM decides which worker moves it when several race here.
+            if await self._redis.zrem(self._delayed, raw):
+                await self._redis.lpush(self._pending, raw)
+
+
+class SkillLearningQueue:
+    """Enqueue skill distillation and run it on `workers` background tasks."""
+
+    def __init__(
+        self,
+        queue: BaseJobQueue,
+        skill_agent: SkillAgent,
+        workers: int = 2,
+        max_attempts: int = 5,
+        backoff_s: float = 2.0,
+        poll_s: float = 1.0,
+        heartbeat_s: float = 10.0,
+    ):
+        self.queue = queue
+        self.skill_agent = skill_agent
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.poll_s = poll_s
+        self.heartbeat_s = heartbeat_s
+        self._started = False
+        self._tasks: list[asyncio.Task] = []
+
+    async def enqueue(self, task: str, action_history: list[dict[str, Any]]) -> None:
+        """Queue a job and return immediately. Never raises: a lost skill
+        is better than a failed frame."""
+        raw = json.dumps(
+            {"id": uuid.uuid4().hex, "task": task, "action_history": action_history, "attempts": 0},
+            ensure_ascii=False,
+        )
+        try:
+            await self.queue.push(raw)
+        except RedisError as e:
+            logger.error("Could not enqueue skill job for '%s': %s", task, e)
+            metrics.counter("skill_jobs.enqueue_failed").inc()
+            return
+        metrics.counter("skill_jobs.enqueued").inc()
+        await self.start()
+
+    async def start(self) -> None:
+        """Recover orphaned jobs, then start the workers. Idempotent."""
+        if self._started:
+            return
+        self._started = True
+        try:
+            await self.queue.heartbeat()
+            # Before any worker reserves: our own list is only left over
+            # from a previous run of this worker id.
+            if recovered := await self.queue.recover(include_own=True):
+                logger.warning("Requeued %d orphaned skill job(s)", recovered)
+        except RedisError as e:
+            logger.warning("Skill job recovery failed: %s", e)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if self.workers:
+            self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._started = False
+
+    async def _maintain(self) -> None:
+        """Renew this worker's heartbeat and pick up crashed workers' jobs."""
+        while True:
+            await asyncio.sleep(self.heartbeat_s)
+            try:
+                await self.queue.heartbeat()
+                if recovered := await self.queue.recover():
+                    logger.warning("Requeued %d skill job(s) from a dead worker", recovered)
+            except RedisError as e:
+                logger.warning("Skill job heartbeat failed: %s", e)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                raw = await self.queue.reserve(self.poll_s)
+            except RedisError as e:
+                logger.warning("Skill job queue unavailable: %s", e)
+                await asyncio.sleep(self.poll_s)
+                continue
+            if raw is None:
+                continue
+            try:
+                await self._run(raw)
+            except RedisError as e:
+                # Left in our processing list; recovered on next start.
+                logger.warning("Skill job bookkeeping failed: %s", e)
+            except Exception:
+                # Malformed payload or a bug: retrying won't help, and a
+                # dead worker task would leave the job stuck in processing.
+                logger.exception("Skill job could not be run; dead-lettering: %s", raw[:200])
+                metrics.counter("skill_jobs.dead_lettered").inc()
+                try:
+                    await self.queue.dead_letter(raw)
+                except RedisError as e:
+                    logger.warning("Skill job dead-letter failed: %s", e)
+
+    async def _run(self, raw: str) -> None:
+        job = json.loads(raw)
+        try:
+            learned = await self.skill_agent.learn_new_skill(
+                task=job["task"],
+                action_history=job["action_history"],
+                success=True,
+            )
+        except Exception:
+            logger.exception("Skill job for '%s' crashed", job["task"])
+            learned = False
+
+        if learned:
+            metrics.counter("skill_jobs.succeeded").inc()
+            await self.queue.ack(raw)
+            return
+
+        job["attempts"] += 1
+        if job["attempts"] >= self.max_attempts:
+            logger.error(
+                "Giving up on skill '%s' after %d attempts", job["task"], job["attempts"]
+            )
+            metrics.counter("skill_jobs.failed").inc()
+            await self.queue.dead_letter(raw)
+            return
+
+        delay_s = self.backoff_s * 2 ** (job["attempts"] - 1) * random.uniform(0.8, 1.2)
+        metrics.counter("skill_jobs.retried").inc()
+        await self.queue.retry(raw, json.dumps(job, ensure_ascii=False), delay_s)
+
+
+def build_job_queue(settings: Settings, redis_client) -> BaseJobQueue:
+    if settings.JOB_QUEUE_BACKEND == "redis":
+        return RedisJobQueue(redis_client)
+    if settings.JOB_QUEUE_BACKEND == "memory":
+        return InMemoryJobQueue()
+    raise ValueError(f"Unknown job queue backend: {settings.JOB_QUEUE_BACKEND}")
@@ -0,0 +1,91 @@
+"""Speculative curriculum proposals, run alongside the critic.
+
+On re-entry the graph runs critic → (learning | failure) → curriculum,
+so two LLM calls sit back to back whenever the critic closes a task.
+With `SPECULATIVE_CURRICULUM` on, `critic_node` starts the curriculum
+proposal at the same time as the critic and:
+
+- routes to `action` (retry): the proposal is cancelled — a miss;
+- routes to learning/failure: the proposal is awaited and handed to
+  `curriculum_node` through state, which uses it instead of calling
+  the LLM again — a hit, unless it just proposes the task that was
+  being judged (it was made without knowing that task's outcome).
+
+Every miss is charged the tokens it burned, counted like the prompt
+budgets (`context/budget.py`), so the hit rate can be weighed against
+the extra cost.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.agents.curriculum import CurriculumAgent
+from app.api.schemas import CurriculumOutput
+from app.context.budget import TokenCounter, get_counter
+from app.context.history import TaskHistory
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _counter(agent: CurriculumAgent) -> TokenCounter:
+    # The agent's budget counter when it has one, so both agree.
+    if agent.budget is not None:
+        return agent.budget.counter
+    return get_counter(settings.OPENAI_MODEL)
+
+
+def spent_tokens(
+    agent: CurriculumAgent, context: str, proposal: CurriculumOutput | None = None
+) -> int:
+    """Cost of one proposal: the prompt, plus the answer if there was one."""
+    count = _counter(agent).count
+    spent = count(agent.system_prompts) + count(context)
+    if proposal is not None:
+        spent += count(proposal.model_dump_json())
+    return spent
+
+
+class CurriculumSpeculation:
+    def __init__(self, agent: CurriculumAgent, context: str, history: TaskHistory | None = None):
+        self.agent = agent
+        self.context = context
+        self._task = asyncio.create_task(agent.propose_next_task(context, history))
+
+    async def cancel(self) -> None:
+        """The critic sent us back to `action`; the proposal is not needed."""
+        self._task.cancel()
+        try:
+            proposal = await self._task
+        except (asyncio.CancelledError, Exception):
+            # Cancelled mid-request: the prompt was still paid for.
+            proposal = None
+        record_miss(spent_tokens(self.agent, self.context, proposal))
+
+    async def result(self) -> CurriculumOutput | None:
+        """Wait for the proposal. None if it failed; curriculum then runs normally."""
+        try:
+            return await self._task
+        except Exception as e:
+            logger.warning("Speculative curriculum proposal failed: %s", e)
+            record_miss(spent_tokens(self.agent, self.context))
+            return None
+
+
+def record_hit() -> None:
+    metrics.counter("curriculum.speculative_hits").inc()
+    _update_hit_rate()
+
+
+def record_miss(wasted_tokens: int) -> None:
+    metrics.counter("curriculum.speculative_misses").inc()
+    metrics.counter("curriculum.speculative_wasted_tokens_est").inc(wasted_tokens)
+    _update_hit_rate()
+
+
+def _update_hit_rate() -> None:
+    hits = metrics.counter("curriculum.speculative_hits").value
+    misses = metrics.counter("curriculum.speculative_misses").value
+    metrics.gauge("curriculum.speculative_hit_rate").set(hits / (hits + misses))
@@ -0,0 +1,133 @@
+"""Admission control for planning cycles.
+
+One planning cycle fans out to 4-5 LLM calls. Without a cap, 50 Unity
+windows firing at once push the provider into 429s and every frame gets
+slower. Two independent limits guard graph runs:
+
+- a **global cap** on in-flight runs; callers wait up to a timeout for
+  a slot, and the wait is exported as `admission.queue_wait_ms` so the
+  cap can be sized from real numbers;
+- a **token bucket per client_id**, so one chatty window can't take
+  every slot.
+
+Both reject with `AgentBusyError`, which carries `retry_after_ms` back
+to Unity through the usual structured error message.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.core.config import Settings
+from app.core.exceptions import AgentBusyError
+from app.core.metrics import metrics
+
+# Used for retry hints before we have observed any run latency.
+_DEFAULT_RETRY_AFTER_MS = 1000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take one token. Returns 0 on success, else seconds until one is free."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    @property
+    def is_full(self) -> bool:
+        elapsed = time.monotonic() - self.updated
+        return self.tokens + elapsed * self.rate >= self.capacity
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        queue_timeout_s: float = 5.0,
+        client_rate_per_s: float = 1.0,
+        client_burst: int = 3,
+        max_tracked_clients: int = 1024,
+    ):
+        self.max_in_flight = max_in_flight
+        self.queue_timeout_s = queue_timeout_s
+        self.client_rate_per_s = client_rate_per_s
+        self.client_burst = client_burst
+        self.max_tracked_clients = max_tracked_clients
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._buckets: dict[str, TokenBucket] = {}
+        self.in_flight = 0
+
+    @asynccontextmanager
+    async def admit(self, client_id: str) -> AsyncIterator[None]:
+        """Hold a planning slot for the duration of the block."""
+        retry_after_s = self._bucket(client_id).try_acquire()
+        if retry_after_s > 0:
+            metrics.counter("admission.rejected_rate_limit").inc()
+            raise AgentBusyError(
+                f"client {client_id} exceeded {self.client_rate_per_s}/s planning rate",
+                retry_after_ms=int(retry_after_s * 1000) + 1,
+            )
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout_s)
+        except TimeoutError:
+            metrics.counter("admission.rejected_queue_timeout").inc()
+            raise AgentBusyError(
+                f"no planning slot free after {self.queue_timeout_s}s "
+                f"({self.max_in_flight} in flight)",
+                retry_after_ms=self._retry_hint_ms(),
+            ) from None
+        metrics.histogram("admission.queue_wait_ms").observe(
+            (time.perf_counter() - started) * 1000
+        )
+
+        self.in_flight += 1
+        metrics.gauge("admission.in_flight").set(self.in_flight)
+        run_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            metrics.gauge("admission.in_flight").set(self.in_flight)
+            metrics.histogram("admission.run_ms").observe(
+                (time.perf_counter() - run_started) * 1000
+            )
+            self._slots.release()
+
+    def _bucket(self, client_id: str) -> TokenBucket:
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_tracked_clients:
+                # A refilled bucket carries no state worth keeping.
+                self._buckets = {k: b for k, b in self._buckets.items() if not b.is_full}
+            bucket = TokenBucket(self.client_rate_per_s, self.client_burst)
+            self._buckets[client_id] = bucket
+        return bucket
+
+    @staticmethod
+    def _retry_hint_ms() -> int:
+        # A slot frees up roughly one typical run from now.
+        p50 = metrics.histogram("admission.run_ms").quantile(0.5)
+        return int(p50) if p50 else _DEFAULT_RETRY_AFTER_MS
+
+
+def build_admission_controller(settings: Settings) -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+        queue_timeout_s=settings.ADMISSION_QUEUE_TIMEOUT_S,
+        client_rate_per_s=settings.CLIENT_PLANS_PER_SECOND,
+        client_burst=settings.CLIENT_PLAN_BURST,
+    )
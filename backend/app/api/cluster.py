@@ -0,0 +1,168 @@
+"""Coordination between backend workers sharing one Redis.
+
+Two problems appear once more than one process serves `/api/ws/agent`:
+
+1. `ConnectionManager.broadcast` only reaches sockets on the local
+   process. `ClusterBroadcaster` publishes broadcasts on a Redis pub/sub
+   channel; every worker (including the sender) subscribes and relays
+   to its own sockets.
+2. Two sockets with the same `client_id` could plan concurrently on
+   different workers and race on the shared session. `SessionLease` is
+   a per-`client_id` Redis lock (SET NX PX) kept alive by a heartbeat;
+   only the holder plans for that session.
+
+Both are only wired in when `CLUSTER_MODE` is on; a single worker needs
+neither.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.api.connections import ConnectionManager
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHANNEL = "paprika:broadcast"
+LEASE_KEY_PREFIX = "paprika:lease:"
+
+# Only touch the key if we still own it. Plain GET + PEXPIRE/DEL would
+# race with another worker taking over between the two calls.
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class ClusterBroadcaster:
+    def __init__(
+        self,
+        redis_client,
+        manager: ConnectionManager,
+        channel: str = BROADCAST_CHANNEL,
+    ):
+        self._redis = redis_client
+        self._manager = manager
+        self._channel = channel
+        self._listener: asyncio.Task | None = None
+
+    async def publish(self, message: dict[str, Any]) -> None:
+        """Deliver `message` to every socket on every worker.
+
+        Local sockets receive it through our own subscription. If Redis
+        is unreachable we fall back to a local-only broadcast.
+        """
+        try:
+            await self._redis.publish(self._channel, json.dumps(message))
+        except RedisError as e:
+            logger.warning("Broadcast publish failed, delivering locally only: %s", e)
+            await self._manager.broadcast(message)
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                async for item in pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    metrics.counter("cluster.broadcasts_relayed").inc()
+                    await self._manager.broadcast(json.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Broadcast subscription dropped (%s); resubscribing.", e)
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+class SessionLease:
+    """Exclusive, heartbeat-renewed ownership of one `client_id`."""
+
+    def __init__(
+        self,
+        redis_client,
+        client_id: str,
+        worker_id: str,
+        ttl_ms: int = 15_000,
+    ):
+        self._redis = redis_client
+        self.client_id = client_id
+        self.key = f"{LEASE_KEY_PREFIX}{client_id}"
+        # Unique per connection, so a second socket on the same worker
+        # can't reuse the first one's lease either.
+        self.token = f"{worker_id}:{uuid.uuid4().hex}"
+        self.ttl_ms = ttl_ms
+        self.lost = asyncio.Event()
+        self._heartbeat: asyncio.Task | None = None
+
+    async def acquire(self, timeout_s: float = 5.0) -> bool:
+        """Try to take the lease, waiting up to `timeout_s` for the current
+        holder to release it or let it expire (e.g. a crashed worker)."""
+        deadline = asyncio.get_running_loop().time() + timeout_s
+        poll_s = min(0.25, self.ttl_ms / 4000)
+        while True:
+            if await self._redis.set(self.key, self.token, nx=True, px=self.ttl_ms):
+                self._heartbeat = asyncio.create_task(self._renew_forever())
+                metrics.counter("cluster.leases_acquired").inc()
+                return True
+            if asyncio.get_running_loop().time() >= deadline:
+                metrics.counter("cluster.leases_contended").inc()
+                return False
+            await asyncio.sleep(poll_s)
+
+    async def release(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        try:
+            await self._redis.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+        except RedisError as e:
+            # It will expire on its own after ttl_ms.
+            logger.warning("Lease release failed for %s: %s", self.client_id, e)
+
+    async def _renew_forever(self) -> None:
+        interval_s = self.ttl_ms / 3000
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                renewed = await self._redis.eval(
+                    _RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms,
+                )
+            except RedisError as e:
+                # Keep trying until the TTL runs out; a blip shouldn't
+                # cost us the session.
+                logger.warning("Lease heartbeat failed for %s: %s", self.client_id, e)
+                continue
+            if not renewed:
+                logger.warning("⚠️ Lost session lease for client %s", self.client_id)
+                metrics.counter("cluster.leases_lost").inc()
+                self.lost.set()
+                return
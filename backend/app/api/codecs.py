@@ -0,0 +1,66 @@
+"""Wire formats for the Unity WebSocket.
+
+JSON text frames are the default and need no negotiation. A client can
+opt into MessagePack binary frames by offering the `paprika.msgpack.v1`
+subprotocol in its handshake (`Sec-WebSocket-Protocol`). The example
+perception in `prompts/templates/perception_send_from_unity_example.txt`
+is ~5 KB of pretty JSON per tick; see `scripts/bench_wire_format.py`
+for bytes-on-the-wire and decode-time numbers.
+
+Both codecs exchange plain dicts with the rest of the app, so the
+handler validates into `Perception` exactly as before.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+import ormsgpack
+from fastapi import WebSocket
+
+MSGPACK_SUBPROTOCOL = "paprika.msgpack.v1"
+
+# OPT_SERIALIZE_PYDANTIC packs AgentAction & co. without a model_dump()
+# round trip; NON_STR_KEYS tolerates int keys in tool args.
+_PACK_OPTIONS = ormsgpack.OPT_SERIALIZE_PYDANTIC | ormsgpack.OPT_NON_STR_KEYS
+
+
+class JsonCodec:
+    name = "json"
+    subprotocol: str | None = None
+
+    async def receive(self, websocket: WebSocket) -> Any:
+        return await websocket.receive_json()
+
+    async def send(self, websocket: WebSocket, message: Any) -> None:
+        await websocket.send_json(message)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    subprotocol: str | None = MSGPACK_SUBPROTOCOL
+
+    async def receive(self, websocket: WebSocket) -> Any:
+        return self.decode(await websocket.receive_bytes())
+
+    async def send(self, websocket: WebSocket, message: Any) -> None:
+        await websocket.send_bytes(self.encode(message))
+
+    @staticmethod
+    def decode(payload: bytes) -> Any:
+        return ormsgpack.unpackb(payload)
+
+    @staticmethod
+    def encode(message: Any) -> bytes:
+        return ormsgpack.packb(message, option=_PACK_OPTIONS)
+
+
+JSON_CODEC = JsonCodec()
+MSGPACK_CODEC = MsgpackCodec()
+
+
+def negotiate_codec(websocket: WebSocket) -> JsonCodec | MsgpackCodec:
+    """Pick the codec from the subprotocols the client offered."""
+    offered = websocket.scope.get("subprotocols") or []
+    if MSGPACK_SUBPROTOCOL in offered:
+        return MSGPACK_CODEC
+    return JSON_CODEC
@@ -0,0 +1,144 @@
+"""WebSocket connection registry with per-connection send queues.
+
+Every connection gets a bounded outbound queue drained by its own
+writer task. Senders (the planning loop, broadcasts) only enqueue, so
+a Unity window that stops reading can never stall a broadcast or the
+replies to other clients — it just fills its own queue, and the
+configured policy decides what happens next.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import WebSocket
+
+from app.api.codecs import JSON_CODEC, JsonCodec, MsgpackCodec
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+QUEUE_POLICIES = (DROP_OLDEST, DISCONNECT)
+
+# 1013 = "Try Again Later": the client was too slow to keep up.
+_SLOW_CONSUMER_CLOSE_CODE = 1013
+# Same code the routes use for "this client_id is owned by another
+# connection": here, a newer socket for the same client_id.
+_REPLACED_CLOSE_CODE = 4409
+
+
+@dataclass
+class _Connection:
+    client_id: str
+    websocket: WebSocket
+    queue: asyncio.Queue
+    codec: JsonCodec | MsgpackCodec = JSON_CODEC
+    writer: asyncio.Task | None = field(default=None, repr=False)
+
+
+class ConnectionManager:
+    def __init__(self, queue_size: int = 32, full_policy: str = DROP_OLDEST):
+        if full_policy not in QUEUE_POLICIES:
+            raise ValueError(f"Invalid send queue policy: {full_policy}")
+        self.queue_size = queue_size
+        self.full_policy = full_policy
+        self.active_connections: dict[str, _Connection] = {}
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        codec: JsonCodec | MsgpackCodec = JSON_CODEC,
+    ) -> None:
+        await websocket.accept(subprotocol=codec.subprotocol)
+
+        # Same client_id reconnecting before the old socket was reaped:
+        # the new socket wins. Close the old one so its receive loop ends
+        # instead of planning on for the same session.
+        stale = self.active_connections.get(client_id)
+        if stale is not None:
+            await self.disconnect(client_id, stale.websocket)
+            try:
+                await stale.websocket.close(code=_REPLACED_CLOSE_CODE)
+            except RuntimeError:
+                pass
+
+        conn = _Connection(
+            client_id=client_id,
+            websocket=websocket,
+            queue=asyncio.Queue(maxsize=self.queue_size),
+            codec=codec,
+        )
+        conn.writer = asyncio.create_task(self._writer(conn))
+        self.active_connections[client_id] = conn
+        metrics.gauge("ws.connections").set(len(self.active_connections))
+
+    async def disconnect(self, client_id: str, websocket: WebSocket | None = None) -> None:
+        """Unregister `client_id`. If `websocket` is given, only when it is
+        still the registered socket — a late cleanup from a replaced
+        connection must not evict its successor."""
+        conn = self.active_connections.get(client_id)
+        if conn is None or (websocket is not None and conn.websocket is not websocket):
+            return
+        del self.active_connections[client_id]
+        metrics.gauge("ws.connections").set(len(self.active_connections))
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+
+    async def send_personal_message(
+        self, message: dict, client_id: str, websocket: WebSocket | None = None
+    ) -> bool:
+        """Queue `message` for one client. Returns False if it was not queued.
+        If `websocket` is given, only while it is still the registered socket:
+        a reply from a replaced connection's loop must not reach its successor."""
+        conn = self.active_connections.get(client_id)
+        if conn is None or (websocket is not None and conn.websocket is not websocket):
+            return False
+        return await self._enqueue(conn, message)
+
+    async def broadcast(self, message: dict) -> None:
+        """Queue `message` for every client without waiting on any send."""
+        for conn in list(self.active_connections.values()):
+            await self._enqueue(conn, message)
+
+    def queue_depths(self) -> dict[str, int]:
+        return {cid: conn.queue.qsize() for cid, conn in self.active_connections.items()}
+
+    async def _enqueue(self, conn: _Connection, message: dict[str, Any]) -> bool:
+        if conn.queue.full():
+            if self.full_policy == DISCONNECT:
+                metrics.counter("ws.slow_consumer_disconnects").inc()
+                logger.warning(
+                    "🐢 Send queue full for client %s (%d); disconnecting.",
+                    conn.client_id,
+                    self.queue_size,
+                )
+                await self.disconnect(conn.client_id, conn.websocket)
+                try:
+                    await conn.websocket.close(code=_SLOW_CONSUMER_CLOSE_CODE)
+                except RuntimeError:
+                    pass
+                return False
+
+            conn.queue.get_nowait()
+            metrics.counter("ws.send_dropped").inc()
+
+        conn.queue.put_nowait(message)
+        metrics.histogram("ws.send_queue_depth").observe(conn.queue.qsize())
+        return True
+
+    async def _writer(self, conn: _Connection) -> None:
+        try:
+            while True:
+                message = await conn.queue.get()
+                await conn.codec.send(conn.websocket, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Socket died under us; the receive side will notice too.
+            logger.info("Writer for client %s stopped: %s", conn.client_id, e)
+            await self.disconnect(conn.client_id, conn.websocket)
@@ -0,0 +1,155 @@
+"""Delta perception protocol with a server-side materialized Perception.
+
+Most of a perception frame (boxes, stations, prep tables) does not
+change between ticks, yet a full frame re-sends every `ObjectView`.
+With deltas Unity sends a full frame once and then only what changed:
+
+    Full frame (baseline):  the usual Perception payload plus "seq": N
+    Delta frame:
+        {
+          "type": "delta",
+          "seq": N + 1,
+          "self": {...},                 # optional, replaces when present
+          "statistics": {...},           # optional
+          "assembly": {...},             # optional
+          "execution_trace": [...],      # optional, one-shot: [] when absent
+          "sensory": {                   # optional
+            "player_nearby": true,
+            "visible_objects":   {"upsert": [ObjectView, ...], "remove": ["id", ...]},
+            "reachable_objects": {"upsert": [...], "remove": [...]}
+          }
+        }
+
+The backend keeps one materialized `Perception` per connection and only
+validates the parts a delta touches. A delta whose `seq` is not exactly
+the next one (lost frame, reconnect) raises `PerceptionResyncRequired`
+and Unity must send a full frame. Frames without `seq` are the legacy
+protocol and pass through untouched.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import ValidationError
+
+from app.api.schemas import (
+    AssemblyView,
+    ObjectView,
+    Perception,
+    SelfState,
+    Sensory,
+    Statistics,
+    TraceStep,
+)
+from app.core.exceptions import InvalidPerceptionError, PerceptionResyncRequired
+from app.core.metrics import metrics
+
+DELTA_FRAME_TYPE = "delta"
+_OBJECT_LISTS = ("visible_objects", "reachable_objects")
+
+
+class PerceptionMaterializer:
+    """Applies full and delta frames for one WebSocket session."""
+
+    def __init__(self):
+        self.seq: int | None = None
+        self._perception: Perception | None = None
+        # id -> ObjectView, insertion-ordered, one per sensory list.
+        self._objects: dict[str, dict[str, ObjectView]] = {
+            name: {} for name in _OBJECT_LISTS
+        }
+
+    @property
+    def perception(self) -> Perception | None:
+        return self._perception
+
+    def apply(self, frame: Any) -> dict[str, Any] | Perception:
+        """Return the frame to plan against.
+
+        Legacy frames (no `seq`) come back unchanged as dicts; sequenced
+        frames come back as the materialized `Perception`.
+        """
+        if not isinstance(frame, dict) or "seq" not in frame:
+            return frame
+        if frame.get("type") == DELTA_FRAME_TYPE:
+            return self._apply_delta(frame)
+        return self._apply_full(frame)
+
+    def _apply_full(self, frame: dict[str, Any]) -> Perception:
+        try:
+            perception = Perception.model_validate(frame)
+        except ValidationError as e:
+            raise InvalidPerceptionError(str(e)) from e
+
+        metrics.counter("ws.perception_full_frames").inc()
+        self.seq = frame["seq"]
+        self._perception = perception
+        for name in _OBJECT_LISTS:
+            self._objects[name] = {o.id: o for o in getattr(perception.sensory, name)}
+        return perception
+
+    def _apply_delta(self, frame: dict[str, Any]) -> Perception:
+        seq = frame["seq"]
+        if self._perception is None or self.seq is None or seq != self.seq + 1:
+            metrics.counter("ws.perception_resyncs").inc()
+            error = PerceptionResyncRequired(
+                f"delta seq {seq} does not follow baseline seq {self.seq}",
+                expected_seq=None if self.seq is None else self.seq + 1,
+            )
+            # Drop the baseline: nothing after a gap can be trusted until
+            # the next full frame.
+            self.seq = None
+            self._perception = None
+            raise error
+
+        try:
+            update = self._validated_sections(frame)
+            sensory = self._apply_sensory(frame.get("sensory") or {})
+        except ValidationError as e:
+            raise InvalidPerceptionError(str(e)) from e
+
+        metrics.counter("ws.perception_delta_frames").inc()
+        self.seq = seq
+        self._perception = self._perception.model_copy(update={**update, "sensory": sensory})
+        return self._perception
+
+    @staticmethod
+    def _validated_sections(frame: dict[str, Any]) -> dict[str, Any]:
+        update: dict[str, Any] = {}
+        if "self" in frame:
+            update["self"] = SelfState.model_validate(frame["self"])
+        if "statistics" in frame:
+            update["statistics"] = Statistics.model_validate(frame["statistics"])
+        if "assembly" in frame:
+            update["assembly"] = AssemblyView.model_validate(frame["assembly"])
+        # The trace reports the last plan's execution once; carrying it
+        # over would replay old failures into the critic on later frames.
+        update["execution_trace"] = [
+            TraceStep.model_validate(step) for step in frame.get("execution_trace") or []
+        ]
+        return update
+
+    def _apply_sensory(self, delta: dict[str, Any]) -> Sensory:
+        # Validate every upsert before touching the baseline so a bad
+        # delta leaves the materialized state unchanged.
+        changes = {
+            name: (
+                (delta.get(name) or {}).get("remove", []),
+                [ObjectView.model_validate(raw) for raw in (delta.get(name) or {}).get("upsert", [])],
+            )
+            for name in _OBJECT_LISTS
+        }
+        for name, (removed, upserts) in changes.items():
+            objects = self._objects[name]
+            for object_id in removed:
+                objects.pop(object_id, None)
+            for view in upserts:
+                objects[view.id] = view
+
+        player_nearby = delta.get("player_nearby", self._perception.sensory.player_nearby)
+        # Every ObjectView is already validated; skip re-validating the lists.
+        return Sensory.model_construct(
+            player_nearby=player_nearby,
+            visible_objects=list(self._objects["visible_objects"].values()),
+            reachable_objects=list(self._objects["reachable_objects"].values()),
+        )
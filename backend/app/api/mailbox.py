@@ -0,0 +1,100 @@
+"""Latest-wins mailbox between the WebSocket reader and the planner.
+
+Unity pushes perception frames on its own clock; a planning cycle
+(`graph.app.ainvoke`) can take several seconds. If the planner read
+straight from the socket, frames would queue up in the socket buffer
+and each one would be planned against world state that is already
+stale. Instead a per-client receive task drops every frame into this
+single-slot mailbox and the planner always takes the newest one, so
+queueing delay is capped at one planning cycle.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from app.api.schemas import Perception
+from app.core.metrics import metrics
+
+# Raw payload (legacy protocol) or a Perception materialized from deltas.
+Frame = dict[str, Any] | Perception
+
+
+def _trace_of(frame: Frame) -> list:
+    if isinstance(frame, Perception):
+        return frame.execution_trace
+    if isinstance(frame, dict):
+        return frame.get("execution_trace") or []
+    return []
+
+
+class LatestFrameMailbox:
+    """Single-slot, latest-wins frame buffer for one WebSocket session.
+
+    A frame that arrives while an older one is still unread supersedes
+    it. The superseded frame is either:
+
+    - **coalesced** — its `execution_trace` is carried over because the
+      newer frame has none. Unity reports the outcome of the last plan
+      only once; dropping that frame would hide the result from the
+      critic.
+    - **dropped** — the newer frame fully replaces it.
+    """
+
+    def __init__(self):
+        self._frame: Frame | None = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, frame: Frame) -> None:
+        if self._closed:
+            return
+        self.received += 1
+        metrics.counter("ws.frames_received").inc()
+
+        if self._frame is not None:
+            frame = self._supersede(self._frame, frame)
+        self._frame = frame
+        self._ready.set()
+
+    async def get(self) -> Frame | None:
+        """Wait for the newest unread frame. Returns None once closed."""
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+
+        frame, self._frame = self._frame, None
+        self._ready.clear()
+        return frame
+
+    def close(self) -> None:
+        """Stop accepting frames and wake any waiting reader.
+
+        An unread frame is discarded: the socket is gone, so there is
+        nobody to send its plan to.
+        """
+        self._closed = True
+        self._frame = None
+        self._ready.set()
+
+    def _supersede(self, older: Frame, newer: Frame) -> Frame:
+        older_trace = _trace_of(older)
+        if older_trace and not _trace_of(newer):
+            self.coalesced += 1
+            metrics.counter("ws.frames_coalesced").inc()
+            if isinstance(newer, Perception):
+                return newer.model_copy(update={"execution_trace": older_trace})
+            return {**newer, "execution_trace": older_trace}
+
+        self.dropped += 1
+        metrics.counter("ws.frames_dropped").inc()
+        return newer
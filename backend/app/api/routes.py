@@ -1,27 +1,49 @@
+import asyncio
+import json
 import logging
 import os
-from typing import Any
+from contextlib import nullcontext
+from typing import Annotated, Any, Awaitable, Callable
 
-import redis.asyncio as redis
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 
-from app.agents.graph import graph_app
-from app.api.schemas import Perception
+from app.agents.graph import AgentGraph
+from app.api.admission import build_admission_controller
+from app.api.cluster import ClusterBroadcaster, SessionLease
+from app.api.codecs import JsonCodec, MsgpackCodec, negotiate_codec
+from app.api.connections import ConnectionManager
+from app.api.deltas import PerceptionMaterializer
+from app.api.mailbox import LatestFrameMailbox
+from app.api.schemas import BatchFrame, BatchPlanRequest, Perception
+from app.api.sessions import DEFAULT_TASK, build_session_store, new_session_state
+from app.context.history import TaskHistory
 from app.context.view import build_perception_context
 from app.core.config import settings
+from app.core.deps import get_graph, get_redis
 from app.core.exceptions import (
+    AgentBusyError,
     AgentExecutionError,
     ContextBuildError,
     InvalidPerceptionError,
     PaprikaError,
+    PerceptionResyncRequired,
 )
+from app.core.metrics import metrics
+from app.core.timing import collect_timings, stage
+from app.core.worker import default_worker_id
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+GraphDep = Annotated[AgentGraph, Depends(get_graph)]
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+redis_client = get_redis()
+session_store = build_session_store(settings, redis_client)
+admission = build_admission_controller(settings)
+# Admission id for /agent/batch requests: a batch takes one planning slot.
+BATCH_CLIENT_ID = "batch"
 
 
 # Maps each domain error to the message we send back to Unity. Keeping this
@@ -31,104 +53,353 @@ _CLIENT_ERROR_MESSAGES: dict[type[PaprikaError], str] = {
     InvalidPerceptionError: "Invalid perception schema",
     ContextBuildError: "Failed to build perception context",
     AgentExecutionError: "Agent failed to produce a plan",
+    PerceptionResyncRequired: "Perception delta out of sequence; send a full frame",
+    AgentBusyError: "Agent busy, retry later",
 }
 
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
+manager = ConnectionManager(
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    full_policy=settings.WS_SEND_QUEUE_POLICY,
+)
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# Cross-worker coordination, see app/api/cluster.py. The broadcaster's
+# listener is started and stopped by the app lifespan.
+WORKER_ID = default_worker_id()
+broadcaster = ClusterBroadcaster(redis_client, manager) if settings.CLUSTER_MODE else None
 
-    async def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+# Close code for "this client_id is owned by another connection".
+SESSION_OWNED_CLOSE_CODE = 4409
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+@router.get("/")
+async def read_main():
+    return {"msg": "Welcome to Paparika!"}
 
 
-manager = ConnectionManager()
+@router.get("/metrics")
+async def read_metrics():
+    return metrics.snapshot()
 
 
-@router.get("/")
-async def read_main():
-    return {"msg": "Welcome to Paparika!"}
+@router.post("/broadcast")
+async def broadcast(message: dict[str, Any]):
+    """Push `message` to every connected Unity client, on every worker."""
+    if broadcaster is None:
+        await manager.broadcast(message)
+        return {"scope": "local"}
+    await broadcaster.publish(message)
+    return {"scope": "cluster"}
+
+
+@router.post("/agent/batch")
+async def batch_plan(request: BatchPlanRequest, graph: GraphDep):
+    """Run many independent perception → plan cycles for offline eval.
+
+    Frames run concurrently (at most `BATCH_MAX_CONCURRENCY` at a time)
+    and results stream back as NDJSON in completion order, one line per
+    frame, tagged with the frame's `index` and optional `id`. Each line
+    carries the updated session state so eval runs can chain frames.
+
+    The batch is admitted once, as a whole, and holds one planning slot;
+    its frames skip the per-client rate limit. If the batch itself is not
+    admitted, the stream is a single error line with `retry_after_ms`.
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+    async def run(index: int, frame: BatchFrame) -> dict[str, Any]:
+        client_id = frame.id or f"batch-{index}"
+        session_state = dict(frame.session_state)
+        session_state["history"] = TaskHistory.from_list(frame.session_state.history)
+        async with semaphore:
+            try:
+                response = await _process_frame(
+                    frame.perception, session_state, client_id, graph, admit=False
+                )
+            except PaprikaError as e:
+                return {
+                    "index": index,
+                    "id": frame.id,
+                    "error": _CLIENT_ERROR_MESSAGES.get(type(e), "Internal agent error"),
+                    "type": type(e).__name__,
+                    "detail": str(e),
+                }
+        return {
+            "index": index,
+            "id": frame.id,
+            **response,
+            "session_state": {
+                "task": session_state["task"],
+                "plan": response["plan"],
+                "retry_count": session_state["retry_count"],
+                "skill_guide": session_state["skill_guide"],
+                "stack_baseline": session_state.get("stack_baseline"),
+                "plan_fingerprint": session_state.get("plan_fingerprint"),
+                "history": session_state["history"].to_list(),
+            },
+        }
+
+    async def stream():
+        try:
+            async with admission.admit(BATCH_CLIENT_ID):
+                tasks = [asyncio.create_task(run(i, f)) for i, f in enumerate(request.frames)]
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+                finally:
+                    # Client went away mid-stream: stop paying for the rest.
+                    for task in tasks:
+                        task.cancel()
+        except AgentBusyError as e:
+            yield json.dumps({
+                "error": _CLIENT_ERROR_MESSAGES[AgentBusyError],
+                "type": "AgentBusyError",
+                "detail": str(e),
+                **e.client_details,
+            }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @router.websocket("/ws/agent/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    client_id: str,
+    graph: GraphDep,
+    stream: bool = False,
+    kitchen: str | None = None,
+):
     """
     Handles distinct sessions.
     Unity URL Example: ws://localhost:8000/api/ws/agent/123
+
+    Frames are JSON text by default. Offer the `paprika.msgpack.v1`
+    subprotocol to switch both directions to MessagePack binary frames.
+
+    With `?stream=true` each plan step is pushed as a `plan_step`
+    message while the action agent is still generating, and the usual
+    response follows with `"type": "plan_complete"`.
+
+    Clients that pass the same `?kitchen=<id>` are coordinated: each gets
+    a burger sub-task no other agent in that kitchen is working on.
     """
-    await manager.connect(websocket)
+    codec = negotiate_codec(websocket)
 
-    session_state: dict[str, Any] = {
-        "task": "Decide Next Task",
-        "plan": [],
-        "retry_count": 0,
-        "skill_guide": "",
-    }
+    lease = None
+    if broadcaster is not None:
+        lease = SessionLease(redis_client, client_id, WORKER_ID, settings.SESSION_LEASE_TTL_MS)
+        if not await lease.acquire(settings.SESSION_LEASE_WAIT_S):
+            # Closing before accept rejects the handshake; Unity retries.
+            logger.warning("⛔ Client %s is planned by another connection; rejecting.", client_id)
+            await websocket.close(code=SESSION_OWNED_CLOSE_CODE)
+            return
 
     try:
-        while True:
-            data = await websocket.receive_json()
+        await manager.connect(websocket, client_id, codec)
+        session_state = await _load_session(client_id, graph)
+    except BaseException:
+        # The loop's `finally` below is not reached yet; don't leave a
+        # lease renewing forever and locking this client_id out.
+        if lease is not None:
+            await lease.release()
+        raise
+    if session_state is None:
+        session_state = new_session_state()
+    else:
+        logger.info(
+            "♻️ Resuming session for client %s | task=%s | retry=%d",
+            client_id,
+            session_state["task"],
+            session_state["retry_count"],
+        )
 
+    async def send_step(event: dict[str, Any]) -> None:
+        await manager.send_personal_message({"client_id": client_id, **event}, client_id, websocket)
+
+    # Reading and planning run separately: the receive task keeps draining
+    # the socket into a latest-wins mailbox while a planning cycle is in
+    # flight, so we never plan against a frame that has been superseded.
+    mailbox = LatestFrameMailbox()
+    receiver = asyncio.create_task(_receive_frames(websocket, mailbox, codec, client_id))
+    receiver.add_done_callback(lambda _: mailbox.close())
+
+    try:
+        while (data := await mailbox.get()) is not None:
             try:
-                response = await _process_frame(data, session_state, client_id)
-            except PaprikaError as e:
-                err_type = type(e).__name__
-                client_msg = _CLIENT_ERROR_MESSAGES.get(type(e), "Internal agent error")
-                logger.warning("⚠️ %s for client %s: %s", err_type, client_id, e)
-                await manager.send_personal_message(
-                    {"error": client_msg, "type": err_type}, websocket
+                response = await _process_frame(
+                    data, session_state, client_id, graph,
+                    on_step=send_step if stream else None, thread_id=client_id,
+                    kitchen_id=kitchen,
                 )
+            except PaprikaError as e:
+                await _send_error(client_id, e, websocket)
                 continue
 
+            if lease is not None and lease.lost.is_set():
+                # Someone else owns the session now; don't overwrite it.
+                logger.warning("⛔ Lost ownership of client %s; closing.", client_id)
+                await manager.disconnect(client_id, websocket)
+                await websocket.close(code=SESSION_OWNED_CLOSE_CODE, reason="session owned elsewhere")
+                return
+
+            if graph.checkpointed_app is None:
+                # With a checkpointer the graph already persisted the state.
+                await session_store.save(client_id, session_state)
+
             logger.info(
                 "📤 Response → %s | task=%s | plan=%d steps",
                 client_id,
                 response["task"],
                 len(response["plan"]),
             )
-            await manager.send_personal_message(response, websocket)
+            await manager.send_personal_message(response, client_id, websocket)
+
+        # Mailbox closed: surface whatever ended the receive task
+        # (normally WebSocketDisconnect) to the handlers below.
+        await receiver
 
     except WebSocketDisconnect:
-        await manager.disconnect(websocket)
-        logger.info("🔌 Client #%s disconnected.", client_id)
+        await manager.disconnect(client_id, websocket)
+        logger.info(
+            "🔌 Client #%s disconnected. frames=%d dropped=%d coalesced=%d",
+            client_id,
+            mailbox.received,
+            mailbox.dropped,
+            mailbox.coalesced,
+        )
 
     except Exception:
         logger.exception("❌ Critical error for client #%s", client_id)
-        await manager.disconnect(websocket)
+        await manager.disconnect(client_id, websocket)
         try:
             await websocket.close(code=1011)
         except RuntimeError:
             # Socket already closed
             pass
 
+    finally:
+        receiver.cancel()
+        if kitchen is not None:
+            graph.coordinator.release(kitchen, client_id)
+        if lease is not None:
+            await lease.release()
+
+
+async def _load_session(client_id: str, graph: AgentGraph) -> dict[str, Any] | None:
+    """Resume a client's session: from its latest graph checkpoint when
+    checkpointing is on, otherwise from the session store."""
+    if graph.checkpointed_app is None:
+        return await session_store.load(client_id)
+    try:
+        snapshot = await graph.checkpointed_app.aget_state(_thread_config(client_id))
+    except Exception as e:
+        logger.warning("⚠️ Could not restore checkpoint for %s, starting fresh: %s", client_id, e)
+        return None
+    if not snapshot.values:
+        return None
+    fresh = new_session_state()
+    return {key: snapshot.values.get(key, default) for key, default in fresh.items()}
+
+
+def _thread_config(thread_id: str) -> dict[str, Any]:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def _receive_frames(
+    websocket: WebSocket,
+    mailbox: LatestFrameMailbox,
+    codec: JsonCodec | MsgpackCodec,
+    client_id: str,
+) -> None:
+    """Drain the socket into the mailbox until the client goes away.
+
+    Delta frames are materialized here, not in the planning loop: every
+    delta must be applied in order even when the mailbox later drops
+    the resulting frame in favour of a newer one.
+    """
+    materializer = PerceptionMaterializer()
+    while True:
+        frame = await codec.receive(websocket)
+        try:
+            frame = materializer.apply(frame)
+        except PaprikaError as e:
+            await _send_error(client_id, e, websocket)
+            continue
+        mailbox.put(frame)
+
+
+async def _send_error(client_id: str, error: PaprikaError, websocket: WebSocket) -> None:
+    err_type = type(error).__name__
+    client_msg = _CLIENT_ERROR_MESSAGES.get(type(error), "Internal agent error")
+    logger.warning("⚠️ %s for client %s: %s", err_type, client_id, error)
+    await manager.send_personal_message(
+        {"error": client_msg, "type": err_type, **error.client_details}, client_id, websocket
+    )
+
 
 async def _process_frame(
-    data: dict,
+    data: dict | Perception,
     session_state: dict[str, Any],
     client_id: str,
+    graph: AgentGraph,
+    on_step: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
+    thread_id: str | None = None,
+    kitchen_id: str | None = None,
+    admit: bool = True,
 ) -> dict[str, Any]:
     """Run one perception → plan cycle.
 
+    `data` is a raw payload, or an already-validated `Perception` when it
+    was materialized from delta frames. When `on_step` is given the graph
+    is streamed and each `plan_step` event is handed to it as soon as the
+    action agent emits it.
+
+    With `thread_id` and a graph checkpointer configured, the graph runs
+    on that thread and restores everything but the perception from its
+    last checkpoint; `session_state` is still updated from the result.
+    With `kitchen_id` the curriculum takes its task from that kitchen's
+    coordinator. `admit=False` skips admission control, for callers that
+    were admitted as a whole (a batch).
+
     Raises a `PaprikaError` subclass on any recoverable failure so the
     WebSocket loop can translate it into a structured client response
     without having to know which line blew up.
+
+    Stage latencies are always logged and exported as metrics; with
+    `settings.debug` they are also returned as `timings`.
     """
-    try:
-        perception = Perception(**data)
-    except ValidationError as e:
-        raise InvalidPerceptionError(str(e)) from e
+    with collect_timings() as timings:
+        try:
+            with stage("total"):
+                response = await _run_cycle(
+                    data, session_state, client_id, graph, on_step, thread_id, kitchen_id, admit
+                )
+        finally:
+            logger.info("⏱️ Timings %s | %s", client_id, timings.as_dict())
+
+    if settings.debug:
+        response["timings"] = timings.as_dict()
+    return response
+
+
+async def _run_cycle(
+    data: dict | Perception,
+    session_state: dict[str, Any],
+    client_id: str,
+    graph: AgentGraph,
+    on_step: Callable[[dict[str, Any]], Awaitable[None]] | None,
+    thread_id: str | None = None,
+    kitchen_id: str | None = None,
+    admit: bool = True,
+) -> dict[str, Any]:
+    if isinstance(data, Perception):
+        perception = data
+    else:
+        try:
+            with stage("validate"):
+                perception = Perception.model_validate(data)
+        except ValidationError as e:
+            raise InvalidPerceptionError(str(e)) from e
 
     logger.info(
         "👁️ Agent %s | Time %d:00 | Loc: %s",
@@ -139,11 +410,12 @@ async def _process_frame(
     logger.debug("raw perception payload: %s", data)
 
     try:
-        context = build_perception_context(
-            perception=perception,
-            retry_count=session_state["retry_count"],
-            current_task=session_state["task"],
-        )
+        with stage("context"):
+            context = build_perception_context(
+                perception=perception,
+                retry_count=session_state["retry_count"],
+                current_task=session_state["task"],
+            )
     except Exception as e:
         raise ContextBuildError(str(e)) from e
     logger.debug("perception context:\n%s", context)
@@ -158,23 +430,70 @@ async def _process_frame(
         "plan": session_state["plan"],
         "critique": None,
         "retry_count": session_state["retry_count"],
+        "stack_baseline": session_state.get("stack_baseline"),
+        "plan_fingerprint": session_state.get("plan_fingerprint"),
+        "history": session_state["history"],
     }
 
-    try:
-        final_state = await graph_app.ainvoke(initial_state)
-    except Exception as e:
-        raise AgentExecutionError(str(e)) from e
-
-    session_state["task"] = final_state.get("task", "Decide Next Task")
+    app, config = graph.app, {}
+    if thread_id is not None and graph.checkpointed_app is not None:
+        app, config = graph.checkpointed_app, _thread_config(thread_id)
+        if session_state["task"] != DEFAULT_TASK:
+            # The thread's checkpoint already holds task, plan, retry_count...
+            initial_state = {"perception": perception, "context": context, "critique": None}
+    if kitchen_id is not None:
+        graph.coordinator.touch(kitchen_id, client_id)
+        configurable = {**config.get("configurable", {}), "kitchen_id": kitchen_id, "client_id": client_id}
+        config = {**config, "configurable": configurable}
+
+    async with admission.admit(client_id) if admit else nullcontext():
+        try:
+            with stage("graph"):
+                if on_step is not None:
+                    final_state = await _stream_graph(app, initial_state, config, on_step)
+                elif config:
+                    final_state = await app.ainvoke(initial_state, config)
+                else:
+                    final_state = await app.ainvoke(initial_state)
+        except Exception as e:
+            raise AgentExecutionError(str(e)) from e
+
+    session_state["task"] = final_state.get("task", DEFAULT_TASK)
     session_state["plan"] = final_state.get("plan", [])
     session_state["retry_count"] = final_state.get("retry_count", 0)
     session_state["skill_guide"] = final_state.get("skill_guide", "")
+    session_state["stack_baseline"] = final_state.get("stack_baseline")
+    session_state["plan_fingerprint"] = final_state.get("plan_fingerprint")
+    session_state["history"] = final_state.get("history") or session_state["history"]
 
-    return {
+    response = {
         "client_id": client_id,
         "task": session_state["task"],
         "plan": _serialize_plan(session_state["plan"]),
     }
+    if on_step is not None:
+        response["type"] = "plan_complete"
+    return response
+
+
+async def _stream_graph(
+    app: Any,
+    initial_state: dict[str, Any],
+    config: dict[str, Any],
+    on_step: Callable[[dict[str, Any]], Awaitable[None]],
+) -> dict[str, Any]:
+    final_state: dict[str, Any] = initial_state
+    configurable = {**config.get("configurable", {}), "stream_plan": True}
+    async for mode, chunk in app.astream(
+        initial_state,
+        config={**config, "configurable": configurable},
+        stream_mode=["custom", "values"],
+    ):
+        if mode == "custom":
+            await on_step(chunk)
+        else:
+            final_state = chunk
+    return final_state
 
 
 def _serialize_plan(plan_items: list[Any]) -> list[dict[str, Any]]:
@@ -146,6 +146,34 @@ class AgentAction(BaseModel):
         default_factory=dict
     )  # e.g., {"target_id": "Stove_01"} or {"text": "Hi!"}
 
+class ActionPlan(BaseModel):
+    """Structured-output wrapper for the action agent: providers need an
+    object at the root of the schema, not a bare array."""
+    actions: list[AgentAction] = Field(description="The steps to execute, in order.")
+
+# --- Batch planning (offline eval) ------------------------------------
+
+class BatchSessionState(BaseModel):
+    """Session state to replay a frame against (see api/sessions.py)."""
+    task: str = "Decide Next Task"
+    plan: list[AgentAction] = Field(default_factory=list)
+    retry_count: int = 0
+    skill_guide: str = ""
+    stack_baseline: int | None = None
+    plan_fingerprint: str | None = None
+    # Recent curriculum outcomes as [task, result] pairs, oldest first.
+    history: list[tuple[str, str]] = Field(default_factory=list)
+
+class BatchFrame(BaseModel):
+    # Perception stays a raw dict so one bad frame is reported on its own
+    # NDJSON line instead of failing the whole request with a 422.
+    id: str | None = None
+    perception: dict[str, Any]
+    session_state: BatchSessionState = Field(default_factory=BatchSessionState)
+
+class BatchPlanRequest(BaseModel):
+    frames: list[BatchFrame]
+
 class CriticOutput(BaseModel):
     success: bool = Field(description="Did the agent complete the ULTIMATE GOAL? (True/False)")
     reasoning: str = Field(description="Explanation of why it succeeded or failed.")
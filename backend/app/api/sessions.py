@@ -0,0 +1,196 @@
+"""Per-client session state that outlives a single WebSocket connection.
+
+A session is the Voyager retry loop for one `client_id`: the current
+task, the last plan sent to Unity, the retry counter and the retrieved
+skill guide. Keeping it in a store keyed by `client_id` (instead of a
+local dict inside the WebSocket coroutine) means a reconnect resumes
+the loop instead of paying for a cold curriculum call, and any uvicorn
+worker can pick the session up.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.api.schemas import AgentAction
+from app.context.history import TaskHistory
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASK = "Decide Next Task"
+
+
+def new_session_state() -> dict[str, Any]:
+    """Fresh session: no task yet, so the graph entry routes to curriculum."""
+    return {
+        "task": DEFAULT_TASK,
+        "plan": [],
+        "retry_count": 0,
+        "skill_guide": "",
+        "stack_baseline": None,
+        "plan_fingerprint": None,
+        "history": TaskHistory(),
+    }
+
+
+# --- Serialization -----------------------------------------------------
+#
+# Sessions are written after every frame, so the encoding is kept small:
+# single-letter keys, no whitespace, and each AgentAction packed as a
+# positional [function, args, thought_trace] triple.
+
+def encode_session(state: dict[str, Any]) -> str:
+    plan = []
+    for item in state.get("plan") or []:
+        if isinstance(item, AgentAction):
+            plan.append([item.function, item.args, item.thought_trace])
+        elif isinstance(item, dict):
+            plan.append([item.get("function"), item.get("args", {}), item.get("thought_trace")])
+    return json.dumps(
+        {
+            "t": state.get("task", DEFAULT_TASK),
+            "p": plan,
+            "r": state.get("retry_count", 0),
+            "s": state.get("skill_guide", ""),
+            "b": state.get("stack_baseline"),
+            "f": state.get("plan_fingerprint"),
+            "h": state["history"].to_list() if state.get("history") else [],
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def decode_session(raw: str | bytes) -> dict[str, Any]:
+    data = json.loads(raw)
+    return {
+        "task": data.get("t", DEFAULT_TASK),
+        "plan": [
+            AgentAction(function=fn, args=args or {}, thought_trace=thought)
+            for fn, args, thought in data.get("p", [])
+        ],
+        "retry_count": data.get("r", 0),
+        "skill_guide": data.get("s", ""),
+        "stack_baseline": data.get("b"),
+        "plan_fingerprint": data.get("f"),
+        "history": TaskHistory.from_list(data.get("h")),
+    }
+
+
+# --- Stores ------------------------------------------------------------
+
+class BaseSessionStore(ABC):
+    @abstractmethod
+    async def load(self, client_id: str) -> dict[str, Any] | None:
+        """Return the stored session, or None if there is none."""
+        pass
+
+    @abstractmethod
+    async def save(self, client_id: str, state: dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, client_id: str) -> None:
+        pass
+
+
+class InMemorySessionStore(BaseSessionStore):
+    """Process-local store. Single worker only; used in tests and dev."""
+
+    def __init__(self):
+        self._sessions: dict[str, str] = {}
+
+    async def load(self, client_id: str) -> dict[str, Any] | None:
+        raw = self._sessions.get(client_id)
+        return decode_session(raw) if raw is not None else None
+
+    async def save(self, client_id: str, state: dict[str, Any]) -> None:
+        self._sessions[client_id] = encode_session(state)
+
+    async def delete(self, client_id: str) -> None:
+        self._sessions.pop(client_id, None)
+
+
+class RedisSessionStore(BaseSessionStore):
+    """Redis-backed store with a write-through in-process cache.
+
+    Redis is authoritative, so `load` always reads it — another worker
+    may have advanced the session since we last saw it. The local cache
+    serves two purposes:
+      - `save` skips the SET (and only refreshes the TTL) when the
+        encoded session is unchanged, which is the common case while
+        Unity executes a plan;
+      - if Redis is unreachable we keep serving the last known state
+        instead of failing the frame.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        ttl_seconds: int = 3600,
+        key_prefix: str = "paprika:session:",
+        cache_size: int = 1024,
+    ):
+        self._redis = redis_client
+        self._ttl = ttl_seconds
+        self._prefix = key_prefix
+        self._cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+
+    def _key(self, client_id: str) -> str:
+        return f"{self._prefix}{client_id}"
+
+    def _remember(self, client_id: str, raw: str) -> None:
+        self._cache[client_id] = raw
+        self._cache.move_to_end(client_id)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def load(self, client_id: str) -> dict[str, Any] | None:
+        try:
+            raw = await self._redis.get(self._key(client_id))
+        except RedisError as e:
+            logger.warning("Session load from Redis failed for %s: %s", client_id, e)
+            raw = self._cache.get(client_id)
+            return decode_session(raw) if raw is not None else None
+
+        if raw is None:
+            self._cache.pop(client_id, None)
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        self._remember(client_id, raw)
+        return decode_session(raw)
+
+    async def save(self, client_id: str, state: dict[str, Any]) -> None:
+        raw = encode_session(state)
+        unchanged = self._cache.get(client_id) == raw
+        self._remember(client_id, raw)
+        try:
+            if unchanged:
+                await self._redis.expire(self._key(client_id), self._ttl)
+            else:
+                await self._redis.set(self._key(client_id), raw, ex=self._ttl)
+        except RedisError as e:
+            logger.warning("Session save to Redis failed for %s: %s", client_id, e)
+
+    async def delete(self, client_id: str) -> None:
+        self._cache.pop(client_id, None)
+        try:
+            await self._redis.delete(self._key(client_id))
+        except RedisError as e:
+            logger.warning("Session delete in Redis failed for %s: %s", client_id, e)
+
+
+def build_session_store(settings: Settings, redis_client) -> BaseSessionStore:
+    if settings.SESSION_BACKEND == "redis":
+        return RedisSessionStore(redis_client, ttl_seconds=settings.SESSION_TTL_SECONDS)
+    if settings.SESSION_BACKEND == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Unknown session backend: {settings.SESSION_BACKEND}")
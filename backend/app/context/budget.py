@@ -0,0 +1,218 @@
+"""Per-agent prompt token budgets.
+
+A user message is the perception block plus whatever the agent layers on
+top (skill guide, the previous failed plan, RAG memories), sent after a
+system prompt of several thousand tokens. Nothing used to bound it.
+
+Each agent now builds its user message as a list of `PromptSection`s and
+`TokenBudget.fit` joins them. While system prompt + sections exceed the
+agent's limit, it applies the sections' trims in priority order — lowest
+first, across all sections (`SECTION_TRIMS`): the [D] history window is
+capped and out-of-reach [C] lines dropped long before [B] affordances
+are touched. Every trim is logged and counted
+(`budget.trims.<agent>.<section>`); a prompt still over the limit after
+all trims is sent as is and counted under `budget.over_limit.<agent>`.
+
+Tokens are counted with the model's tiktoken encoding, cached per
+section text (most sections repeat frame to frame). Without tiktoken or
+its BPE files (offline hosts) counts fall back to ~4 chars per token.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Reducer = Callable[[str], str]
+# (priority, what the trim does — for the log, reducer)
+Trim = tuple[int, str, Reducer]
+
+FALLBACK_ENCODING = "o200k_base"
+
+
+# ---- reducers ----------------------------------------------------------
+# Items are "- " lines (affordances, history steps, memories); every
+# other line (headers, prose) is kept.
+
+def _is_item(line: str) -> bool:
+    return line.startswith("- ")
+
+
+def keep_first_items(n: int) -> Reducer:
+    def reduce(text: str) -> str:
+        kept, lines = 0, []
+        for line in text.split("\n"):
+            if _is_item(line):
+                kept += 1
+                if kept > n:
+                    continue
+            lines.append(line)
+        return "\n".join(lines)
+    return reduce
+
+
+def keep_last_items(n: int) -> Reducer:
+    def reduce(text: str) -> str:
+        lines = text.split("\n")
+        total = sum(1 for line in lines if _is_item(line))
+        skip = total - n
+        out = []
+        for line in lines:
+            if _is_item(line) and skip > 0:
+                skip -= 1
+                continue
+            out.append(line)
+        return "\n".join(out)
+    return reduce
+
+
+def drop_lines(*markers: str) -> Reducer:
+    def reduce(text: str) -> str:
+        return "\n".join(
+            line for line in text.split("\n") if not any(m in line for m in markers)
+        )
+    return reduce
+
+
+def drop(_: str) -> str:
+    return ""
+
+
+# Trims per section name. Priorities are global: a lower number is
+# applied first whichever section it belongs to.
+SECTION_TRIMS: dict[str, list[Trim]] = {
+    "[D]": [
+        (10, "cap [D] history at 2 actions", keep_last_items(2)),
+        (40, "cap [D] history at 1 action", keep_last_items(1)),
+    ],
+    # [B] lists reachable objects only; what [C] reports beyond reach is
+    # the Unity aggregate (no prep table in sight) and the catch-all lines.
+    "[C]": [
+        (20, "drop out-of-reach [C] lines", drop_lines(
+            "Unity aggregate", "Other items on prep tables", "Stray raw items",
+        )),
+    ],
+    "memories": [(15, "keep 2 long-term memories", keep_first_items(2))],
+    "task_history": [(25, "keep the last 3 task outcomes", keep_last_items(3))],
+    "previous_failure": [(30, "drop the failed plan, keep the critique", drop_lines("Plan: "))],
+    "skill_guide": [(50, "drop the skill guide", drop)],
+    "[B]": [
+        (60, "cap [B] affordances at 4", keep_first_items(4)),
+        (70, "cap [B] affordances at 2", keep_first_items(2)),
+    ],
+}
+
+
+@dataclass
+class PromptSection:
+    name: str
+    text: str
+    trims: list[Trim] = field(default_factory=list)
+
+    @classmethod
+    def of(cls, name: str, text: str) -> PromptSection:
+        """A section with the default trims for `name` (none if unlisted)."""
+        return cls(name, text, SECTION_TRIMS.get(name, []))
+
+
+_PERCEPTION_HEADER = re.compile(r"(?m)^(?=### \[)")
+_PERCEPTION_TAG = re.compile(r"### (\[\w+\])")
+
+
+def perception_sections(context: str) -> list[PromptSection]:
+    """Split a perception block (`PerceptionRenderer.build_perception_context`)
+    into its "### [X]" sections, named "[A]", "[B]", ...; joined back they
+    are byte-identical to `context`."""
+    sections = []
+    for part in _PERCEPTION_HEADER.split(context):
+        if not part:
+            continue
+        tag = _PERCEPTION_TAG.match(part)
+        sections.append(PromptSection.of(tag.group(1) if tag else "perception", part))
+    return sections
+
+
+class TokenCounter:
+    def __init__(self, model: str | None = None):
+        self.encoding = _load_encoding(model) if model else None
+        self.count = lru_cache(maxsize=4096)(self._count)
+
+    def _count(self, text: str) -> int:
+        if self.encoding is None:
+            return len(text) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+def _load_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed; estimating tokens as chars/4")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        # The BPE file is downloaded on first use.
+        logger.warning("tiktoken encoding for %s unavailable (%s); estimating tokens as chars/4", model, e)
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_counter(model: str | None) -> TokenCounter:
+    """One counter (and count cache) per model, shared by all agents."""
+    return TokenCounter(model)
+
+
+class TokenBudget:
+    def __init__(self, limit: int, counter: TokenCounter, name: str = "agent"):
+        self.limit = limit
+        self.counter = counter
+        self.name = name
+
+    def fit(self, system_prompt: str, sections: list[PromptSection]) -> str:
+        """Join `sections` into the user message, trimmed so that together
+        with `system_prompt` it fits the limit where the trims allow."""
+        count = self.counter.count
+        texts = [s.text for s in sections]
+        total = count(system_prompt) + sum(count(t) for t in texts)
+
+        if total > self.limit:
+            steps = sorted(
+                ((priority, i, label, reduce)
+                 for i, s in enumerate(sections)
+                 for priority, label, reduce in s.trims),
+                key=lambda step: step[0],
+            )
+            for _, i, label, reduce in steps:
+                if total <= self.limit:
+                    break
+                trimmed = reduce(texts[i])
+                if trimmed == texts[i]:
+                    continue
+                saved = count(texts[i]) - count(trimmed)
+                logger.info(
+                    "✂️ %s prompt %d tokens > budget %d: %s (-%d)",
+                    self.name, total, self.limit, label, saved,
+                )
+                metrics.counter(f"budget.trims.{self.name}.{sections[i].name}").inc()
+                texts[i] = trimmed
+                total -= saved
+
+            if total > self.limit:
+                logger.warning(
+                    "%s prompt still %d tokens > budget %d after all trims",
+                    self.name, total, self.limit,
+                )
+                metrics.counter(f"budget.over_limit.{self.name}").inc()
+
+        metrics.histogram(f"budget.prompt_tokens.{self.name}").observe(total)
+        return "".join(texts)
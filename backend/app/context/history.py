@@ -0,0 +1,52 @@
+"""Per-session curriculum history: the recent task outcomes a client's
+curriculum prompt shows under "RECENT ACTION HISTORY".
+
+One `TaskHistory` per session, carried in graph state and in the
+session store, so outcomes from one game window never reach another's
+prompt. `add` returns a new history (nodes don't mutate their input
+state); copying a deque of at most `maxlen` records is cheap.
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, NamedTuple
+
+DEFAULT_HISTORY_SIZE = 10
+
+
+class TaskRecord(NamedTuple):
+    task: str
+    result: str  # "Success" | "Failed"
+
+
+@dataclass
+class TaskHistory:
+    records: deque[TaskRecord] = field(default_factory=deque)
+    maxlen: int = DEFAULT_HISTORY_SIZE
+
+    def __post_init__(self):
+        # Re-bound after deserialization, which restores a plain deque / list.
+        self.records = deque((TaskRecord(*r) for r in self.records), maxlen=self.maxlen)
+
+    def add(self, task: str, result: str) -> TaskHistory:
+        """A copy of this history with the outcome recorded."""
+        history = TaskHistory(self.records, self.maxlen)
+        history.records.append(TaskRecord(task, result))
+        return history
+
+    def recent(self, n: int) -> list[TaskRecord]:
+        return list(self.records)[-n:]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    # Compact form for the session store: [[task, result], ...]
+    def to_list(self) -> list[list[str]]:
+        return [list(r) for r in self.records]
+
+    @classmethod
+    def from_list(
+        cls, items: Iterable[Iterable[str]] | None, maxlen: int = DEFAULT_HISTORY_SIZE
+    ) -> TaskHistory:
+        return cls(deque(TaskRecord(*item) for item in items or ()), maxlen)
@@ -40,10 +40,27 @@ from app.api.schemas import Perception
 RAW_INGREDIENTS: frozenset[str] = frozenset({
     "MEATBALL", "TOMATO", "ONION", "LETTUCE", "CHEESE", "BREAD",
 })
-PROCESSED_INGREDIENTS: frozenset[str] = frozenset({
-    "CookedMeat",
-    "TomatoSlice", "OnionSlice", "LettuceSlice", "CheeseSlice", "BreadSlice",
-})
+# Raw ingredient → the processed layer it becomes, and the box it is
+# picked from.
+PROCESSED_FOR: dict[str, str] = {
+    "MEATBALL": "CookedMeat",
+    "TOMATO":   "TomatoSlice",
+    "ONION":    "OnionSlice",
+    "LETTUCE":  "LettuceSlice",
+    "CHEESE":   "CheeseSlice",
+    "BREAD":    "BreadSlice",
+}
+BOX_FOR: dict[str, str] = {
+    "MEATBALL": "MeatBox",
+    "TOMATO":   "TomatoBox",
+    "ONION":    "OnionBox",
+    "LETTUCE":  "LettuceBox",
+    "CHEESE":   "CheeseBox",
+    "BREAD":    "BreadBox",
+}
+# Processed layer → the raw ingredient it is made from.
+RAW_FOR: dict[str, str] = {processed: raw for raw, processed in PROCESSED_FOR.items()}
+PROCESSED_INGREDIENTS: frozenset[str] = frozenset(PROCESSED_FOR.values())
 PROCESSING_RULES: dict[str, tuple[str, str]] = {
     "MEATBALL": ("Oven",     "cook"),
     "TOMATO":   ("CutBoard", "chop"),
@@ -52,9 +69,7 @@ PROCESSING_RULES: dict[str, tuple[str, str]] = {
     "CHEESE":   ("CutBoard", "chop"),
     "BREAD":    ("CutBoard", "chop"),
 }
-CONTAINER_BOXES: frozenset[str] = frozenset({
-    "MeatBox", "TomatoBox", "OnionBox", "LettuceBox", "CheeseBox", "BreadBox",
-})
+CONTAINER_BOXES: frozenset[str] = frozenset(BOX_FOR.values())
 STATIONS: frozenset[str] = frozenset({"Oven", "CutBoard", "PlateBoard", "Trash"})
 
 # Canonical preparation-table IDs. Naming differs between the two types
@@ -519,15 +534,7 @@ class PerceptionRenderer:
         """True if a processed form of `raw_name` already exists in table_items."""
         if not raw_name:
             return False
-        raw_to_processed = {
-            "MEATBALL": "COOKEDMEAT",
-            "TOMATO":   "TOMATOSLICE",
-            "ONION":    "ONIONSLICE",
-            "LETTUCE":  "LETTUCESLICE",
-            "CHEESE":   "CHEESESLICE",
-            "BREAD":    "BREADSLICE",
-        }
-        target = raw_to_processed.get(raw_name, "").upper()
+        target = PROCESSED_FOR.get(raw_name, "").upper()
         return any(target in str(t).upper() for t in table_items)
 
     # ---- [C] KITCHEN STATE (supply check, raw vs processed) -------------
@@ -717,9 +724,11 @@ class PerceptionRenderer:
 
     # ---- [LAYOUT] CANONICAL OBJECT IDs ----------------------------------
     #
-    # Static per-game reference. Kept in the perception block (not the
-    # system prompt) so every agent sees the exact strings Unity expects,
-    # even when the target isn't currently in sight.
+    # Static per-game reference, so every agent sees the exact strings
+    # Unity expects even when the target isn't currently in sight. It is
+    # appended to the system prompt (see `kitchen_layout_section`), not
+    # the per-frame perception block, to keep the prompt prefix
+    # byte-stable for provider prompt caching.
 
     @staticmethod
     def render_kitchen_layout() -> str:
@@ -763,10 +772,9 @@ class PerceptionRenderer:
         retry_count: int = 0,
         current_task: str = "",
     ) -> str:
-        """Produce the single markdown block injected into all three active agents."""
+        """Produce the single markdown block injected into all three active
+        agents. Only per-frame sections; [LAYOUT] lives in their system prompt."""
         return (
-            "### [LAYOUT] CANONICAL OBJECT IDs\n"
-            f"{self.render_kitchen_layout()}\n\n"
             "### [A] SELF STATE\n"
             f"{self.render_self_state()}\n\n"
             "### [B] IMMEDIATE AFFORDANCES (what you can do right now)\n"
@@ -840,4 +848,10 @@ def build_perception_context(
     return PerceptionRenderer(perception).build_perception_context(
         retry_count=retry_count,
         current_task=current_task,
-    )
\ No newline at end of file
+    )
+
+
+def kitchen_layout_section() -> str:
+    """The static [LAYOUT] block that perception-reading agents append to
+    their system prompt."""
+    return f"### [LAYOUT] CANONICAL OBJECT IDs\n{PerceptionRenderer.render_kitchen_layout()}"
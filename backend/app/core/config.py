@@ -12,6 +12,103 @@ class LoggingSettings(BaseModel):
 
 class Settings(BaseSettings):
     REDIS_URL: str ="redis://redis:6379/0"
+
+    # Session state (task / plan / retry loop) per client_id.
+    # "redis" survives reconnects and works across workers; "memory" is
+    # process-local (tests, single-worker dev).
+    SESSION_BACKEND: str = "redis"
+    SESSION_TTL_SECONDS: int = 3600
+
+    # LangGraph checkpointer for WebSocket sessions, keyed by client_id.
+    # "postgres" persists graph state in DATABASE_URL (the session store
+    # is then bypassed), "memory" keeps it per process, "none" rebuilds
+    # state from the session store on every frame.
+    GRAPH_CHECKPOINTER: str = "postgres"
+    # Retention: newest checkpoints kept per thread, and idle threads
+    # are dropped after this many days.
+    CHECKPOINT_KEEP_LAST: int = 20
+    CHECKPOINT_TTL_DAYS: float = 7.0
+
+    # Background skill distillation (learning_node only enqueues).
+    # "redis" is durable and at-least-once; "memory" loses queued jobs
+    # on restart.
+    JOB_QUEUE_BACKEND: str = "redis"
+    SKILL_JOB_WORKERS: int = 2
+    SKILL_JOB_MAX_ATTEMPTS: int = 5
+    # First retry delay; doubles on every further attempt.
+    SKILL_JOB_BACKOFF_S: float = 2.0
+
+    # Outbound WebSocket queue per connection. When a slow client fills
+    # it: "drop_oldest" discards the oldest queued message, "disconnect"
+    # closes the socket (1013).
+    WS_SEND_QUEUE_SIZE: int = 32
+    WS_SEND_QUEUE_POLICY: str = "drop_oldest"
+
+    # Max planning cycles run concurrently by POST /api/agent/batch.
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # Admission control for graph runs. Each run is 4-5 LLM calls, so
+    # the global cap is what keeps us under provider rate limits.
+    ADMISSION_MAX_IN_FLIGHT: int = 16
+    ADMISSION_QUEUE_TIMEOUT_S: float = 5.0
+    # Token bucket per client_id: sustained rate and burst size.
+    CLIENT_PLANS_PER_SECOND: float = 1.0
+    CLIENT_PLAN_BURST: int = 3
+
+    # Start the curriculum proposal in parallel with the critic; the
+    # result is discarded when the critic routes back to action.
+    SPECULATIVE_CURRICULUM: bool = False
+
+    # Build PLATE_SETUP / PREP / STACK plans from templates instead of
+    # the action LLM on a task's first attempt (app/agents/planner.py).
+    SYMBOLIC_PLANNER: bool = True
+
+    # Critic-confirmed plans keyed on task + perception fingerprint
+    # (app/agents/plan_cache.py): "redis" | "memory" | "none".
+    PLAN_CACHE_BACKEND: str = "redis"
+    PLAN_CACHE_TTL_S: int = 7 * 24 * 3600
+    # Entry cap of the in-memory cache (and of the Redis fallback).
+    PLAN_CACHE_MAX_ENTRIES: int = 1024
+
+    # Sessions that share a kitchen (`?kitchen=` on the WebSocket) get
+    # non-conflicting sub-tasks from app/agents/coordinator.py. A claim
+    # is dropped this long after its client's last frame.
+    KITCHEN_CLAIM_TTL_S: float = 120.0
+
+    # Multi-worker deployments: relay broadcasts over Redis pub/sub and
+    # hold a Redis lease per client_id so only one worker plans for a
+    # session. Off for single-worker runs.
+    CLUSTER_MODE: bool = False
+    SESSION_LEASE_TTL_MS: int = 15000
+    # How long a connecting client waits for the previous owner's lease.
+    SESSION_LEASE_WAIT_S: float = 5.0
+
+    # Per-node LLM deadlines in seconds (0 = unbounded). Past it the node
+    # degrades: retry on FALLBACK_LLM_MODEL, then reuse the last plan
+    # (action) or report "not verified" (critic).
+    ACTION_DEADLINE_S: float = 20.0
+    CRITIC_DEADLINE_S: float = 15.0
+    # Cheaper model of the same provider for degraded calls; empty = none.
+    FALLBACK_LLM_MODEL: str = ""
+    FALLBACK_DEADLINE_S: float = 10.0
+
+    # Hedged LLM requests (app/llm/hedging.py): send a duplicate when the
+    # first is slower than this quantile of the agent's recent latencies.
+    LLM_HEDGING: bool = False
+    LLM_HEDGE_QUANTILE: float = 0.9
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+
+    # Agents that ask the provider for schema-bound output (JSON schema /
+    # function calling) instead of parsing free text; the text path stays
+    # as their fallback. Roles: curriculum, skill, action, critic.
+    STRUCTURED_OUTPUT_AGENTS: list[str] = ["curriculum", "skill", "action", "critic"]
+
+    # Per-agent cap on prompt tokens (system + user message). Over it,
+    # user-message sections are trimmed in priority order (see
+    # app/context/budget.py). A role missing here, or 0, is unbounded.
+    PROMPT_TOKEN_BUDGETS: dict[str, int] = {
+        "curriculum": 6000, "skill": 4000, "action": 8000, "critic": 5000,
+    }
     
     LLM_PROVIDER: str = "openai"
     LLM_MODEL: str = "gpt-4.1-mini"
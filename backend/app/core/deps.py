@@ -1,9 +1,15 @@
 from functools import lru_cache
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import TYPE_CHECKING
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
 from app.llm.base import BaseLLMClient, llm_registry
 
+if TYPE_CHECKING:
+    from app.agents.graph import AgentGraph
+
 
 @lru_cache
 def get_llm(
@@ -25,16 +31,37 @@ def get_default_llm() -> BaseLLMClient:
     return get_llm()
 
 
-_async_engine = create_async_engine(
-    settings.DATABASE_URL, 
-    echo=False,
-)
+@lru_cache
+def get_redis() -> redis.Redis:
+    """Shared async Redis client (sessions, leases, job queue)."""
+    return redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """Async SQLAlchemy engine, created on first use (no connection yet)."""
+    return create_async_engine(
+        settings.DATABASE_URL, 
+        echo=False,
+    )
+
+
+@lru_cache
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        get_engine(),
+        class_=AsyncSession, 
+        expire_on_commit=False
+    )
+
+
+def get_graph() -> "AgentGraph":
+    """FastAPI dependency: the agent graph for the app settings.
 
-_AsyncSessionLocal = async_sessionmaker(
-    _async_engine,
-    class_=AsyncSession, 
-    expire_on_commit=False
-)
+    Built on first use (normally by the lifespan at startup) and cached
+    by `build_graph`.
+    """
+    # Imported here: app.agents.graph depends on this module.
+    from app.agents.graph import build_graph
 
-def get_session_factory():
-    return _AsyncSessionLocal
\ No newline at end of file
+    return build_graph(settings)
@@ -10,6 +10,10 @@ from __future__ import annotations
 class PaprikaError(Exception):
     """Base class for all application errors."""
 
+    # Extra fields merged into the structured error payload sent to Unity
+    # (e.g. the sequence number to resync from). Set per instance.
+    client_details: dict = {}
+
 
 class InvalidPerceptionError(PaprikaError):
     """Incoming perception payload failed schema validation."""
@@ -21,3 +25,20 @@ class ContextBuildError(PaprikaError):
 
 class AgentExecutionError(PaprikaError):
     """LangGraph agent invocation raised an error."""
+
+
+class PerceptionResyncRequired(PaprikaError):
+    """A delta perception frame cannot be applied; Unity must send a full frame."""
+
+    def __init__(self, message: str, expected_seq: int | None):
+        super().__init__(message)
+        self.client_details = {"expected_seq": expected_seq}
+
+
+class AgentBusyError(PaprikaError):
+    """Planning capacity exhausted (global cap or per-client rate limit)."""
+
+    def __init__(self, message: str, retry_after_ms: int):
+        super().__init__(message)
+        self.retry_after_ms = retry_after_ms
+        self.client_details = {"retry_after_ms": retry_after_ms}
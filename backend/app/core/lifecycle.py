@@ -5,7 +5,9 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from alembic.config import Config
 from alembic import command
+from app.api import routes
 from app.core.config import settings
+from app.core.deps import get_graph
 from app.core.logger import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -28,7 +30,16 @@ def _run_migrations():
 async def lifespan(app: FastAPI):
     setup_logging(settings)
     await asyncio.to_thread(_run_migrations)
+    # Build the agent graph now rather than on the first request.
+    graph = get_graph()
+    # Drain skill jobs left over from a previous run right away.
+    await graph.skill_learner.start()
+    if routes.broadcaster is not None:
+        await routes.broadcaster.start()
     
     yield
     
-    logger.info("🛑 Shutting down Paprika Backend...")
\ No newline at end of file
+    logger.info("🛑 Shutting down Paprika Backend...")
+    if routes.broadcaster is not None:
+        await routes.broadcaster.stop()
+    await graph.skill_learner.stop()
\ No newline at end of file
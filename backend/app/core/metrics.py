@@ -0,0 +1,119 @@
+"""In-process metrics for the agent backend.
+
+Deliberately tiny: counters, gauges and latency summaries kept in memory
+and exposed as a JSON snapshot on `GET /api/metrics`. No Prometheus
+client dependency — the numbers we need (drop counts, queue depths,
+stage latencies) are cheap to keep here and easy to scrape later.
+
+Names are dotted strings (`ws.frames_dropped`, `llm.latency_ms.action`).
+Keep label cardinality low: never put a `client_id` in a metric name.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int | float = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Point-in-time value that can go up and down (e.g. queue depth)."""
+
+    def __init__(self):
+        self.value: float = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class Histogram:
+    """Count/sum/max plus a bounded window of recent samples for quantiles.
+
+    Quantiles are computed over the last `window` observations only, so
+    they track current behaviour rather than the whole process lifetime.
+    """
+
+    def __init__(self, window: int = 512):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self._recent.append(value)
+
+    def quantile(self, q: float) -> float | None:
+        """Nearest-rank quantile over the recent window, or None if empty."""
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        rank = max(0, math.ceil(q * len(ordered)) - 1)
+        return ordered[rank]
+
+    def summary(self) -> dict[str, float | int | None]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "max": round(self.max, 3),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, Counter] = {}
+        self._gauges: dict[str, Gauge] = {}
+        self._histograms: dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        with self._lock:
+            return self._counters.setdefault(name, Counter())
+
+    def gauge(self, name: str) -> Gauge:
+        with self._lock:
+            return self._gauges.setdefault(name, Gauge())
+
+    def histogram(self, name: str) -> Histogram:
+        with self._lock:
+            return self._histograms.setdefault(name, Histogram())
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                "counters": {k: c.value for k, c in sorted(self._counters.items())},
+                "gauges": {k: g.value for k, g in sorted(self._gauges.items())},
+                "histograms": {
+                    k: h.summary() for k, h in sorted(self._histograms.items())
+                },
+            }
+
+    def reset(self) -> None:
+        """Drop every metric. Tests only."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
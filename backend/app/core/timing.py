@@ -0,0 +1,62 @@
+"""Per-frame latency breakdown.
+
+`_process_frame` opens a `collect_timings()` scope; anything it calls —
+graph nodes, memory lookups — wraps its work in `stage(name)`. The
+collector lives in a ContextVar, so it follows the call into LangGraph
+node tasks without being threaded through state or signatures.
+
+Every stage is also observed as a `stage_ms.<name>` histogram, whether
+or not a collector is active.
+
+    with collect_timings() as timings:
+        with stage("context"):
+            ...
+    timings.as_dict()  # {"context": 1.2}
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from app.core.metrics import metrics
+
+
+class FrameTimings:
+    def __init__(self):
+        # Insertion order = order stages first ran. A stage that runs
+        # more than once in a frame (e.g. embedding) accumulates.
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def as_dict(self) -> dict[str, float]:
+        return {name: round(ms, 2) for name, ms in self.stages.items()}
+
+
+_current: ContextVar[FrameTimings | None] = ContextVar("frame_timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[FrameTimings]:
+    timings = FrameTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        metrics.histogram(f"stage_ms.{name}").observe(ms)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(name, ms)
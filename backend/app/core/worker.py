@@ -0,0 +1,8 @@
+"""Identity of this worker process, shared by the cluster coordination
+(app/api/cluster.py) and the skill job queue (app/agents/skill_jobs.py)."""
+import os
+import socket
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -1,6 +1,6 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Type, TypeVar
+from typing import AsyncIterator, Type, TypeVar
 from pydantic import BaseModel
 
 from app.core.config import Settings
@@ -17,6 +17,16 @@ class BaseLLMClient(ABC):
         """
         pass
 
+    async def stream_response(
+        self, system_prompt: str, user_message: str
+    ) -> AsyncIterator[str]:
+        """
+        Token stream of the same completion as generate_response.
+        Used for: Streaming plan steps to Unity before the reply is finished.
+        Default yields the whole reply at once; providers override it.
+        """
+        yield await self.generate_response(system_prompt, user_message)
+
     @abstractmethod
     async def generate_structured(
         self, system_prompt: str, user_message: str, response_model: Type[T]
@@ -0,0 +1,99 @@
+"""Hedged LLM requests.
+
+A single slow completion sets the latency of the whole frame. With
+hedging on, `build_graph` wraps each agent's client in a
+`HedgedLLMClient`: if a request has not returned by the recent p90
+latency for that agent (`llm.latency_ms.<name>`), an identical request
+is sent and whichever finishes first wins; the other is cancelled.
+
+Until `min_samples` latencies are recorded there is no p90 to trust and
+requests are not hedged. Streams are passed through unhedged — the
+caller is already consuming the first one.
+
+Metrics per agent: `llm.hedges_fired.<name>` and `llm.hedges_won.<name>`
+(the duplicate finished first).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.metrics import metrics
+from app.llm.base import BaseLLMClient
+
+T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
+
+
+class HedgedLLMClient(BaseLLMClient):
+    def __init__(
+        self,
+        inner: BaseLLMClient,
+        name: str,
+        quantile: float = 0.9,
+        min_samples: int = 20,
+    ):
+        self.inner = inner
+        self.name = name
+        self.quantile = quantile
+        self.min_samples = min_samples
+
+    @property
+    def latency(self):
+        return metrics.histogram(f"llm.latency_ms.{self.name}")
+
+    def hedge_delay_s(self) -> float | None:
+        """Seconds to wait before sending the duplicate, or None to not hedge."""
+        if self.latency.count < self.min_samples:
+            return None
+        return self.latency.quantile(self.quantile) / 1000
+
+    async def generate_response(self, system_prompt: str, user_message: str) -> str:
+        return await self._hedged(
+            lambda: self.inner.generate_response(system_prompt, user_message)
+        )
+
+    async def generate_structured(
+        self, system_prompt: str, user_message: str, response_model: Type[T]
+    ) -> T:
+        return await self._hedged(
+            lambda: self.inner.generate_structured(system_prompt, user_message, response_model)
+        )
+
+    async def stream_response(
+        self, system_prompt: str, user_message: str
+    ) -> AsyncIterator[str]:
+        async for chunk in self.inner.stream_response(system_prompt, user_message):
+            yield chunk
+
+    async def _hedged(self, call: Callable[[], Awaitable[R]]) -> R:
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        delay = self.hedge_delay_s()
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    pending.add(asyncio.ensure_future(call()))
+                    metrics.counter(f"llm.hedges_fired.{self.name}").inc()
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        # The other request may still succeed.
+                        error = task.exception()
+                        continue
+                    if task is not primary:
+                        metrics.counter(f"llm.hedges_won.{self.name}").inc()
+                    self.latency.observe((time.perf_counter() - started) * 1000)
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -1,9 +1,13 @@
-from typing import Type, TypeVar
+import time
+from typing import AsyncIterator, Type, TypeVar
+
+from langchain_core.callbacks import get_usage_metadata_callback
 from langchain_ollama import ChatOllama
 from pydantic import BaseModel
 
 from app.core.config import Settings
 from app.llm.base import BaseLLMClient, BaseLLMBuilder, llm_registry
+from app.llm.usage import record_usage, record_usages
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -23,16 +27,35 @@ class OllamaClient(BaseLLMClient):
 
     async def generate_response(self, system_prompt: str, user_message: str) -> str:
         messages = [("system", system_prompt), ("human", user_message)]
+        started = time.perf_counter()
         response = await self.llm.ainvoke(messages)
+        record_usage(response.usage_metadata, (time.perf_counter() - started) * 1000)
         return response.content
 
+    async def stream_response(
+        self, system_prompt: str, user_message: str
+    ) -> AsyncIterator[str]:
+        messages = [("system", system_prompt), ("human", user_message)]
+        started = time.perf_counter()
+        usage = None
+        async for chunk in self.llm.astream(messages):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            if chunk.content:
+                yield chunk.content
+        record_usage(usage, (time.perf_counter() - started) * 1000)
+
     async def generate_structured(
         self, system_prompt: str, user_message: str, response_model: Type[T]
     ) -> T:
         structured_llm = self.llm.with_structured_output(response_model)
 
         messages = [("system", system_prompt), ("human", user_message)]
-        return await structured_llm.ainvoke(messages)
+        started = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            result = await structured_llm.ainvoke(messages)
+        record_usages(usage.usage_metadata.values(), (time.perf_counter() - started) * 1000)
+        return result
 
 @llm_registry.register("ollama")    
 class OllamaBuilder(BaseLLMBuilder):
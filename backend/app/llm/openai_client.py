@@ -1,9 +1,13 @@
-from typing import Type, TypeVar
+import time
+from typing import AsyncIterator, Type, TypeVar
+
+from langchain_core.callbacks import get_usage_metadata_callback
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
 
 from app.core.config import Settings
 from app.llm.base import BaseLLMClient, BaseLLMBuilder, llm_registry
+from app.llm.usage import record_usage, record_usages
 
 # “T is a generic type that must be a subclass of BaseModel.”
 T = TypeVar("T", bound=BaseModel)
@@ -11,20 +15,40 @@ T = TypeVar("T", bound=BaseModel)
 
 class OpenAIClient(BaseLLMClient):
     def __init__(self, api_key: str, model: str = "gpt-4o"):
-        self.llm = ChatOpenAI(api_key=api_key, model=model, temperature=0.7)
+        # stream_usage: the last streamed chunk carries usage_metadata.
+        self.llm = ChatOpenAI(api_key=api_key, model=model, temperature=0.7, stream_usage=True)
 
     async def generate_response(self, system_prompt: str, user_message: str) -> str:
         message = [("system", system_prompt), ("human", user_message)]
+        started = time.perf_counter()
         response = await self.llm.ainvoke(message)
+        record_usage(response.usage_metadata, (time.perf_counter() - started) * 1000)
         return response.content
 
+    async def stream_response(
+        self, system_prompt: str, user_message: str
+    ) -> AsyncIterator[str]:
+        message = [("system", system_prompt), ("human", user_message)]
+        started = time.perf_counter()
+        usage = None
+        async for chunk in self.llm.astream(message):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            if chunk.content:
+                yield chunk.content
+        record_usage(usage, (time.perf_counter() - started) * 1000)
+
     async def generate_structured(
         self, system_prompt: str, user_message: str, response_model: Type[T]
     ) -> T:
         structured_llm = self.llm.with_structured_output(response_model)
 
         message = [("system", system_prompt), ("human", user_message)]
-        return await structured_llm.ainvoke(message)
+        started = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            result = await structured_llm.ainvoke(message)
+        record_usages(usage.usage_metadata.values(), (time.perf_counter() - started) * 1000)
+        return result
 
 @llm_registry.register("openai") 
 class OpenAIBuilder(BaseLLMBuilder):
@@ -36,5 +60,5 @@ class OpenAIBuilder(BaseLLMBuilder):
         
         return OpenAIClient(
             api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_MODEL
+            model=model or settings.OPENAI_MODEL
         )
\ No newline at end of file
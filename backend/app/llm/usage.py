@@ -0,0 +1,46 @@
+"""Token usage and provider prompt-cache hits.
+
+Agents send a byte-stable prefix (system prompt with tool docs and the
+kitchen layout) ahead of the per-frame perception, so OpenAI's prompt
+cache can serve it from the second call on. Whether it does shows up in
+each response's `usage_metadata` (`input_token_details.cache_read`);
+the clients pass it here.
+
+Metrics:
+- `llm.prompt_cache.input_tokens` / `llm.prompt_cache.cached_tokens`
+- `llm.prompt_cache.hit_rate`: cached / input tokens so far
+- `llm.prompt_cache.latency_ms.hit` / `.miss`: call latency split by
+  whether any input tokens were served from cache
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from app.core.metrics import metrics
+
+
+def cached_tokens(usage: Mapping[str, Any]) -> int:
+    return (usage.get("input_token_details") or {}).get("cache_read") or 0
+
+
+def record_usage(usage: Mapping[str, Any] | None, latency_ms: float) -> None:
+    """Record one response's `usage_metadata`; no-op when the provider sent none."""
+    if not isinstance(usage, Mapping) or not usage:
+        return
+    cached = cached_tokens(usage)
+    total_input = metrics.counter("llm.prompt_cache.input_tokens")
+    total_cached = metrics.counter("llm.prompt_cache.cached_tokens")
+    total_input.inc(usage.get("input_tokens") or 0)
+    total_cached.inc(cached)
+    if total_input.value:
+        metrics.gauge("llm.prompt_cache.hit_rate").set(total_cached.value / total_input.value)
+    metrics.histogram(
+        f"llm.prompt_cache.latency_ms.{'hit' if cached else 'miss'}"
+    ).observe(latency_ms)
+
+
+def record_usages(usages: Iterable[Mapping[str, Any]], latency_ms: float) -> None:
+    """Usage collected by a callback (structured output hides the raw message)."""
+    for usage in usages:
+        record_usage(usage, latency_ms)
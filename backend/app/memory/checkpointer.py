@@ -0,0 +1,366 @@
+"""LangGraph checkpoint saver on our Postgres (SQLAlchemy async engine).
+
+The graph is compiled with this saver keyed by `thread_id = client_id`,
+so a frame only carries the new perception: everything else (task,
+plan, retry_count, stack_baseline...) is restored from the thread's
+latest checkpoint.
+
+The official `langgraph-checkpoint-postgres` saver needs psycopg3 and
+its own connection pool; this one reuses the asyncpg engine in
+`core/deps.py` and the tables from `memory/models.py`.
+
+Checkpoints are msgpack-encoded by langgraph's `JsonPlusSerializer`,
+which only revives types on an allowlist (strict mode refuses the rest);
+`build_serde` lists the ones our graph state holds.
+
+Retention: a graph run writes one checkpoint per superstep, so threads
+grow fast. Every `prune_every` puts on a thread, checkpoints older than
+its `keep_last` newest are deleted (with their writes), and threads
+idle for more than `ttl_days` are dropped. Our graph has no
+`DeltaChannel`s, so every checkpoint is self-contained and old ones
+can go.
+"""
+from __future__ import annotations
+
+import logging
+import random
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.schemas import AgentAction, CriticOutput, CurriculumOutput, Perception
+from app.context.history import TaskHistory, TaskRecord
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.memory.models import GraphCheckpoint, GraphCheckpointWrite
+
+logger = logging.getLogger(__name__)
+
+# Our types that end up in graph state (see `AgentState`). Nested
+# pydantic models are revived by their parent; nested namedtuples are not.
+CHECKPOINT_TYPES: tuple[type, ...] = (
+    Perception, AgentAction, CriticOutput, CurriculumOutput, TaskHistory, TaskRecord,
+)
+
+
+def build_serde() -> JsonPlusSerializer:
+    return JsonPlusSerializer(allowed_msgpack_modules=list(CHECKPOINT_TYPES))
+
+
+class SQLAlchemyCheckpointSaver(BaseCheckpointSaver[str]):
+    """Async-only checkpoint saver; the inherited sync methods raise."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        keep_last: int = 20,
+        ttl_days: float = 7.0,
+        prune_every: int = 50,
+    ):
+        super().__init__(serde=build_serde())
+        self.session_factory = session_factory
+        self.keep_last = keep_last
+        self.ttl_days = ttl_days
+        self.prune_every = prune_every
+        self._puts: dict[str, int] = defaultdict(int)
+
+    # ---- reads ----------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        query = select(GraphCheckpoint).where(
+            GraphCheckpoint.thread_id == thread_id,
+            GraphCheckpoint.checkpoint_ns == checkpoint_ns,
+        )
+        if checkpoint_id:
+            query = query.where(GraphCheckpoint.checkpoint_id == checkpoint_id)
+        else:
+            query = query.order_by(GraphCheckpoint.checkpoint_id.desc()).limit(1)
+
+        async with self.session_factory() as session:
+            row = (await session.execute(query)).scalars().first()
+            if row is None:
+                return None
+            return await self._to_tuple(session, row)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        query = select(GraphCheckpoint).order_by(GraphCheckpoint.checkpoint_id.desc())
+        if config is not None:
+            query = query.where(GraphCheckpoint.thread_id == config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query = query.where(GraphCheckpoint.checkpoint_ns == checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query = query.where(GraphCheckpoint.checkpoint_id == checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            query = query.where(GraphCheckpoint.checkpoint_id < before_id)
+
+        async with self.session_factory() as session:
+            rows = (await session.execute(query)).scalars().all()
+            yielded = 0
+            for row in rows:
+                if limit is not None and yielded >= limit:
+                    break
+                # Metadata is an opaque blob, so filtering happens here.
+                metadata = self.serde.loads_typed((row.metadata_type, row.metadata_blob))
+                if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                yielded += 1
+                yield await self._to_tuple(session, row, metadata)
+
+    async def _to_tuple(
+        self,
+        session: AsyncSession,
+        row: GraphCheckpoint,
+        metadata: CheckpointMetadata | None = None,
+    ) -> CheckpointTuple:
+        writes = (await session.execute(
+            select(GraphCheckpointWrite)
+            .where(
+                GraphCheckpointWrite.thread_id == row.thread_id,
+                GraphCheckpointWrite.checkpoint_ns == row.checkpoint_ns,
+                GraphCheckpointWrite.checkpoint_id == row.checkpoint_id,
+            )
+            .order_by(GraphCheckpointWrite.task_id, GraphCheckpointWrite.idx)
+        )).scalars().all()
+
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": row.thread_id,
+                "checkpoint_ns": row.checkpoint_ns,
+                "checkpoint_id": row.checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((row.checkpoint_type, row.checkpoint)),
+            metadata=metadata if metadata is not None
+            else self.serde.loads_typed((row.metadata_type, row.metadata_blob)),
+            parent_config={"configurable": {
+                "thread_id": row.thread_id,
+                "checkpoint_ns": row.checkpoint_ns,
+                "checkpoint_id": row.parent_checkpoint_id,
+            }} if row.parent_checkpoint_id else None,
+            pending_writes=[
+                (w.task_id, w.channel, self.serde.loads_typed((w.value_type, w.value)))
+                for w in writes
+            ],
+        )
+
+    # ---- writes ---------------------------------------------------------
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+
+        async with self.session_factory() as session:
+            await session.merge(GraphCheckpoint(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+                parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+                checkpoint_type=checkpoint_type,
+                checkpoint=checkpoint_blob,
+                metadata_type=metadata_type,
+                metadata_blob=metadata_blob,
+            ))
+            await session.commit()
+        metrics.counter("checkpoints.put").inc()
+
+        self._puts[thread_id] += 1
+        if self._puts[thread_id] % self.prune_every == 0:
+            await self._compact(thread_id)
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        async with self.session_factory() as session:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx)
+                # Special writes (errors, interrupts) have negative idx and
+                # are overwritten; regular ones are written once.
+                if write_idx >= 0 and await session.get(GraphCheckpointWrite, key):
+                    continue
+                value_type, value_blob = self.serde.dumps_typed(value)
+                await session.merge(GraphCheckpointWrite(
+                    thread_id=thread_id,
+                    checkpoint_ns=checkpoint_ns,
+                    checkpoint_id=checkpoint_id,
+                    task_id=task_id,
+                    idx=write_idx,
+                    channel=channel,
+                    value_type=value_type,
+                    value=value_blob,
+                    task_path=task_path,
+                ))
+            await session.commit()
+
+    # ---- retention ------------------------------------------------------
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(GraphCheckpointWrite).where(GraphCheckpointWrite.thread_id == thread_id)
+            )
+            await session.execute(
+                delete(GraphCheckpoint).where(GraphCheckpoint.thread_id == thread_id)
+            )
+            await session.commit()
+        self._puts.pop(thread_id, None)
+
+    async def aprune(
+        self,
+        thread_ids: Sequence[str],
+        *,
+        strategy: str = "keep_latest",
+    ) -> None:
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                await self.adelete_thread(thread_id)
+            elif strategy == "keep_latest":
+                await self.akeep_last(thread_id, 1)
+            else:
+                raise ValueError(f"Unknown prune strategy: {strategy}")
+
+    async def akeep_last(self, thread_id: str, n: int) -> int:
+        """Delete all but the `n` newest checkpoints of each namespace of
+        `thread_id`, with their writes. Returns how many were deleted."""
+        deleted = 0
+        async with self.session_factory() as session:
+            namespaces = (await session.execute(
+                select(GraphCheckpoint.checkpoint_ns)
+                .where(GraphCheckpoint.thread_id == thread_id)
+                .distinct()
+            )).scalars().all()
+            for ns in namespaces:
+                cutoff = (await session.execute(
+                    select(GraphCheckpoint.checkpoint_id)
+                    .where(GraphCheckpoint.thread_id == thread_id, GraphCheckpoint.checkpoint_ns == ns)
+                    .order_by(GraphCheckpoint.checkpoint_id.desc())
+                    .offset(n - 1)
+                    .limit(1)
+                )).scalar()
+                if cutoff is None:
+                    continue
+                await session.execute(delete(GraphCheckpointWrite).where(
+                    GraphCheckpointWrite.thread_id == thread_id,
+                    GraphCheckpointWrite.checkpoint_ns == ns,
+                    GraphCheckpointWrite.checkpoint_id < cutoff,
+                ))
+                result = await session.execute(delete(GraphCheckpoint).where(
+                    GraphCheckpoint.thread_id == thread_id,
+                    GraphCheckpoint.checkpoint_ns == ns,
+                    GraphCheckpoint.checkpoint_id < cutoff,
+                ))
+                deleted += result.rowcount or 0
+            await session.commit()
+        return deleted
+
+    async def adelete_idle(self, older_than: timedelta) -> list[str]:
+        """Drop every thread whose newest checkpoint is older than `older_than`."""
+        cutoff = datetime.now(timezone.utc) - older_than
+        async with self.session_factory() as session:
+            idle = (await session.execute(
+                select(GraphCheckpoint.thread_id)
+                .group_by(GraphCheckpoint.thread_id)
+                .having(func.max(GraphCheckpoint.created_at) < cutoff)
+            )).scalars().all()
+            if idle:
+                await session.execute(
+                    delete(GraphCheckpointWrite).where(GraphCheckpointWrite.thread_id.in_(idle))
+                )
+                await session.execute(
+                    delete(GraphCheckpoint).where(GraphCheckpoint.thread_id.in_(idle))
+                )
+                await session.commit()
+        for thread_id in idle:
+            self._puts.pop(thread_id, None)
+        return list(idle)
+
+    async def _compact(self, thread_id: str) -> None:
+        # Retention must never fail a graph run.
+        try:
+            pruned = await self.akeep_last(thread_id, self.keep_last)
+            idle = await self.adelete_idle(timedelta(days=self.ttl_days))
+        except Exception as e:
+            logger.warning("Checkpoint compaction failed for %s: %s", thread_id, e)
+            return
+        metrics.counter("checkpoints.pruned").inc(pruned)
+        metrics.counter("checkpoints.idle_threads_deleted").inc(len(idle))
+
+    # ---- versions -------------------------------------------------------
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same scheme as InMemorySaver: zero-padded counter + random tiebreak.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+def build_checkpointer(
+    settings: Settings, session_factory: async_sessionmaker[AsyncSession]
+) -> BaseCheckpointSaver | None:
+    if settings.GRAPH_CHECKPOINTER == "postgres":
+        return SQLAlchemyCheckpointSaver(
+            session_factory,
+            keep_last=settings.CHECKPOINT_KEEP_LAST,
+            ttl_days=settings.CHECKPOINT_TTL_DAYS,
+        )
+    if settings.GRAPH_CHECKPOINTER == "memory":
+        return InMemorySaver(serde=build_serde())
+    if settings.GRAPH_CHECKPOINTER == "none":
+        return None
+    raise ValueError(f"Unknown graph checkpointer: {settings.GRAPH_CHECKPOINTER}")
@@ -1,6 +1,16 @@
 # paprika_agent_backend/memory/models.py
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import JSON, Column, DateTime, Float, Integer, String, Text, func
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -44,4 +54,39 @@ class Skill(Base):
     # Metadata
     success_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True))
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True))
+
+
+class GraphCheckpoint(Base):
+    """One LangGraph checkpoint (see app/memory/checkpointer.py).
+    `thread_id` is the Unity client_id."""
+    __tablename__ = "graph_checkpoints"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)              # sortable: later id = newer
+    parent_checkpoint_id = Column(String, nullable=True)
+
+    # Serializer-typed blobs (type tag + bytes), as produced by serde.dumps_typed
+    checkpoint_type = Column(String)
+    checkpoint = Column(LargeBinary)
+    metadata_type = Column(String)
+    metadata_blob = Column(LargeBinary)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class GraphCheckpointWrite(Base):
+    """Pending writes of a node task against a checkpoint."""
+    __tablename__ = "graph_checkpoint_writes"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    task_id = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+
+    channel = Column(String)
+    value_type = Column(String)
+    value = Column(LargeBinary)
+    task_path = Column(String, default="")
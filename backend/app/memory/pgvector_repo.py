@@ -7,6 +7,7 @@ from app.api.schemas import CreateMemoryDTO, MemoryDTO, SkillDTO
 from app.memory.base import BaseMemoryStore
 from app.memory.models import Memory, Skill
 from app.memory.vector_store import embed_text
+from app.core.timing import stage
 
 
 class PostgresMemoryStore(BaseMemoryStore):
@@ -15,7 +16,8 @@ class PostgresMemoryStore(BaseMemoryStore):
 
     async def save(self, memory: CreateMemoryDTO) -> None:
         async with self._session_factory() as db:
-            emb = embed_text(memory.content)
+            with stage("memory.embed"):
+                emb = embed_text(memory.content)
 
             db_mem = Memory(
                 in_game_day=memory.day,
@@ -40,33 +42,38 @@ class PostgresMemoryStore(BaseMemoryStore):
                 .order_by(Memory.in_game_day.desc(), Memory.time_slot.desc())
                 .limit(limit)
             )
-            result = await db.execute(stmt)
+            with stage("memory.query"):
+                result = await db.execute(stmt)
             rows = result.scalars().all()
 
             return [MemoryDTO.model_validate(row) for row in rows]
 
     async def fetch_similar(self, *, query: str, limit: int = 10) -> List[MemoryDTO]:
         async with self._session_factory() as db:
-            q_emb = embed_text(query)
+            with stage("memory.embed"):
+                q_emb = embed_text(query)
             stmt = (
                 select(Memory)
                 .order_by(Memory.embedding.l2_distance(q_emb))
                 .limit(limit)
             )
-            result = await db.execute(stmt)
+            with stage("memory.query"):
+                result = await db.execute(stmt)
             rows = result.scalars().all()
 
             return [MemoryDTO.model_validate(row) for row in rows]
         
     async def fetch_similar_skills(self, *, query: str, limit: int = 3) -> List[SkillDTO]:
         async with self._session_factory() as db:
-            q_emb = embed_text(query)
+            with stage("memory.embed"):
+                q_emb = embed_text(query)
             stmt = (
                 select(Skill)
                 .order_by(Skill.embedding.l2_distance(q_emb))
                 .limit(limit)
             )
-            result = await db.execute(stmt)
+            with stage("memory.query"):
+                result = await db.execute(stmt)
             rows = result.scalars().all()
             
             return [SkillDTO.model_validate(row) for row in rows]
@@ -77,9 +84,11 @@ class PostgresMemoryStore(BaseMemoryStore):
         """
         async with self._session_factory() as db:
             stmt = select(Skill).where(Skill.task_name == skill.task_name)
-            existing = (await db.execute(stmt)).scalar_one_or_none()
+            with stage("memory.query"):
+                existing = (await db.execute(stmt)).scalar_one_or_none()
             
-            emb = embed_text(f"{skill.task_name}: {skill.description}")
+            with stage("memory.embed"):
+                emb = embed_text(f"{skill.task_name}: {skill.description}")
 
             if existing:
                 existing.steps_text = skill.steps_text
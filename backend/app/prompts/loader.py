@@ -6,10 +6,17 @@ from langchain_core.tools import StructuredTool
 BASE_DIR = Path(__file__).parent / "templates"
 
 
-def build_system_prompt(template_name: str, tools: list[StructuredTool] | None) -> str:
+def build_system_prompt(
+    template_name: str,
+    tools: list[StructuredTool] | None,
+    static_sections: list[str] | None = None,
+) -> str:
+    """The agent's system prompt: template (with tool docs), then any
+    static reference sections. Built once per agent and identical on
+    every call, so it is the cacheable prefix of each request."""
     tools_doc = _load_tool_definition(tools=tools) or ""
     raw_text = _load_system_template(template_name=template_name)
-    return raw_text.format(tools_doc=tools_doc)
+    return "\n\n".join([raw_text.format(tools_doc=tools_doc), *(static_sections or [])])
 
 
 def _load_system_template(template_name: str) -> str:
@@ -26,7 +33,8 @@ def _load_tool_definition(tools: list[StructuredTool]) -> str:
     
     documentation_lines = []
 
-    for tool in tools:
+    # Sorted so the prompt bytes don't depend on registration order.
+    for tool in sorted(tools, key=lambda t: t.name):
         try:
             if tool.args_schema:
                 args_schema = json.dumps(
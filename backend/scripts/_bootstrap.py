@@ -0,0 +1,12 @@
+"""Make the backend package importable when running `python scripts/<name>.py`.
+
+Scripts import this module first; it puts the backend root (the parent
+of `scripts/`) on sys.path, same as `pythonpath = "."` does for pytest.
+"""
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
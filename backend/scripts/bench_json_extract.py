@@ -0,0 +1,131 @@
+"""Compare the single-pass JSON scanner with the old bracket extractor.
+
+Usage (from backend/):
+    python scripts/bench_json_extract.py [--iterations 2000] [--corpus FILE]
+
+`--corpus` takes captured LLM replies, one JSON-encoded string per line
+(e.g. the "[... Agent response]" log lines, json.dumps'ed). Without it
+a built-in corpus shaped like our agents' replies is used: bare and
+fenced action arrays, critic/curriculum objects after prose with `[C]`
+references, and long reasoning with bracketed asides. The built-in
+corpus is written by hand, so treat its numbers as relative only.
+
+Each row is the mean time per reply. Rows marked `*` parse differently:
+for an array after prose the old extractor tried objects first and
+returned only the plan's first step.
+"""
+import argparse
+import json
+import re
+import time
+
+import _bootstrap  # noqa: F401  (sys.path setup)
+
+from app.agents.json_stream import extract_json
+
+STEP = '{"thought_trace": "Go to the %s", "function": "move_to", "args": {"id": "%s"}}'
+PLAN = "[" + ", ".join(STEP % (t, t) for t in ("TomatoBox", "CutBoard", "Preparation2") * 3) + "]"
+CRITIC = json.dumps({
+    "success": False,
+    "reasoning": "The trace [C] shows pickup failed; [B] says hands hold TOMATO.",
+    "feedback": "Put the TOMATO on the CutBoard before chopping.",
+})
+ASIDE = "Step [%d] looks fine {see trace} and the [B] block agrees. "
+
+BUILTIN_CORPUS = {
+    "bare array": PLAN,
+    "fenced array": f"```json\n{PLAN}\n```",
+    "prose + array": f"Here is the plan for the task:\n{PLAN}\nLet me know.",
+    "prose [C] + object": f"Looking at [C] and [B] first.\n```json\n{CRITIC}\n```",
+    "long prose + object": "".join(ASIDE % i for i in range(60)) + CRITIC,
+}
+
+
+def legacy_parse(content: str) -> list | dict | None:
+    """`BaseAgent._parse_json_helper` before the scanner, for comparison."""
+    stripped = content.strip()
+    try:
+        return json.loads(stripped)
+    except json.JSONDecodeError:
+        pass
+    fenced = re.sub(r"^```(?:json)?\s*|\s*```$", "", stripped, flags=re.MULTILINE).strip()
+    if fenced != stripped:
+        try:
+            return json.loads(fenced)
+        except json.JSONDecodeError:
+            pass
+    for open_ch, close_ch in (("{", "}"), ("[", "]")):
+        i = 0
+        while True:
+            start = content.find(open_ch, i)
+            if start == -1:
+                break
+            depth, end, in_string, escape = 0, -1, False, False
+            for j in range(start, len(content)):
+                ch = content[j]
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_string = not in_string
+                elif in_string:
+                    continue
+                elif ch == open_ch:
+                    depth += 1
+                elif ch == close_ch:
+                    depth -= 1
+                    if depth == 0:
+                        end = j
+                        break
+            if end == -1:
+                break
+            try:
+                return json.loads(content[start:end + 1])
+            except json.JSONDecodeError:
+                i = start + 1
+    return None
+
+
+def new_parse(content: str) -> list | dict | None:
+    stripped = content.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            return json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+    return extract_json(content)
+
+
+def _per_call_us(fn, text: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(text)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--corpus", help="captured replies, one JSON string per line")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = {f"reply {i}": json.loads(line) for i, line in enumerate(f) if line.strip()}
+    else:
+        corpus = BUILTIN_CORPUS
+
+    print(f"{'reply':<22}{'bytes':>7}{'legacy us':>12}{'scanner us':>12}{'speedup':>9}")
+    for name, text in corpus.items():
+        differs = "*" if legacy_parse(text) != new_parse(text) else ""
+        old_us = _per_call_us(legacy_parse, text, args.iterations)
+        new_us = _per_call_us(new_parse, text, args.iterations)
+        print(
+            f"{name + differs:<22}{len(text):>7}{old_us:>12.1f}{new_us:>12.1f}"
+            f"{old_us / new_us:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare JSON vs MessagePack for the Unity WebSocket frames.
+
+Usage (from backend/):
+    python scripts/bench_wire_format.py [--iterations 5000]
+
+Measures, per perception frame:
+  - bytes on the wire (pretty JSON as Unity logs it, compact JSON as
+    `send_json` emits it, and MessagePack);
+  - decode time: payload -> dict -> `Perception.model_validate`;
+and, per plan response, encoded size and encode time.
+"""
+import argparse
+import json
+import time
+
+import _bootstrap  # noqa: F401  (sys.path setup)
+
+from app.api.codecs import MsgpackCodec
+from app.api.schemas import AgentAction, Perception
+from app.prompts.loader import BASE_DIR
+
+EXAMPLE = BASE_DIR / "perception_send_from_unity_example.txt"
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    pretty = EXAMPLE.read_text(encoding="utf-8")
+    frame = json.loads(pretty)
+    compact = json.dumps(frame, separators=(",", ":"), ensure_ascii=False)
+    packed = MsgpackCodec.encode(frame)
+
+    plan = [
+        AgentAction(function="move_to", args={"id": "TomatoBox"}),
+        AgentAction(function="pickup", args={"id": "TomatoBox"}),
+        AgentAction(function="move_to", args={"id": "CutBoard"}),
+        AgentAction(function="put_down", args={"id": "CutBoard"}),
+        AgentAction(function="chop", args={"id": "CutBoard"}),
+    ]
+    response = {"client_id": "123", "task": "Chop the tomato", "plan": plan}
+
+    n = args.iterations
+    json_decode = _per_call_us(lambda: Perception.model_validate(json.loads(compact)), n)
+    msgpack_decode = _per_call_us(
+        lambda: Perception.model_validate(MsgpackCodec.decode(packed)), n,
+    )
+    json_encode = _per_call_us(
+        lambda: json.dumps(
+            {**response, "plan": [a.model_dump() for a in plan]},
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ),
+        n,
+    )
+    msgpack_encode = _per_call_us(lambda: MsgpackCodec.encode(response), n)
+
+    json_plan_bytes = len(json.dumps(
+        {**response, "plan": [a.model_dump() for a in plan]},
+        separators=(",", ":"),
+    ).encode())
+    msgpack_plan_bytes = len(MsgpackCodec.encode(response))
+
+    print(f"Perception frame ({EXAMPLE.name}, {n} iterations)")
+    print(f"  pretty JSON   {len(pretty.encode()):>6} B")
+    print(f"  compact JSON  {len(compact.encode()):>6} B   decode+validate {json_decode:8.1f} us")
+    print(f"  MessagePack   {len(packed):>6} B   decode+validate {msgpack_decode:8.1f} us")
+    print(f"Plan response ({len(plan)} steps)")
+    print(f"  compact JSON  {json_plan_bytes:>6} B   encode {json_encode:8.1f} us")
+    print(f"  MessagePack   {msgpack_plan_bytes:>6} B   encode {msgpack_encode:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.agents.action import ActionAgent
+from app.agents.json_stream import JsonArrayStream
+from app.llm.base import BaseLLMClient
+
+PLAN_TEXT = (
+    "```json\n"
+    '[{"thought_trace": "Go to {the} box", "function": "move_to", "args": {"id": "TomatoBox"}},\n'
+    ' {"function": "pickup", "args": {"id": "TomatoBox", "tags": ["a]", "b"]}},\n'
+    ' {"function": "move_to", "args": {"id": "CutBoard"}}]\n'
+    "```"
+)
+
+
+def _chunks(text: str, size: int = 7) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_array_stream_emits_each_element_when_it_closes():
+    parser = JsonArrayStream()
+    emitted_at: list[int] = []
+    elements = []
+
+    for i, chunk in enumerate(_chunks(PLAN_TEXT)):
+        for element in parser.feed(chunk):
+            elements.append(element)
+            emitted_at.append(i)
+
+    assert [e["function"] for e in elements] == ["move_to", "pickup", "move_to"]
+    assert elements[1]["args"]["tags"] == ["a]", "b"]
+    assert parser.done
+    # The first step is available long before the reply finishes.
+    assert emitted_at[0] < len(_chunks(PLAN_TEXT)) // 2
+
+
+def test_array_stream_bare_object_and_bad_element():
+    parser = JsonArrayStream()
+    assert parser.feed('Sure: {"function": "chop", "args": {}} trailing') == [
+        {"function": "chop", "args": {}}
+    ]
+
+    parser = JsonArrayStream()
+    assert parser.feed('[{"function": oops}, {"function": "cook"}]') == [{"function": "cook"}]
+
+
+def test_array_stream_skips_bracketed_words_in_prose():
+    parser = JsonArrayStream()
+    elements = []
+    for chunk in _chunks("Per [C] and [ B ] the tomato is ready:\n" + PLAN_TEXT, size=3):
+        elements += parser.feed(chunk)
+
+    assert [e["function"] for e in elements] == ["move_to", "pickup", "move_to"]
+
+    parser = JsonArrayStream()
+    assert parser.feed("Nothing to do: [ ]") == [] and parser.done
+
+
+class _StreamingLLM(MagicMock):
+    def __init__(self, text: str):
+        super().__init__(spec=BaseLLMClient)
+        self._text = text
+
+    async def stream_response(self, system_prompt: str, user_message: str):
+        for chunk in _chunks(self._text):
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_plan_yields_agent_actions():
+    agent = ActionAgent(llm=_StreamingLLM(PLAN_TEXT))
+
+    steps = [a async for a in agent.stream_plan(context="ctx", current_task="Chop the tomato")]
+
+    assert [s.function for s in steps] == ["move_to", "pickup", "move_to"]
+    assert steps[0].thought_trace == "Go to {the} box"
+
+
+@pytest.mark.asyncio
+async def test_stream_plan_falls_back_to_full_parse():
+    # "[C]" in the preamble is taken for the array start; the full
+    # reply is re-parsed once the stream ends.
+    text = 'Per [C] the board is free.\n[{"function": "chop", "args": {"id": "CutBoard"}}]'
+    agent = ActionAgent(llm=_StreamingLLM(text))
+
+    steps = [a async for a in agent.stream_plan(context="ctx", current_task="Chop")]
+
+    assert [s.function for s in steps] == ["chop"]
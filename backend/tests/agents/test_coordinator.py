@@ -0,0 +1,93 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.agents.coordinator import KitchenCoordinator
+from app.api.schemas import CurriculumOutput
+from app.core.deps import get_graph
+
+PLATED = {"plate_location": "Preparation1", "stack": [], "next_expected": "BreadSlice"}
+
+
+def test_agents_in_one_kitchen_get_different_subtasks(make_perception):
+    coordinator = KitchenCoordinator()
+
+    first = coordinator.assign("k1", "chef-a", make_perception())
+    second = coordinator.assign("k1", "chef-b", make_perception())
+    third = coordinator.assign("k1", "chef-c", make_perception())
+
+    assert first.task.startswith("Set up the assembly plate on Preparation")
+    # Bread is chopped at the CutBoard, so the next agent cooks the meat.
+    assert second.task == "Prepare BreadSlice and place it on a Preparation table"
+    assert third.task == "Prepare CookedMeat and place it on a Preparation table"
+    # Another kitchen is unaffected.
+    assert coordinator.assign("k2", "chef-d", make_perception()).task == first.task
+
+
+def test_busy_stations_defer_to_the_curriculum(make_perception):
+    coordinator = KitchenCoordinator()
+    perception = make_perception(tables={"Preparation1": "PLATE"}, assembly=PLATED)
+
+    assert "BreadSlice" in coordinator.assign("k1", "chef-a", perception).task
+    assert "CookedMeat" in coordinator.assign("k1", "chef-b", perception).task
+    assert coordinator.assign("k1", "chef-c", perception) is None
+
+    # chef-a leaves: its CutBoard claim is free again.
+    coordinator.release("k1", "chef-a")
+    assert "BreadSlice" in coordinator.assign("k1", "chef-c", perception).task
+
+
+def test_ready_layer_is_stacked_by_one_agent_only(make_perception):
+    coordinator = KitchenCoordinator()
+    perception = make_perception(
+        tables={"Preparation1": "PLATE", "Preparation2": "BreadSlice"}, assembly=PLATED,
+    )
+
+    assert coordinator.assign("k1", "chef-a", perception).task \
+        == "Stack BreadSlice onto the plate at Preparation1"
+    # The parked bun covers the first BreadSlice; the bottom bun still needs making.
+    assert coordinator.assign("k1", "chef-b", perception).task \
+        == "Prepare CookedMeat and place it on a Preparation table"
+    assert coordinator.tasks("k1") == {
+        "chef-a": "Stack BreadSlice onto the plate at Preparation1",
+        "chef-b": "Prepare CookedMeat and place it on a Preparation table",
+    }
+
+
+def test_claims_expire_without_frames(make_perception):
+    coordinator = KitchenCoordinator(claim_ttl_s=0)
+    coordinator.assign("k1", "chef-a", make_perception())
+
+    assert coordinator.tasks("k1") == {}
+    assert coordinator.assign("k1", "chef-b", make_perception()).task.startswith("Set up")
+
+
+def test_finished_burger_defers_to_the_curriculum(make_perception):
+    done = make_perception(assembly={"plate_location": "Preparation1", "is_done": True})
+    assert KitchenCoordinator().assign("k1", "chef-a", done) is None
+
+
+@pytest.mark.asyncio
+async def test_curriculum_node_uses_kitchen_assignment(make_perception):
+    graph = get_graph()
+    propose = AsyncMock(return_value=CurriculumOutput(task="Chop", reasoning="", difficulty=1))
+    state = {
+        "perception": make_perception(),
+        "context": "ctx",
+        "task": "Decide Next Task",
+        "plan": [],
+        "critique": None,
+        "retry_count": 0,
+    }
+    config = {"configurable": {"kitchen_id": "test-kitchen", "client_id": "chef-a"}}
+
+    with patch.object(graph.curriculum_agent, "propose_next_task", propose):
+        try:
+            update = await graph.curriculum_node(state, config)
+            assert update["task"].startswith("Set up the assembly plate")
+            propose.assert_not_awaited()
+
+            # Outside a kitchen the session's own curriculum decides.
+            assert (await graph.curriculum_node(state))["task"] == "Chop"
+        finally:
+            graph.coordinator.release("test-kitchen", "chef-a")
@@ -0,0 +1,41 @@
+from app.agents.critic_rules import verify_by_rules
+
+FAILED_PUT_DOWN = [
+    {"step_index": 1, "function": "move_to", "target_id": "Preparation1", "status": "success"},
+    {"step_index": 2, "function": "put_down", "target_id": "Preparation1",
+     "status": "failed", "message": "Hands are empty"},
+]
+
+
+def test_plate_setup(make_perception):
+    task = "Set up the assembly plate on Preparation1"
+
+    done = verify_by_rules(task, make_perception(assembly={"plate_location": "Preparation1"}))
+    assert done.success
+
+    failed = verify_by_rules(task, make_perception(trace=FAILED_PUT_DOWN))
+    assert not failed.success
+    assert "Step 2 (put_down Preparation1) failed: Hands are empty" == failed.feedback
+
+    # Not done, but nothing visibly went wrong: let the LLM judge.
+    assert verify_by_rules(task, make_perception()) is None
+
+
+def test_stack_layer_against_baseline(make_perception):
+    task = "Stack TomatoSlice onto the plate at Preparation1"
+    grown = {"plate_location": "Preparation1", "stack": ["BreadSlice", "CookedMeat", "TomatoSlice"]}
+
+    assert verify_by_rules(task, make_perception(assembly=grown), stack_baseline=2).success
+    # Top layer already matched when the task was proposed: no growth, no success.
+    assert verify_by_rules(task, make_perception(assembly=grown), stack_baseline=3) is None
+    assert not verify_by_rules(task, make_perception(assembly=grown, trace=FAILED_PUT_DOWN), stack_baseline=3).success
+    # Without a baseline the rule can't tell.
+    assert verify_by_rules(task, make_perception(assembly=grown)) is None
+
+
+def test_done_burger_and_undecidable_tasks(make_perception):
+    assert verify_by_rules("Stack BreadSlice on the plate", make_perception(assembly={"is_done": True})).success
+    assert verify_by_rules("Stack Pickles on the plate", make_perception(assembly={"is_done": True})) is None
+    assert verify_by_rules(
+        "Prepare TomatoSlice and place it on a Preparation table", make_perception(trace=FAILED_PUT_DOWN)
+    ) is None
@@ -3,6 +3,7 @@ from datetime import datetime
 from unittest.mock import MagicMock, AsyncMock
 from app.llm.base import BaseLLMClient
 from app.agents.curriculum import CurriculumAgent
+from app.context.history import TaskHistory
 from app.context.view import build_perception_context
 from app.memory.base import BaseMemoryStore
 from app.api.schemas import CurriculumOutput, MemoryDTO
@@ -34,10 +35,7 @@ def test_curriculum_prompt_rendering(dummy_perception, mock_dependencies):
         mode="auto",
     )
 
-    agent.recent_history = [
-        {"task": "Open Fridge", "result": "success"},
-        {"task": "Grab Tomato", "result": "success"},
-    ]
+    history = TaskHistory().add("Open Fridge", "Success").add("Grab Tomato", "Success")
 
     fake_memories = [
         MemoryDTO(
@@ -50,6 +48,7 @@ def test_curriculum_prompt_rendering(dummy_perception, mock_dependencies):
     human_msg = agent.render_human_message(
         context=context,
         long_term_memories=fake_memories,
+        history=history,
     )
 
     print(f"\n[Curriculum Prompt]:\n{human_msg.content}")
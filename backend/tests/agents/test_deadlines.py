@@ -0,0 +1,99 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.agents.action import ActionAgent
+from app.api.schemas import AgentAction, CriticOutput, Perception
+from app.core.config import settings
+from app.core.deps import get_graph
+
+agents = get_graph()
+LAST_PLAN = [AgentAction(function="move_to", args={"id": "TomatoBox"})]
+
+
+async def _slow(**kwargs):
+    await asyncio.sleep(10)
+
+
+def _state(plan=LAST_PLAN) -> dict:
+    return {
+        "perception": Perception.model_validate(
+            {"self": {"time_hour": 10, "current_zone": "Kitchen"}, "sensory": {}, "statistics": {}}
+        ),
+        "context": "ctx",
+        "task": "Chop the tomato",
+        "skill_guide": "",
+        "plan": plan,
+        "critique": CriticOutput(success=False, reasoning="", feedback="try again"),
+        "retry_count": 1,
+    }
+
+
+@pytest.fixture
+def tight_deadlines():
+    with patch.object(settings, "ACTION_DEADLINE_S", 0.01), \
+            patch.object(settings, "CRITIC_DEADLINE_S", 0.01):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_action_deadline_reuses_last_plan(tight_deadlines):
+    with patch.object(agents.action_agent, "generate_plan", _slow):
+        update = await asyncio.wait_for(agents.action_node(_state(), {}), timeout=1)
+
+    assert update["plan"] == LAST_PLAN
+    assert update["plan_source"] == "last_plan"
+
+
+@pytest.mark.asyncio
+async def test_action_deadline_prefers_fallback_model(tight_deadlines):
+    fallback = MagicMock(spec=ActionAgent)
+    fallback.generate_plan = AsyncMock(return_value=[AgentAction(function="chop", args={"id": "CutBoard"})])
+
+    with patch.object(agents.action_agent, "generate_plan", _slow), \
+            patch.object(agents, "fallback_action_agent", fallback):
+        update = await agents.action_node(_state(), {})
+
+    assert update["plan_source"] == "fallback"
+    assert update["plan"][0].function == "chop"
+
+
+@pytest.mark.asyncio
+async def test_action_deadline_without_degradation_raises(tight_deadlines):
+    with patch.object(agents.action_agent, "generate_plan", _slow):
+        with pytest.raises(TimeoutError):
+            await agents.action_node(_state(plan=[]), {})
+
+
+@pytest.mark.asyncio
+async def test_action_deadline_mid_stream_keeps_streamed_steps(tight_deadlines):
+    fallback = MagicMock(spec=ActionAgent)
+    fallback.generate_plan = AsyncMock(return_value=[AgentAction(function="chop", args={"id": "CutBoard"})])
+    first = AgentAction(function="move_to", args={"id": "CutBoard"})
+
+    async def stall_after_first_step(**kwargs):
+        yield first
+        await asyncio.sleep(10)
+
+    events = []
+    with patch.object(agents.action_agent, "stream_plan", stall_after_first_step), \
+            patch.object(agents, "fallback_action_agent", fallback), \
+            patch("app.agents.graph.get_stream_writer", return_value=events.append):
+        update = await asyncio.wait_for(
+            agents.action_node(_state(), {"configurable": {"stream_plan": True}}), timeout=1
+        )
+
+    assert update["plan"] == [first]
+    assert update["plan_fingerprint"] is None
+    assert [e["step"] for e in events] == [first.model_dump()]
+    fallback.generate_plan.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_critic_deadline_reports_not_verified(tight_deadlines):
+    with patch.object(agents.critic_agent, "check_task_success", _slow):
+        update = await asyncio.wait_for(agents.critic_node(_state()), timeout=1)
+
+    assert update["critique"].success is False
+    assert update["retry_count"] == 2
@@ -0,0 +1,34 @@
+import gc
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.agents.graph import build_graph
+from app.core.config import settings
+from app.llm.base import BaseLLMClient
+
+
+def test_graph_cached_per_configuration():
+    critic_llm = MagicMock(spec=BaseLLMClient)
+
+    default = build_graph(settings)
+    overridden = build_graph(settings, llm_overrides={"critic": critic_llm})
+
+    assert build_graph(settings) is default
+    assert build_graph(settings, llm_overrides={"critic": critic_llm}) is overridden
+    assert overridden is not default
+    assert overridden.critic_agent.llm is critic_llm
+    assert overridden.action_agent.llm is not critic_llm
+
+
+def test_graph_not_reused_for_a_new_settings_object():
+    first = build_graph(settings.model_copy())
+    gc.collect()
+
+    # The cache keeps the first copy alive, so this one cannot take its id.
+    assert build_graph(settings.model_copy()) is not first
+
+
+def test_unknown_llm_role_rejected():
+    with pytest.raises(ValueError):
+        build_graph(settings, llm_overrides={"planner": MagicMock(spec=BaseLLMClient)})
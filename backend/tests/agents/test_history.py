@@ -0,0 +1,42 @@
+import pytest
+
+from app.context.history import TaskHistory, TaskRecord
+from app.core.deps import get_graph
+
+
+def test_history_is_bounded():
+    history = TaskHistory(maxlen=3)
+    for i in range(5):
+        history = history.add(f"Task {i}", "Success")
+
+    assert len(history) == 3
+    assert history.recent(2) == [TaskRecord("Task 3", "Success"), TaskRecord("Task 4", "Success")]
+    assert TaskHistory.from_list(history.to_list(), maxlen=3) == history
+
+
+@pytest.mark.asyncio
+async def test_outcomes_stay_in_their_session():
+    window_a, window_b = TaskHistory(), TaskHistory()
+
+    update = await get_graph().failure_node({"task": "Cook the patty", "history": window_a})
+    window_a = update["history"]
+
+    assert window_a.recent(1) == [TaskRecord("Cook the patty", "Failed")]
+    assert len(window_b) == 0
+
+    human = get_graph().curriculum_agent.render_human_message("ctx", [], window_b)
+    assert "Cook the patty" not in human.content
+
+
+@pytest.mark.asyncio
+async def test_nodes_do_not_mutate_the_input_history():
+    history = TaskHistory().add("Chop the tomato", "Success")
+    state = {"task": "Cook the patty", "history": history, "plan": [], "skill_guide": ""}
+
+    failed = await get_graph().failure_node(state)
+
+    assert state["history"] is history
+    assert history.recent(5) == [TaskRecord("Chop the tomato", "Success")]
+    assert failed["history"].recent(5) == [
+        TaskRecord("Chop the tomato", "Success"), TaskRecord("Cook the patty", "Failed"),
+    ]
@@ -0,0 +1,49 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.agents.base import repair_json
+from app.agents.critic import CriticAgent
+from app.api.schemas import CriticOutput
+from app.core.metrics import metrics
+from app.llm.base import BaseLLMClient
+
+
+@pytest.mark.parametrize("broken, expected", [
+    ('{"task": "Chop", "difficulty": 2,}', {"task": "Chop", "difficulty": 2}),
+    ('{"plan": [1, 2,],}', {"plan": [1, 2]}),
+    ("Sure: {'task': 'It\\'s raw', 'done': True, 'next': None}",
+     {"task": "It's raw", "done": True, "next": None}),
+    ('{"reasoning": "line one\nline two"}', {"reasoning": "line one\nline two"}),
+    ('```json\n{"success": false, "reasoning": "cut off', {"success": False, "reasoning": "cut off"}),
+    ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+    ('{"a": 1} and then prose {', {"a": 1}),
+    ('Per [C] the tomato is sliced: {"task": "Plate it", "difficulty": 2,}',
+     {"task": "Plate it", "difficulty": 2}),
+    ("Per [C] nothing else: [1, 2,", [1, 2]),
+])
+def test_repair_json(broken, expected):
+    assert json.loads(repair_json(broken)) == expected
+
+
+def test_repair_json_without_json():
+    assert repair_json("I could not decide, see [C].") is None
+
+
+@pytest.mark.asyncio
+async def test_critic_repairs_before_reprompting():
+    llm = MagicMock(spec=BaseLLMClient)
+    llm.generate_response = AsyncMock(
+        return_value='{"success": true, "reasoning": "Plate is\nset", "feedback": "",}'
+    )
+    repaired = metrics.counter("agent.critic.repaired").value
+    reprompted = metrics.counter("agent.critic.reprompted").value
+
+    result = await CriticAgent(llm).check_task_success("ctx", "Set up the plate")
+
+    assert result == CriticOutput(success=True, reasoning="Plate is\nset", feedback="")
+    llm.generate_response.assert_awaited_once()
+    assert metrics.counter("agent.critic.repaired").value == repaired + 1
+    assert metrics.counter("agent.critic.reprompted").value == reprompted
@@ -0,0 +1,30 @@
+import pytest
+
+from app.agents.json_stream import extract_json, iter_json_values
+
+CRITIC_REPLY = (
+    'Looking at [C] and [B], here is my verdict:\n'
+    '```json\n{"success": false, "reasoning": "Hands hold [TOMATO] \\"raw\\"", "feedback": "Chop it"}\n```'
+)
+
+
+def test_iter_json_values_skips_prose_brackets():
+    assert list(iter_json_values(CRITIC_REPLY + ' and [1, 2]')) == [
+        {"success": False, "reasoning": 'Hands hold [TOMATO] "raw"', "feedback": "Chop it"},
+        [1, 2],
+    ]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('[{"function": "chop"}]', [{"function": "chop"}]),
+    ('Plan: [{"function": "chop"}, {"function": "cook"}] done', [{"function": "chop"}, {"function": "cook"}]),
+    ('[1] then {"task": "X", "reasoning": "[C]"}', {"task": "X", "reasoning": "[C]"}),
+    # Not JSON as a whole (trailing comma): its first valid object wins.
+    ('[{"a": 1}, {"b": 2},]', {"a": 1}),
+    # An unclosed prose bracket doesn't hide the value inside it.
+    ('See [note {"task": "Y"} for details', {"task": "Y"}),
+    ('Mismatched [C} then {"task": "Z"}', {"task": "Z"}),
+    ("no json here", None),
+])
+def test_extract_json(text, expected):
+    assert extract_json(text) == expected
@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.agents.plan_cache import (
+    InMemoryPlanCache,
+    RedisPlanCache,
+    perception_fingerprint,
+)
+from app.api.schemas import AgentAction
+from app.core.deps import get_graph
+
+agents = get_graph()
+PLAN = [
+    AgentAction(function="move_to", args={"id": "TomatoBox"}),
+    AgentAction(function="pickup", args={"id": "TomatoBox"}),
+]
+PREP = {"Preparation1": "TomatoSlice"}
+
+
+def test_fingerprint_ignores_irrelevant_fields(make_perception):
+    assert perception_fingerprint(make_perception(reachable=PREP, hour=10)) == \
+        perception_fingerprint(make_perception(reachable=PREP, hour=18))
+    assert perception_fingerprint(make_perception(reachable=PREP)) != perception_fingerprint(
+        make_perception(held="TOMATO", reachable=PREP)
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    cache = InMemoryPlanCache(max_entries=2)
+    await cache.put("a", "fp", PLAN)
+    await cache.put("b", "fp", PLAN)
+    assert await cache.get("a", "fp") == PLAN
+    await cache.put("c", "fp", PLAN)
+
+    assert await cache.get("b", "fp") is None
+    assert await cache.get("a", "fp") == PLAN
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_falls_back_to_memory(fake_redis):
+    cache = RedisPlanCache(fake_redis)
+    await cache.put("Chop the tomato", "fp", PLAN)
+    assert len(fake_redis.data) == 1
+
+    fake_redis.down = True
+    assert await cache.get("chop  the TOMATO", "fp") == PLAN
+
+
+@pytest.mark.asyncio
+async def test_confirmed_plan_skips_action_llm(make_perception):
+    state = {
+        "perception": make_perception(reachable=PREP),
+        "context": "ctx",
+        "task": "Chop the tomato",
+        "skill_guide": "",
+        "plan": [],
+        "critique": None,
+        "retry_count": 0,
+    }
+    generate_plan = AsyncMock(return_value=PLAN)
+
+    with patch.object(agents, "plan_cache", InMemoryPlanCache()), \
+            patch.object(agents.action_agent, "generate_plan", generate_plan), \
+            patch.object(agents.skill_learner, "enqueue", AsyncMock()):
+        state.update(await agents.action_node(state, {}))
+        assert state["plan_source"] == "llm"
+        # The critic confirmed it on the next frame.
+        await agents.learning_node(state)
+
+        update = await agents.action_node({**state, "plan": []}, {})
+
+    assert generate_plan.await_count == 1
+    assert update["plan"] == PLAN
+    assert update["plan_source"] == "cache"
@@ -0,0 +1,56 @@
+from app.agents.planner import plan_symbolically
+
+
+def _steps(plan) -> list[tuple[str, str]]:
+    return [(a.function, a.args["id"]) for a in plan]
+
+
+def test_plate_setup(make_perception):
+    plan = plan_symbolically("Set up the assembly plate on Preparation1", make_perception())
+
+    assert _steps(plan) == [
+        ("move_to", "PlateBoard"), ("pickup", "PlateBoard"),
+        ("move_to", "Preparation1"), ("put_down", "Preparation1"),
+    ]
+    # Hands full of something else: not a template case.
+    assert plan_symbolically(
+        "Set up the assembly plate on Preparation1", make_perception(held="TOMATO")
+    ) is None
+
+
+def test_prep_parks_on_free_table_away_from_plate(make_perception):
+    perception = make_perception(
+        tables={"Preparation1": "PLATE", "Preparation2": "CheeseSlice", "Preparation3": None},
+        assembly={"plate_location": "Preparation1"},
+    )
+
+    plan = plan_symbolically("Prepare CookedMeat and place it on a Preparation table", perception)
+
+    assert _steps(plan) == [
+        ("move_to", "MeatBox"), ("pickup", "MeatBox"),
+        ("move_to", "Oven"), ("put_down", "Oven"), ("cook", "Oven"), ("pickup", "Oven"),
+        ("move_to", "Preparation3"), ("put_down", "Preparation3"),
+    ]
+
+
+def test_stack_from_parked_source(make_perception):
+    assembly = {"plate_location": "Preparation1", "stack": ["BreadSlice"], "next_expected": "CookedMeat"}
+    perception = make_perception(
+        tables={"Preparation1": "BreadSlice", "Preparation2": "COOKED_MEAT"}, assembly=assembly,
+    )
+
+    plan = plan_symbolically("Stack CookedMeat onto the plate at Preparation1", perception)
+
+    assert _steps(plan) == [
+        ("move_to", "Preparation2"), ("pickup", "Preparation2"),
+        ("move_to", "Preparation1"), ("put_down", "Preparation1"),
+    ]
+    # Out of order for Unity, or nothing to pick up: defer to the LLM.
+    assert plan_symbolically("Stack TomatoSlice onto the plate at Preparation1", perception) is None
+    assert plan_symbolically(
+        "Stack CookedMeat onto the plate at Preparation1", make_perception(assembly=assembly)
+    ) is None
+
+
+def test_unrecognised_task(make_perception):
+    assert plan_symbolically("Clean up the raw tomato on Preparation2", make_perception()) is None
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock
+
+from app.agents.action import ActionAgent
+from app.context.budget import (
+    PromptSection,
+    TokenBudget,
+    TokenCounter,
+    perception_sections,
+)
+from app.context.view import build_perception_context
+from app.core.metrics import metrics
+from app.llm.base import BaseLLMClient
+
+CONTEXT = (
+    "### [A] SELF STATE\nHolding: nothing\n\n"
+    "### [B] IMMEDIATE AFFORDANCES (what you can do right now)\n"
+    + "".join(f"- Affordance {i}\n" for i in range(6)) + "\n"
+    "### [C] KITCHEN STATE (supply check)\n"
+    "READY ingredients (Unity aggregate, no prep table in sight): TOMATOSLICE:1.\n\n"
+    "### [D] SHORT-TERM MEMORY (recent actions)\n"
+    + "\n".join(f"- ✅ step {i}" for i in range(4)) + "\n\n"
+    "### [E] FAILURE CONTEXT\nNo recent failures. Proceed with the plan."
+)
+
+
+def _budget(limit):
+    return TokenBudget(limit, TokenCounter(), name="test")
+
+
+def test_perception_sections_round_trip(dummy_perception):
+    context = build_perception_context(dummy_perception, current_task="Chop")
+    sections = perception_sections(context)
+
+    assert [s.name for s in sections] == ["[A]", "[B]", "[C]", "[D]", "[E]", "[F]"]
+    assert "".join(s.text for s in sections) == context
+
+
+def test_under_budget_is_untouched():
+    sections = perception_sections(CONTEXT)
+    assert _budget(10_000).fit("system", sections) == CONTEXT
+
+
+def test_trims_in_priority_order():
+    trims = metrics.counter("budget.trims.test.[D]")
+    before = trims.value
+    full = len(CONTEXT) // 4
+
+    # Just over: capping the history window is enough.
+    fitted = _budget(full - 5).fit("", perception_sections(CONTEXT))
+    assert "step 1" not in fitted and "step 3" in fitted
+    assert "Unity aggregate" in fitted and "Affordance 5" in fitted
+    assert trims.value == before + 1
+
+    # Far over: out-of-reach [C] lines go before [B] is capped.
+    fitted = _budget(full - 32).fit("", perception_sections(CONTEXT))
+    assert "Unity aggregate" not in fitted
+    assert "Affordance 3" in fitted and "Affordance 4" not in fitted
+    assert "### [B]" in fitted and "### [E]" in fitted
+
+
+def test_over_budget_after_all_trims_is_sent_and_counted():
+    over = metrics.counter("budget.over_limit.test")
+    before = over.value
+
+    fitted = _budget(1).fit("", [PromptSection("task", "Chop the tomato")])
+
+    assert fitted == "Chop the tomato"
+    assert over.value == before + 1
+
+
+def test_action_agent_drops_failed_plan_before_affordances(dummy_perception):
+    context = build_perception_context(dummy_perception, current_task="Chop")
+    agent = ActionAgent(MagicMock(spec=BaseLLMClient))
+    kwargs = dict(
+        context=context,
+        current_task="Chop",
+        skill_guide="1. move_to CutBoard",
+        last_plan=[{"function": "move_to", "args": {"id": "TomatoBox" * 200}}],
+        critique="Wrong box",
+    )
+    unbounded = agent.render_human_message(**kwargs).content
+    counter = TokenCounter()
+    full = counter.count(agent.system_prompts) + counter.count(unbounded)
+
+    agent.budget = _budget(full - 100)
+    fitted = agent.render_human_message(**kwargs).content
+
+    assert "TomatoBoxTomatoBox" not in fitted
+    assert "Error/Critique: Wrong box" in fitted
+    assert "--- SUGGESTED PROCEDURE (MEMORY) ---" in fitted
+    assert fitted.split("### [B]")[1].split("### [C]")[0] == \
+        unbounded.split("### [B]")[1].split("### [C]")[0]
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+
+from app.agents.action import ActionAgent
+from app.agents.critic import CriticAgent
+from app.agents.skill import SkillAgent
+from app.context.view import build_perception_context, kitchen_layout_section
+from app.llm.base import BaseLLMClient
+
+
+def test_layout_is_in_the_system_prompt_not_the_perception(dummy_perception):
+    llm = MagicMock(spec=BaseLLMClient)
+    critic = CriticAgent(llm)
+    context = build_perception_context(dummy_perception, current_task="Chop")
+
+    assert critic.system_prompts.endswith(kitchen_layout_section())
+    assert "[LAYOUT] CANONICAL" not in context
+    assert "[LAYOUT] CANONICAL" not in critic.render_human_message(context, "Chop").content
+    # The skill agent never sees perception.
+    assert "[LAYOUT] CANONICAL" not in SkillAgent(llm, memory_store=MagicMock()).system_prompts
+
+
+def test_system_prompt_is_byte_stable():
+    tools = [MagicMock(args_schema=None), MagicMock(args_schema=None)]
+    tools[0].name, tools[1].name = "pickup", "move_to"
+
+    first = ActionAgent(MagicMock(spec=BaseLLMClient), tools=tools).system_prompts
+    second = ActionAgent(MagicMock(spec=BaseLLMClient), tools=tools[::-1]).system_prompts
+
+    assert first == second
+    assert first.index("move_to") < first.index("pickup")
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.agents.skill import SkillAgent
+from app.agents.skill_jobs import InMemoryJobQueue, RedisJobQueue, SkillLearningQueue
+
+
+def _agent(results: list[bool]) -> SkillAgent:
+    agent = MagicMock(spec=SkillAgent)
+    agent.learn_new_skill = AsyncMock(side_effect=results)
+    return agent
+
+
+async def _until(predicate, timeout: float = 1.0):
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_with_backoff():
+    agent = _agent([False, True])
+    learner = SkillLearningQueue(InMemoryJobQueue(), agent, workers=1, backoff_s=0.01, poll_s=0.01)
+
+    await learner.enqueue("Chop the tomato", [{"function": "chop", "args": {"id": "CutBoard"}}])
+    try:
+        await _until(lambda: agent.learn_new_skill.await_count == 2)
+    finally:
+        await learner.stop()
+
+    assert agent.learn_new_skill.await_args.kwargs["task"] == "Chop the tomato"
+
+
+@pytest.mark.asyncio
+async def test_job_dropped_after_max_attempts():
+    agent = _agent([False, RuntimeError("llm down"), False, True])
+    learner = SkillLearningQueue(
+        InMemoryJobQueue(), agent, workers=1, max_attempts=3, backoff_s=0.001, poll_s=0.01
+    )
+
+    await learner.enqueue("Cook the patty", [])
+    try:
+        await _until(lambda: agent.learn_new_skill.await_count == 3)
+        await asyncio.sleep(0.05)
+    finally:
+        await learner.stop()
+
+    assert agent.learn_new_skill.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_queue_acks_and_retries(fake_redis):
+    queue = RedisJobQueue(fake_redis, name="jobs", worker_id="w1")
+
+    await queue.push("a")
+    await queue.push("b")
+    assert await queue.reserve(0) == "a"
+    assert fake_redis.lists["jobs:processing:w1"] == ["a"]
+
+    await queue.retry("a", "a2", delay_s=0)
+    assert fake_redis.lists["jobs:processing:w1"] == []
+    # Due retries are promoted behind jobs already pending.
+    assert await queue.reserve(0) == "b"
+    assert await queue.reserve(0) == "a2"
+    await queue.ack("b")
+    await queue.dead_letter("a2")
+    assert fake_redis.lists["jobs:processing:w1"] == []
+    assert fake_redis.lists["jobs:dead"] == ["a2"]
+
+
+@pytest.mark.asyncio
+async def test_redis_queue_recovers_only_dead_workers_jobs(fake_redis):
+    live, dead, me = (RedisJobQueue(fake_redis, name="jobs", worker_id=w) for w in ("live", "dead", "me"))
+    for queue, job in ((live, "running"), (dead, "orphaned"), (me, "mine")):
+        await queue.heartbeat()
+        await queue.push(job)
+        assert await queue.reserve(0) == job
+    del fake_redis.data["jobs:alive:dead"]  # heartbeat expired
+
+    assert await me.recover() == 1
+    assert fake_redis.lists["jobs"] == ["orphaned"]
+    assert fake_redis.lists["jobs:processing:live"] == ["running"]
+    assert fake_redis.lists["jobs:processing:me"] == ["mine"]
+    assert fake_redis.sets["jobs:workers"] == {"live", "me"}
+
+    # At startup, this worker id's own list is from a previous run.
+    assert await me.recover(include_own=True) == 1
+    assert fake_redis.lists["jobs:processing:live"] == ["running"]
+
+
+@pytest.mark.asyncio
+async def test_malformed_job_is_dead_lettered_and_worker_survives():
+    queue = InMemoryJobQueue()
+    agent = _agent([True])
+    learner = SkillLearningQueue(queue, agent, workers=1, poll_s=0.01)
+
+    await queue.push("not json")
+    await queue.push(json.dumps({"task": "missing fields"}))
+    await learner.enqueue("Chop the tomato", [])
+    try:
+        await _until(lambda: agent.learn_new_skill.await_count == 1)
+    finally:
+        await learner.stop()
+
+    assert len(queue.dead) == 2
+
+
+@pytest.mark.asyncio
+async def test_learning_job_payload_is_json():
+    queue = InMemoryJobQueue()
+    learner = SkillLearningQueue(queue, _agent([]), workers=0)
+
+    await learner.enqueue("Stack the burger", [{"function": "put_down", "args": {"id": "Plate"}}])
+
+    job = json.loads(await queue.reserve(0.1))
+    assert job["task"] == "Stack the burger"
+    assert job["attempts"] == 0
@@ -0,0 +1,91 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.agents import graph
+from app.api.schemas import CriticOutput, CurriculumOutput, Perception
+from app.core.config import settings
+from app.core.deps import get_graph
+from app.core.metrics import metrics
+
+NEXT = CurriculumOutput(task="Chop the lettuce", reasoning="next", difficulty=2)
+
+agents = get_graph()
+
+
+def _state(task: str = "Chop the tomato", retry_count: int = 0) -> dict:
+    return {
+        "perception": Perception.model_validate(
+            {"self": {"time_hour": 10, "current_zone": "Kitchen"}, "sensory": {}, "statistics": {}}
+        ),
+        "context": "ctx",
+        "task": task,
+        "skill_guide": "",
+        "plan": [],
+        "critique": None,
+        "retry_count": retry_count,
+    }
+
+
+@pytest.fixture
+def speculative():
+    with patch.object(settings, "SPECULATIVE_CURRICULUM", True):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_proposal_reused_when_critic_closes_task(speculative):
+    propose = AsyncMock(return_value=NEXT)
+    critic = AsyncMock(return_value=CriticOutput(success=True, reasoning="done", feedback=""))
+    hits = metrics.counter("curriculum.speculative_hits").value
+
+    with patch.object(agents.curriculum_agent, "propose_next_task", propose), \
+            patch.object(agents.critic_agent, "check_task_success", critic):
+        state = _state()
+        state.update(await agents.critic_node(state))
+        assert state["speculative_proposal"] == NEXT
+
+        update = await agents.curriculum_node(state)
+
+    assert update["task"] == "Chop the lettuce"
+    assert update["speculative_proposal"] is None
+    assert propose.await_count == 1
+    assert metrics.counter("curriculum.speculative_hits").value == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_proposal_cancelled_when_critic_retries(speculative):
+    started = asyncio.Event()
+
+    async def slow_proposal(context, history=None):
+        started.set()
+        await asyncio.sleep(10)
+
+    async def critic(**kwargs):
+        await started.wait()
+        return CriticOutput(success=False, reasoning="not yet", feedback="try again")
+
+    misses = metrics.counter("curriculum.speculative_misses").value
+    wasted = metrics.counter("curriculum.speculative_wasted_tokens_est").value
+
+    with patch.object(agents.curriculum_agent, "propose_next_task", slow_proposal), \
+            patch.object(agents.critic_agent, "check_task_success", critic):
+        update = await asyncio.wait_for(agents.critic_node(_state()), timeout=1)
+
+    assert "speculative_proposal" not in update
+    assert graph.decide_next_node({**_state(), **update}) == "action"
+    assert metrics.counter("curriculum.speculative_misses").value == misses + 1
+    assert metrics.counter("curriculum.speculative_wasted_tokens_est").value > wasted
+
+
+@pytest.mark.asyncio
+async def test_proposal_repeating_judged_task_is_discarded():
+    stale = CurriculumOutput(task="Chop the tomato", reasoning="again", difficulty=1)
+    propose = AsyncMock(return_value=NEXT)
+
+    with patch.object(agents.curriculum_agent, "propose_next_task", propose):
+        update = await agents.curriculum_node({**_state(), "speculative_proposal": stale})
+
+    assert update["task"] == "Chop the lettuce"
+    assert propose.await_count == 1
@@ -0,0 +1,85 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.agents.action import ActionAgent
+from app.agents.critic import CriticAgent
+from app.api.schemas import ActionPlan, AgentAction, CriticOutput
+from app.core.metrics import metrics
+from app.llm.base import BaseLLMClient
+
+VERDICT = CriticOutput(success=True, reasoning="Plate is set", feedback="")
+
+
+def _llm(structured=None, text=None) -> MagicMock:
+    llm = MagicMock(spec=BaseLLMClient)
+    llm.generate_structured = AsyncMock(**structured) if structured else AsyncMock()
+    llm.generate_response = AsyncMock(**text) if text else AsyncMock()
+    return llm
+
+
+def _counts(agent: str, mode: str) -> tuple[int, int]:
+    return (
+        metrics.counter(f"agent.{agent}.calls.{mode}").value,
+        metrics.counter(f"agent.{agent}.retries.{mode}").value,
+    )
+
+
+@pytest.mark.asyncio
+async def test_structured_critic_skips_text_parsing():
+    llm = _llm(structured={"return_value": VERDICT})
+    before = _counts("critic", "structured")
+
+    result = await CriticAgent(llm, output_mode="structured").check_task_success("ctx", "Set up")
+
+    assert result == VERDICT
+    assert llm.generate_structured.await_args.kwargs["response_model"] is CriticOutput
+    llm.generate_response.assert_not_awaited()
+    calls, retries = _counts("critic", "structured")
+    assert (calls - before[0], retries - before[1]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_structured_failure_falls_back_to_text():
+    llm = _llm(
+        structured={"side_effect": ValueError("schema not supported")},
+        text={"return_value": VERDICT.model_dump_json()},
+    )
+    before = _counts("critic", "structured")
+
+    result = await CriticAgent(llm, output_mode="structured").check_task_success("ctx", "Set up")
+
+    assert result == VERDICT
+    calls, retries = _counts("critic", "structured")
+    assert (calls - before[0], retries - before[1]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_text_mode_counts_reprompts():
+    llm = _llm(text={"side_effect": ["not json", VERDICT.model_dump_json()]})
+    before = _counts("critic", "text")
+
+    assert await CriticAgent(llm).check_task_success("ctx", "Set up") == VERDICT
+
+    llm.generate_structured.assert_not_awaited()
+    calls, retries = _counts("critic", "text")
+    assert (calls - before[0], retries - before[1]) == (1, 1)
+    assert metrics.gauge("agent.critic.retry_rate.text").value > 0
+
+
+@pytest.mark.asyncio
+async def test_structured_action_plan_unwraps_actions():
+    steps = [AgentAction(function="move_to", args={"id": "PlateBoard"})]
+    llm = _llm(structured={"return_value": ActionPlan(actions=steps)})
+
+    plan = await ActionAgent(llm, output_mode="structured").generate_plan(
+        context="ctx", current_task="Set up"
+    )
+
+    assert plan == steps
+    assert llm.generate_structured.await_args.kwargs["response_model"] is ActionPlan
+
+
+def test_unknown_output_mode_rejected():
+    with pytest.raises(ValueError):
+        CriticAgent(_llm(), output_mode="xml")
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.api.admission import AdmissionController
+from app.core.exceptions import AgentBusyError
+from app.core.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_per_client_bucket_rejects_with_retry_hint():
+    admission = AdmissionController(client_rate_per_s=2.0, client_burst=2)
+
+    for _ in range(2):
+        async with admission.admit("chatty"):
+            pass
+
+    with pytest.raises(AgentBusyError) as excinfo:
+        async with admission.admit("chatty"):
+            pass
+    assert 0 < excinfo.value.client_details["retry_after_ms"] <= 501
+
+    # Other clients have their own bucket.
+    async with admission.admit("quiet"):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_global_cap_queues_then_times_out():
+    admission = AdmissionController(max_in_flight=1, queue_timeout_s=0.05, client_burst=10)
+    release = asyncio.Event()
+
+    async def hold_slot():
+        async with admission.admit("a"):
+            await release.wait()
+
+    holder = asyncio.create_task(hold_slot())
+    try:
+        await asyncio.sleep(0.01)
+        assert admission.in_flight == 1
+
+        with pytest.raises(AgentBusyError):
+            async with admission.admit("b"):
+                pass
+
+        # A waiter that arrives while the slot is busy gets it once it frees up.
+        waiter = asyncio.create_task(_admit_once(admission, "c"))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.wait_for(waiter, timeout=1)
+    finally:
+        release.set()
+        await holder
+
+    assert admission.in_flight == 0
+    assert metrics.histogram("admission.queue_wait_ms").count >= 2
+
+
+async def _admit_once(admission: AdmissionController, client_id: str):
+    async with admission.admit(client_id):
+        pass
@@ -0,0 +1,58 @@
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langgraph.checkpoint.memory import InMemorySaver
+
+from app.api import routes
+from app.api.schemas import AgentAction, CriticOutput, CurriculumOutput
+from app.core.deps import get_graph
+from app.main import app
+
+PERCEPTION = {
+    "self": {"time_hour": 10, "current_zone": "Kitchen_01", "held_item": None},
+    "sensory": {"player_nearby": False, "visible_objects": [], "reachable_objects": []},
+    "statistics": {"table_item_count": 0, "table_items": []},
+}
+PLAN = [AgentAction(function="move_to", args={"id": "TomatoBox"})]
+
+
+def test_websocket_session_restored_from_checkpoint():
+    graph = get_graph()
+    checkpointed = graph.workflow.compile(checkpointer=InMemorySaver())
+    invoke = AsyncMock(wraps=checkpointed.ainvoke)
+    generate_plan = AsyncMock(return_value=PLAN)
+
+    with patch.object(graph, "checkpointed_app", checkpointed), \
+            patch.object(checkpointed, "ainvoke", invoke), \
+            patch.object(graph.curriculum_agent, "propose_next_task", AsyncMock(
+                return_value=CurriculumOutput(task="Chop the tomato", reasoning="", difficulty=1)
+            )), \
+            patch.object(graph.skill_agent, "retrieve_skill", AsyncMock(return_value="guide")), \
+            patch.object(graph.action_agent, "generate_plan", generate_plan), \
+            patch.object(graph.critic_agent, "check_task_success", AsyncMock(
+                return_value=CriticOutput(success=False, reasoning="", feedback="Pick it up first")
+            )):
+        client = TestClient(app)
+        with client.websocket_connect("/api/ws/agent/chef") as websocket:
+            websocket.send_json(PERCEPTION)
+            assert websocket.receive_json()["task"] == "Chop the tomato"
+
+            # Second frame: only the perception goes in, the rest comes
+            # from the thread's checkpoint.
+            websocket.send_json(PERCEPTION)
+            assert websocket.receive_json()["plan"][0]["args"] == {"id": "TomatoBox"}
+
+        graph_input, config = invoke.await_args.args
+        assert set(graph_input) == {"perception", "context", "critique"}
+        assert config == {"configurable": {"thread_id": "chef"}}
+        retry = generate_plan.await_args.kwargs
+        assert retry["critique"] == "Pick it up first"
+        assert retry["last_plan"] == [PLAN[0].model_dump()]
+
+        # A new connection resumes the loop from the checkpoint.
+        assert routes.session_store._sessions.get("chef") is None
+        with client.websocket_connect("/api/ws/agent/chef") as websocket:
+            websocket.send_json(PERCEPTION)
+            websocket.receive_json()
+        graph_input, _ = invoke.await_args.args
+        assert "task" not in graph_input
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.api.cluster import ClusterBroadcaster, SessionLease
+from app.api.connections import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive_until_released(fake_redis):
+    first = SessionLease(fake_redis, "unity-1", "worker-a", ttl_ms=1000)
+    second = SessionLease(fake_redis, "unity-1", "worker-b", ttl_ms=1000)
+
+    assert await first.acquire(timeout_s=0)
+    assert not await second.acquire(timeout_s=0.05)
+
+    await first.release()
+    assert await second.acquire(timeout_s=0)
+    await second.release()
+    assert fake_redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_stale_release_does_not_evict_new_owner(fake_redis):
+    old = SessionLease(fake_redis, "unity-1", "worker-a", ttl_ms=1000)
+    assert await old.acquire(timeout_s=0)
+
+    # Lease expired and another worker took over.
+    fake_redis.data.clear()
+    new = SessionLease(fake_redis, "unity-1", "worker-b", ttl_ms=1000)
+    assert await new.acquire(timeout_s=0)
+
+    await old.release()
+    assert fake_redis.data[new.key] == new.token
+    await new.release()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_flags_lost_lease(fake_redis):
+    lease = SessionLease(fake_redis, "unity-1", "worker-a", ttl_ms=30)
+    assert await lease.acquire(timeout_s=0)
+
+    fake_redis.data[lease.key] = "someone-else"
+    await asyncio.wait_for(lease.lost.wait(), timeout=1)
+    await lease.release()
+    assert fake_redis.data[lease.key] == "someone-else"
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_sockets_on_every_worker(fake_redis):
+    managers = [ConnectionManager(), ConnectionManager()]
+    sockets = [FakeWebSocket(), FakeWebSocket()]
+    broadcasters = [ClusterBroadcaster(fake_redis, m) for m in managers]
+    for i, (manager, ws, broadcaster) in enumerate(zip(managers, sockets, broadcasters, strict=True)):
+        await manager.connect(ws, f"unity-{i}")
+        await broadcaster.start()
+    await _drain()
+
+    try:
+        await broadcasters[0].publish({"event": "round_start"})
+        await _drain()
+        assert [ws.sent for ws in sockets] == [[{"event": "round_start"}]] * 2
+    finally:
+        for broadcaster in broadcasters:
+            await broadcaster.stop()
+
+
+def test_failed_session_setup_releases_the_lease(fake_redis):
+    from unittest.mock import AsyncMock, patch
+
+    from fastapi.testclient import TestClient
+
+    from app.api import routes
+    from app.main import app
+
+    with patch.object(routes, "redis_client", fake_redis), \
+            patch.object(routes, "broadcaster", ClusterBroadcaster(fake_redis, routes.manager)), \
+            patch.object(routes, "_load_session", AsyncMock(side_effect=RuntimeError("db down"))):
+        with pytest.raises(RuntimeError):
+            with TestClient(app).websocket_connect("/api/ws/agent/chef"):
+                pass
+
+    assert fake_redis.data == {}
@@ -0,0 +1,58 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api.codecs import MSGPACK_SUBPROTOCOL, MsgpackCodec
+from app.api.schemas import AgentAction, Perception
+from app.prompts.loader import BASE_DIR
+
+
+def test_msgpack_decodes_into_same_perception_as_json():
+    frame = json.loads(
+        (BASE_DIR / "perception_send_from_unity_example.txt").read_text(encoding="utf-8")
+    )
+    packed = MsgpackCodec.encode(frame)
+
+    assert len(packed) < len(json.dumps(frame, separators=(",", ":")))
+    assert Perception.model_validate(MsgpackCodec.decode(packed)) == Perception.model_validate(frame)
+
+
+def test_msgpack_encodes_agent_actions_directly():
+    action = AgentAction(function="move_to", args={"id": "Oven"})
+
+    decoded = MsgpackCodec.decode(MsgpackCodec.encode({"plan": [action]}))
+
+    assert decoded == {"plan": [action.model_dump()]}
+
+
+def test_websocket_msgpack_subprotocol():
+    from unittest.mock import AsyncMock, patch
+
+    from app.core.deps import get_graph
+    from app.main import app
+
+    payload = {
+        "self": {"time_hour": 10, "current_zone": "Kitchen_01", "held_item": None},
+        "sensory": {"player_nearby": False},
+        "statistics": {},
+    }
+    final_state = {
+        "task": "Set up the assembly plate on Preparation1",
+        "plan": [AgentAction(function="move_to", args={"id": "PlateBoard"})],
+        "skill_guide": "",
+        "critique": None,
+        "retry_count": 0,
+    }
+
+    with patch.object(get_graph().app, "ainvoke", new_callable=AsyncMock) as mock_invoke:
+        mock_invoke.return_value = final_state
+        client = TestClient(app)
+        with client.websocket_connect(
+            "/api/ws/agent/msgpack-1", subprotocols=[MSGPACK_SUBPROTOCOL],
+        ) as websocket:
+            assert websocket.accepted_subprotocol == MSGPACK_SUBPROTOCOL
+            websocket.send_bytes(MsgpackCodec.encode(payload))
+            response = MsgpackCodec.decode(websocket.receive_bytes())
+
+    assert response["task"] == final_state["task"]
+    assert response["plan"][0] == {"thought_trace": None, "function": "move_to", "args": {"id": "PlateBoard"}}
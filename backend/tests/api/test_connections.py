@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from app.api.connections import DISCONNECT, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False):
+        self.sent: list[dict] = []
+        self.closed_with: int | None = None
+        self._gate = asyncio.Event()
+        if not stalled:
+            self._gate.set()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_json(self, message):
+        await self._gate.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_on_stalled_peer():
+    manager = ConnectionManager(queue_size=4)
+    fast, slow = FakeWebSocket(), FakeWebSocket(stalled=True)
+    await manager.connect(fast, "fast")
+    await manager.connect(slow, "slow")
+
+    await asyncio.wait_for(manager.broadcast({"msg": "hi"}), timeout=0.5)
+    await _drain()
+
+    assert fast.sent == [{"msg": "hi"}]
+
+    await manager.broadcast({"msg": "again"})
+    assert slow.sent == []
+    assert manager.queue_depths()["slow"] == 1  # first one is stuck in send
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_oldest():
+    manager = ConnectionManager(queue_size=2)
+    slow = FakeWebSocket(stalled=True)
+    await manager.connect(slow, "slow")
+
+    for i in range(4):
+        await manager.send_personal_message({"i": i}, "slow")
+        await _drain()  # writer takes {"i": 0} and blocks on it
+
+    slow._gate.set()
+    await _drain()
+
+    assert slow.sent == [{"i": 0}, {"i": 2}, {"i": 3}]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_disconnects_under_disconnect_policy():
+    manager = ConnectionManager(queue_size=1, full_policy=DISCONNECT)
+    slow = FakeWebSocket(stalled=True)
+    await manager.connect(slow, "slow")
+
+    assert await manager.send_personal_message({"i": 0}, "slow")
+    await _drain()  # writer takes {"i": 0} and blocks on it
+    assert await manager.send_personal_message({"i": 1}, "slow")
+    assert not await manager.send_personal_message({"i": 2}, "slow")
+
+    assert "slow" not in manager.active_connections
+    assert slow.closed_with == 1013
+
+
+@pytest.mark.asyncio
+async def test_stale_disconnect_does_not_evict_new_socket():
+    manager = ConnectionManager()
+    old, new = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(old, "42")
+    await manager.connect(new, "42")
+
+    await manager.disconnect("42", old)
+
+    assert manager.active_connections["42"].websocket is new
+
+
+@pytest.mark.asyncio
+async def test_reconnect_closes_old_socket_and_drops_its_replies():
+    manager = ConnectionManager()
+    old, new = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(old, "42")
+    await manager.connect(new, "42")
+
+    # The old loop finishes a plan it started before the reconnect.
+    assert not await manager.send_personal_message({"plan": "old"}, "42", old)
+    assert await manager.send_personal_message({"plan": "new"}, "42", new)
+    await _drain()
+
+    assert old.closed_with == 4409
+    assert new.sent == [{"plan": "new"}]
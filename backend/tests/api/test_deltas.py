@@ -0,0 +1,98 @@
+import pytest
+
+from app.api.deltas import PerceptionMaterializer
+from app.api.schemas import Perception
+from app.core.exceptions import InvalidPerceptionError, PerceptionResyncRequired
+
+
+def _full_frame(seq: int) -> dict:
+    return {
+        "seq": seq,
+        "self": {"time_hour": 9, "current_zone": "Kitchen", "held_item": None},
+        "sensory": {
+            "player_nearby": False,
+            "visible_objects": [
+                {"id": "TomatoBox", "state": {"held_item": "TOMATO"}},
+                {"id": "Oven", "state": {}},
+            ],
+            "reachable_objects": [{"id": "CutBoard", "state": {}}],
+        },
+        "statistics": {"table_item_count": 0, "table_items": []},
+    }
+
+
+def test_legacy_frames_pass_through():
+    materializer = PerceptionMaterializer()
+    frame = {"self": {"time_hour": 9, "current_zone": "Kitchen"}}
+
+    assert materializer.apply(frame) is frame
+
+
+def test_delta_upserts_and_removes_objects_by_id():
+    materializer = PerceptionMaterializer()
+    materializer.apply(_full_frame(seq=1))
+
+    perception = materializer.apply({
+        "type": "delta",
+        "seq": 2,
+        "self": {"time_hour": 10, "current_zone": "Kitchen", "held_item": "TOMATO"},
+        "sensory": {
+            "visible_objects": {
+                "upsert": [{"id": "TomatoBox", "state": {"is_empty": True}}],
+                "remove": ["Oven"],
+            },
+            "reachable_objects": {"upsert": [{"id": "Preparation1", "state": {}}]},
+        },
+    })
+
+    assert isinstance(perception, Perception)
+    assert perception.self.time_hour == 10
+    assert [o.id for o in perception.sensory.visible_objects] == ["TomatoBox"]
+    assert perception.sensory.visible_objects[0].state == {"is_empty": True}
+    assert [o.id for o in perception.sensory.reachable_objects] == ["CutBoard", "Preparation1"]
+    assert perception.statistics.table_item_count == 0
+
+
+def test_execution_trace_does_not_carry_over_deltas():
+    materializer = PerceptionMaterializer()
+    materializer.apply(_full_frame(seq=1))
+    failed = {"step_index": 0, "function": "pickup", "target_id": "Oven", "status": "failed"}
+
+    first = materializer.apply({"type": "delta", "seq": 2, "execution_trace": [failed]})
+    second = materializer.apply({"type": "delta", "seq": 3})
+
+    assert [s.function for s in first.execution_trace] == ["pickup"]
+    assert second.execution_trace == []
+
+
+def test_sequence_gap_requires_resync_until_next_full_frame():
+    materializer = PerceptionMaterializer()
+    materializer.apply(_full_frame(seq=1))
+
+    with pytest.raises(PerceptionResyncRequired) as excinfo:
+        materializer.apply({"type": "delta", "seq": 3})
+    assert excinfo.value.client_details == {"expected_seq": 2}
+
+    # Baseline was dropped; even the "right" next seq needs a full frame.
+    with pytest.raises(PerceptionResyncRequired):
+        materializer.apply({"type": "delta", "seq": 2})
+
+    materializer.apply(_full_frame(seq=10))
+    assert materializer.apply({"type": "delta", "seq": 11}).self.time_hour == 9
+
+
+def test_invalid_delta_leaves_baseline_untouched():
+    materializer = PerceptionMaterializer()
+    materializer.apply(_full_frame(seq=1))
+
+    with pytest.raises(InvalidPerceptionError):
+        materializer.apply({
+            "type": "delta",
+            "seq": 2,
+            "sensory": {
+                "visible_objects": {"remove": ["Oven"], "upsert": [{"type": "no id"}]},
+            },
+        })
+
+    perception = materializer.apply({"type": "delta", "seq": 2})
+    assert [o.id for o in perception.sensory.visible_objects] == ["TomatoBox", "Oven"]
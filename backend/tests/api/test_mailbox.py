@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.api.mailbox import LatestFrameMailbox
+
+
+def _frame(hour: int, trace: list | None = None) -> dict:
+    return {
+        "self": {"time_hour": hour, "current_zone": "Kitchen"},
+        "execution_trace": trace or [],
+    }
+
+
+@pytest.mark.asyncio
+async def test_latest_frame_wins():
+    mailbox = LatestFrameMailbox()
+    mailbox.put(_frame(1))
+    mailbox.put(_frame(2))
+    mailbox.put(_frame(3))
+
+    frame = await mailbox.get()
+
+    assert frame["self"]["time_hour"] == 3
+    assert mailbox.received == 3
+    assert mailbox.dropped == 2
+    assert mailbox.coalesced == 0
+
+
+@pytest.mark.asyncio
+async def test_superseded_trace_is_carried_forward():
+    trace = [{"step_index": 0, "function": "pickup", "status": "success"}]
+    mailbox = LatestFrameMailbox()
+    mailbox.put(_frame(1, trace))
+    mailbox.put(_frame(2))
+
+    frame = await mailbox.get()
+
+    assert frame["self"]["time_hour"] == 2
+    assert frame["execution_trace"] == trace
+    assert mailbox.coalesced == 1
+    assert mailbox.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_get_waits_for_put_and_close_wakes_reader():
+    mailbox = LatestFrameMailbox()
+
+    reader = asyncio.create_task(mailbox.get())
+    await asyncio.sleep(0)
+    assert not reader.done()
+
+    mailbox.put(_frame(7))
+    assert (await reader)["self"]["time_hour"] == 7
+
+    reader = asyncio.create_task(mailbox.get())
+    await asyncio.sleep(0)
+    mailbox.close()
+    assert await reader is None
+
+
+@pytest.mark.asyncio
+async def test_close_discards_unread_frame():
+    mailbox = LatestFrameMailbox()
+    mailbox.put(_frame(1))
+    mailbox.close()
+    mailbox.put(_frame(2))
+
+    assert await mailbox.get() is None
@@ -3,6 +3,7 @@ from fastapi.testclient import TestClient
 from starlette.websockets import WebSocketDisconnect
 
 from app.core.config import settings
+from app.core.deps import get_graph
 from app.main import app
 from app.api.schemas import AgentAction
 
@@ -51,7 +52,7 @@ def test_websocket_agent_flow():
         "retry_count": 0
     }
 
-    with patch("app.api.routes.graph_app.ainvoke", new_callable=AsyncMock) as mock_invoke:
+    with patch.object(get_graph().app, "ainvoke", new_callable=AsyncMock) as mock_invoke:
         mock_invoke.return_value = mock_state_result
 
         with client.websocket_connect("/api/ws/agent/123") as websocket:
@@ -62,6 +63,52 @@ def test_websocket_agent_flow():
             assert response["task"] == "Explore the house"
             assert response["plan"][0]["function"] == "move_to"
 
+def test_batch_plan_streams_ndjson():
+    import json
+    from unittest.mock import AsyncMock, patch
+
+    perception_payload = {
+        "self": {"time_hour": 10, "current_zone": "Kitchen_01", "held_item": None},
+        "sensory": {"player_nearby": False, "visible_objects": [], "reachable_objects": []},
+        "statistics": {"table_item_count": 0, "table_items": []},
+    }
+
+    async def fake_invoke(state):
+        return {
+            **state,
+            "task": f"After {state['task']}",
+            "plan": [AgentAction(function="move_to", args={"id": "PlateBoard"})],
+            "retry_count": state["retry_count"] + 1,
+        }
+
+    request = {
+        "frames": [
+            {"id": "a", "perception": perception_payload},
+            {
+                "id": "b",
+                "perception": perception_payload,
+                "session_state": {"task": "Chop the tomato", "retry_count": 1},
+            },
+            {"id": "bad", "perception": {"self": {}}},
+        ]
+    }
+
+    with patch.object(get_graph().app, "ainvoke", new_callable=AsyncMock) as mock_invoke:
+        mock_invoke.side_effect = fake_invoke
+        response = client.post("/api/agent/batch", json=request)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {row["id"]: row for row in map(json.loads, response.text.splitlines())}
+
+    assert lines["a"]["task"] == "After Decide Next Task"
+    assert lines["b"]["task"] == "After Chop the tomato"
+    assert lines["b"]["session_state"]["retry_count"] == 2
+    assert lines["b"]["plan"][0]["function"] == "move_to"
+    assert lines["bad"]["type"] == "InvalidPerceptionError"
+    assert mock_invoke.await_count == 2
+
+
 @pytest.mark.paid
 @pytest.mark.integration
 @pytest.mark.skipif(
@@ -123,4 +170,56 @@ def test_websocket_live_static_world_failure():
                 raise 
 
     assert excinfo.value.code == 1011
-    print("\n✅ Test Passed: Recursion Limit Hit.")
\ No newline at end of file
+    print("\n✅ Test Passed: Recursion Limit Hit.")
+
+def test_timings_returned_in_debug_mode():
+    import json
+    from unittest.mock import AsyncMock, patch
+
+    perception_payload = {
+        "self": {"time_hour": 10, "current_zone": "Kitchen_01", "held_item": None},
+        "sensory": {"player_nearby": False, "visible_objects": [], "reachable_objects": []},
+        "statistics": {"table_item_count": 0, "table_items": []},
+    }
+    request = {"frames": [{"id": "a", "perception": perception_payload}]}
+
+    with patch.object(get_graph().app, "ainvoke", new_callable=AsyncMock) as mock_invoke:
+        mock_invoke.return_value = {"task": "Explore", "plan": []}
+
+        with patch.object(settings, "debug", False):
+            row = json.loads(client.post("/api/agent/batch", json=request).text)
+        assert "timings" not in row
+
+        with patch.object(settings, "debug", True):
+            row = json.loads(client.post("/api/agent/batch", json=request).text)
+
+    assert list(row["timings"]) == ["validate", "context", "graph", "total"]
+    assert row["timings"]["total"] >= row["timings"]["graph"]
+
+
+def test_batch_is_admitted_once_not_per_frame():
+    import json
+    from unittest.mock import AsyncMock, patch
+
+    from app.api import routes
+    from app.api.admission import AdmissionController
+
+    perception_payload = {
+        "self": {"time_hour": 10, "current_zone": "Kitchen_01", "held_item": None},
+        "sensory": {"player_nearby": False, "visible_objects": [], "reachable_objects": []},
+        "statistics": {"table_item_count": 0, "table_items": []},
+    }
+    # More frames than one client's burst, through a single global slot.
+    request = {"frames": [{"id": str(i), "perception": perception_payload} for i in range(6)]}
+    admission = AdmissionController(max_in_flight=1, client_burst=1)
+
+    with patch.object(routes, "admission", admission), \
+            patch.object(get_graph().app, "ainvoke", new_callable=AsyncMock) as mock_invoke:
+        mock_invoke.return_value = {"task": "Explore", "plan": []}
+        rows = [json.loads(line) for line in client.post("/api/agent/batch", json=request).text.splitlines()]
+        assert len(rows) == 6 and not any("error" in row for row in rows)
+
+        # The batch's own rate limit is spent: one error line for the batch.
+        rows = [json.loads(line) for line in client.post("/api/agent/batch", json=request).text.splitlines()]
+        assert len(rows) == 1
+        assert rows[0]["type"] == "AgentBusyError" and rows[0]["retry_after_ms"] > 0
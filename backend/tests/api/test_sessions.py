@@ -0,0 +1,67 @@
+import pytest
+
+from app.api.schemas import AgentAction
+from app.api.sessions import (
+    RedisSessionStore,
+    decode_session,
+    encode_session,
+    new_session_state,
+)
+
+
+def _state() -> dict:
+    state = new_session_state()
+    state.update(
+        task="Chop the tomato",
+        retry_count=1,
+        skill_guide="Guide",
+        plan=[
+            AgentAction(function="move_to", args={"target_id": "TomatoBox"}),
+            AgentAction(function="pickup", args={"target_id": "TomatoBox"}, thought_trace="grab"),
+        ],
+    )
+    state["history"] = state["history"].add("Chop the tomato", "Failed")
+    return state
+
+
+def test_encode_decode_roundtrip():
+    state = _state()
+    raw = encode_session(state)
+
+    assert " " not in raw.replace("Chop the tomato", "")
+    assert decode_session(raw) == state
+
+
+@pytest.mark.asyncio
+async def test_session_resumes_from_another_store_instance(fake_redis):
+    worker_a = RedisSessionStore(fake_redis, ttl_seconds=60)
+    worker_b = RedisSessionStore(fake_redis, ttl_seconds=60)
+
+    await worker_a.save("42", _state())
+    resumed = await worker_b.load("42")
+
+    assert resumed["task"] == "Chop the tomato"
+    assert resumed["plan"][1].thought_trace == "grab"
+    assert fake_redis.ttl["paprika:session:42"] == 60
+    assert await worker_b.load("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_save_only_refreshes_ttl(fake_redis):
+    store = RedisSessionStore(fake_redis, ttl_seconds=60)
+
+    await store.save("42", _state())
+    await store.save("42", _state())
+
+    assert fake_redis.calls == ["set", "expire"]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_cache_when_redis_is_down(fake_redis):
+    store = RedisSessionStore(fake_redis)
+    await store.save("42", _state())
+
+    fake_redis.down = True
+    await store.save("42", {**_state(), "retry_count": 2})
+
+    assert (await store.load("42"))["retry_count"] == 2
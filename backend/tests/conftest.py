@@ -1,7 +1,10 @@
+import asyncio
 import os
 import pytest
 from datetime import datetime
 
+from redis.exceptions import ConnectionError as RedisConnectionError
+
 # Import the new nested schemas
 from app.api.schemas import (
     AgentAction,
@@ -13,6 +16,7 @@ from app.api.schemas import (
     Sensory,
     TraceStep 
 )
+from app.api.cluster import _RELEASE_SCRIPT, _RENEW_SCRIPT
 from app.core.config import settings
 
 def pytest_configure(config):
@@ -106,6 +110,36 @@ def dummy_perception(dummy_world_objects):
         ],
     )
 
+@pytest.fixture
+def make_perception():
+    """Factory for small perceptions. `tables` are visible Table objects
+    and `reachable` reachable ones, both {id: held item}."""
+    def make(
+        held=None,
+        tables: dict | None = None,
+        reachable: dict | None = None,
+        assembly: dict | None = None,
+        trace: list[dict] | None = None,
+        hour: int = 10,
+    ) -> Perception:
+        return Perception.model_validate({
+            "self": {"time_hour": hour, "current_zone": "Kitchen", "held_item": held},
+            "sensory": {
+                "visible_objects": [
+                    {"id": table, "type": "Table", "state": {"held_item": item}}
+                    for table, item in (tables or {}).items()
+                ],
+                "reachable_objects": [
+                    {"id": table, "state": {"held_item": item}}
+                    for table, item in (reachable or {}).items()
+                ],
+            },
+            "statistics": {},
+            "assembly": assembly or {},
+            "execution_trace": trace or [],
+        })
+    return make
+
 # ------------------------------------------------------------------
 # Memory objects
 # ------------------------------------------------------------------
@@ -121,4 +155,151 @@ def dummy_create_memory():
         memory_type="failure",
         emotion_tags=["confused"],
         importance=0.6,
-    )
\ No newline at end of file
+    )
+
+
+# ------------------------------------------------------------------
+# Redis
+# ------------------------------------------------------------------
+
+class FakePubSub:
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self._redis.subscribers.setdefault(channel, []).append(self._queue)
+
+    async def listen(self):
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for the session store, plan
+    cache, session leases, broadcasts and the skill job queue. Every call
+    is recorded in `calls`; set `down` to make them all fail."""
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.ttl: dict[str, float | None] = {}
+        self.lists: dict[str, list[str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.sets: dict[str, set[str]] = {}
+        self.subscribers: dict[str, list[asyncio.Queue]] = {}
+        self.calls: list[str] = []
+        self.down = False
+
+    def _check(self, op: str):
+        self.calls.append(op)
+        if self.down:
+            raise RedisConnectionError("redis is down")
+
+    # ---- strings ----
+
+    async def get(self, key):
+        self._check("get")
+        return self.data.get(key)
+
+    async def getex(self, key, ex=None):
+        self._check("getex")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        self._check("set")
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        self.ttl[key] = ex if px is None else px / 1000
+        return True
+
+    async def expire(self, key, seconds):
+        self._check("expire")
+        self.ttl[key] = seconds
+
+    async def delete(self, key):
+        self._check("delete")
+        self.data.pop(key, None)
+
+    async def exists(self, key):
+        self._check("exists")
+        return int(key in self.data)
+
+    async def eval(self, script, numkeys, key, token, *args):
+        """The session lease scripts (app/api/cluster.py)."""
+        self._check("eval")
+        assert script in (_RELEASE_SCRIPT, _RENEW_SCRIPT)
+        if self.data.get(key) != token:
+            return 0
+        if script == _RELEASE_SCRIPT:
+            del self.data[key]
+        return 1
+
+    # ---- lists, sorted sets, sets ----
+
+    def _list(self, key):
+        return self.lists.setdefault(key, [])
+
+    async def lpush(self, key, value):
+        self._check("lpush")
+        self._list(key).insert(0, value)
+
+    async def lmove(self, src, dst, wherefrom, whereto):
+        self._check("lmove")
+        if not self._list(src):
+            return None
+        value = self._list(src).pop(-1 if wherefrom == "RIGHT" else 0)
+        if whereto == "LEFT":
+            self._list(dst).insert(0, value)
+        else:
+            self._list(dst).append(value)
+        return value
+
+    async def blmove(self, src, dst, timeout, wherefrom, whereto):
+        return await self.lmove(src, dst, wherefrom, whereto)
+
+    async def lrem(self, key, count, value):
+        self._check("lrem")
+        self._list(key).remove(value)
+
+    async def zadd(self, key, mapping):
+        self._check("zadd")
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrangebyscore(self, key, lo, hi):
+        self._check("zrangebyscore")
+        return [m for m, score in self.zsets.get(key, {}).items() if lo <= score <= hi]
+
+    async def zrem(self, key, member):
+        self._check("zrem")
+        return int(self.zsets.get(key, {}).pop(member, None) is not None)
+
+    async def sadd(self, key, member):
+        self._check("sadd")
+        self.sets.setdefault(key, set()).add(member)
+
+    async def srem(self, key, member):
+        self._check("srem")
+        self.sets.get(key, set()).discard(member)
+
+    async def smembers(self, key):
+        self._check("smembers")
+        return set(self.sets.get(key, set()))
+
+    # ---- pub/sub ----
+
+    async def publish(self, channel, data):
+        self._check("publish")
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "data": data})
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
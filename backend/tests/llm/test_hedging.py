@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.core.metrics import metrics
+from app.llm.base import BaseLLMClient
+from app.llm.hedging import HedgedLLMClient
+
+
+class ScriptedLLM(BaseLLMClient):
+    """Answers each call after the next scripted delay."""
+
+    def __init__(self, delays: list[float]):
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def generate_response(self, system_prompt, user_message):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delays.pop(0))
+        return f"reply {call}"
+
+    async def generate_structured(self, system_prompt, user_message, response_model):
+        raise NotImplementedError
+
+
+def _warm(name: str, latency_ms: float, n: int = 20):
+    for _ in range(n):
+        metrics.histogram(f"llm.latency_ms.{name}").observe(latency_ms)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_sent_after_p90_and_wins():
+    _warm("hedge_win", 10)
+    inner = ScriptedLLM([1.0, 0.0])
+    llm = HedgedLLMClient(inner, name="hedge_win")
+
+    reply = await asyncio.wait_for(llm.generate_response("sys", "user"), timeout=0.5)
+
+    assert reply == "reply 2"
+    assert metrics.counter("llm.hedges_fired.hedge_win").value == 1
+    assert metrics.counter("llm.hedges_won.hedge_win").value == 1
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_enough_samples():
+    inner = ScriptedLLM([0.02])
+    llm = HedgedLLMClient(inner, name="hedge_cold", min_samples=5)
+
+    assert await llm.generate_response("sys", "user") == "reply 1"
+    assert inner.calls == 1
+    assert metrics.histogram("llm.latency_ms.hedge_cold").count == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    _warm("hedge_fast", 200)
+    inner = ScriptedLLM([0.0])
+    llm = HedgedLLMClient(inner, name="hedge_fast")
+
+    assert await llm.generate_response("sys", "user") == "reply 1"
+    assert inner.calls == 1
+    assert metrics.counter("llm.hedges_fired.hedge_fast").value == 0
@@ -0,0 +1,22 @@
+from app.core.metrics import metrics
+from app.llm.usage import record_usage
+
+
+def test_record_usage_tracks_cache_hits():
+    input_tokens = metrics.counter("llm.prompt_cache.input_tokens").value
+    cached = metrics.counter("llm.prompt_cache.cached_tokens").value
+    hits = metrics.histogram("llm.prompt_cache.latency_ms.hit").count
+    misses = metrics.histogram("llm.prompt_cache.latency_ms.miss").count
+
+    record_usage({"input_tokens": 2000, "output_tokens": 50}, latency_ms=900)
+    record_usage(
+        {"input_tokens": 2000, "output_tokens": 50, "input_token_details": {"cache_read": 1536}},
+        latency_ms=400,
+    )
+    record_usage(None, latency_ms=100)
+
+    assert metrics.counter("llm.prompt_cache.input_tokens").value == input_tokens + 4000
+    assert metrics.counter("llm.prompt_cache.cached_tokens").value == cached + 1536
+    assert metrics.histogram("llm.prompt_cache.latency_ms.hit").count == hits + 1
+    assert metrics.histogram("llm.prompt_cache.latency_ms.miss").count == misses + 1
+    assert 0 < metrics.gauge("llm.prompt_cache.hit_rate").value < 1